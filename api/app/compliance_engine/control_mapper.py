@@ -0,0 +1,65 @@
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Keyword -> control rules are data, not if-statements. Point
+# COMPLIANCE_RULES_PATH at another JSON file ({control_name: [keywords]}) to override.
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent / "mapping_rules.json"
+
+# Distinct finding titles remembered per mapper (scan titles repeat heavily)
+TITLE_CACHE_SIZE = 65536
+
+
+class ControlMapper:
+    """
+    Compiles keyword rules into ONE regex that is evaluated once per title.
+
+    The pattern is a zero-width lookahead over every keyword (longest first), so
+    a single C-level scan reports a hit at every position a keyword starts. A
+    shorter keyword that starts at the same position as a longer one is always a
+    substring of it, so each keyword carries the controls of every rule keyword
+    it contains - the result is exactly "title contains keyword", for any number
+    of rules, without re-lowercasing or looping over rules in Python.
+    """
+
+    def __init__(self, rules: Dict[str, List[str]]):
+        self.rules = rules
+        self.control_names = list(rules)
+
+        keyword_controls: Dict[str, set] = {}
+        for position, (control_name, keywords) in enumerate(rules.items()):
+            for keyword in keywords:
+                keyword_controls.setdefault(keyword.lower(), set()).add(position)
+
+        keywords = sorted(keyword_controls, key=len, reverse=True)
+        self._controls_for_keyword = {
+            keyword: frozenset().union(*(keyword_controls[k] for k in keywords if k in keyword))
+            for keyword in keywords
+        }
+        self._pattern = re.compile(
+            "(?=(" + "|".join(re.escape(k) for k in keywords) + "))"
+        ) if keywords else None
+
+        self.match = lru_cache(maxsize=TITLE_CACHE_SIZE)(self._match)
+
+    def _match(self, title: str) -> Tuple[str, ...]:
+        """Control names (in rule order) whose keywords appear in the title."""
+        if self._pattern is None:
+            return ()
+        positions = set()
+        for hit in self._pattern.finditer(title.lower()):
+            positions |= self._controls_for_keyword[hit.group(1)]
+        return tuple(self.control_names[p] for p in sorted(positions))
+
+
+def load_rules(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """Loads {control_name: [keywords]} rules (defaults to COMPLIANCE_RULES_PATH / mapping_rules.json)."""
+    path = path or os.environ.get("COMPLIANCE_RULES_PATH") or DEFAULT_RULES_PATH
+    with open(path) as f:
+        return json.load(f)
+
+
+CONTROL_MAPPER = ControlMapper(load_rules())
@@ -0,0 +1,90 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+# Heatmap severity columns; counts under any other severity go to the last one
+HEATMAP_SEVERITIES = ("Critical", "High", "Medium", "Low", "Unknown")
+_SEVERITY_POSITION = {severity: i for i, severity in enumerate(HEATMAP_SEVERITIES)}
+
+
+def framework_key(name: str) -> str:
+    """Lookup key for a framework name: 'NIST 800-53', 'nist-800-53' and 'nist80053' are the same."""
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+def _reference_order(reference: Optional[str]):
+    # Natural order, so A.9.2.3 sorts before A.12.6.1 and AC-3 before AC-12
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", reference or "")]
+
+
+class CrosswalkIndex:
+    """
+    Framework -> control crosswalk, built once from the framework_control_link rows.
+
+    Every control gets a fixed row position. Per-control finding counts are then a
+    single (controls x HEATMAP_SEVERITIES) integer array, and a framework is just
+    the array of the positions of its controls, in reference order. Building a
+    heatmap means indexing that array; there is no per-request join.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, str, Optional[str], int, str, Optional[str]]]):
+        """
+        rows: (framework name, framework version, reference, control id, control name,
+        CIA domain); the control columns are None for a framework without controls.
+        """
+        self.position: Dict[int, int] = {}
+        self.controls: List[Dict[str, Any]] = []
+        members: Dict[str, List[Tuple[Optional[str], int]]] = {}
+        self.frameworks: Dict[str, Dict[str, Any]] = {}
+
+        for framework, version, reference, control_id, control_name, cia_domain in rows:
+            key = framework_key(framework)
+            self.frameworks.setdefault(key, {"framework": framework, "version": version})
+            members.setdefault(key, [])
+            if control_id is None:
+                continue  # a framework without controls yet
+            position = self.position.get(control_id)
+            if position is None:
+                position = self.position[control_id] = len(self.controls)
+                self.controls.append({"control_id": control_id, "control_name": control_name, "cia_domain": cia_domain})
+            members[key].append((reference, position))
+
+        for key, entries in members.items():
+            entries.sort(key=lambda entry: _reference_order(entry[0]))
+            self.frameworks[key]["references"] = [reference for reference, _ in entries]
+            self.frameworks[key]["positions"] = np.array([position for _, position in entries], dtype=np.intp)
+
+    def framework(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.frameworks.get(framework_key(name))
+
+    def count_matrix(self, rows: Iterable[Tuple[int, str, int]]) -> np.ndarray:
+        """Packs (control id, severity, count) rows into the (controls x severities) count array."""
+        counts = np.zeros((len(self.controls), len(HEATMAP_SEVERITIES)), dtype=np.int64)
+        other = len(HEATMAP_SEVERITIES) - 1
+        for control_id, severity, count in rows:
+            position = self.position.get(control_id)
+            if position is not None:
+                counts[position, _SEVERITY_POSITION.get(severity, other)] += count
+        return counts
+
+    def heatmap(self, framework: Dict[str, Any], counts: np.ndarray) -> Dict[str, Any]:
+        """Per-control severity breakdown of one framework (controls in reference order)."""
+        rows = counts[framework["positions"]]
+        totals = rows.sum(axis=1).tolist()
+        return {
+            "framework": framework["framework"],
+            "version": framework["version"],
+            "severities": list(HEATMAP_SEVERITIES),
+            "controls": [
+                {
+                    "reference": reference,
+                    **self.controls[position],
+                    "total": total,
+                    "by_severity": dict(zip(HEATMAP_SEVERITIES, row)),
+                }
+                for reference, position, total, row in zip(
+                    framework["references"], framework["positions"].tolist(), totals, rows.tolist()
+                )
+            ],
+            "totals": dict(zip(HEATMAP_SEVERITIES, rows.sum(axis=0).tolist())),
+            "total": int(rows.sum()),
+        }
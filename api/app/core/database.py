@@ -1,17 +1,110 @@
+import json
 import os
-from sqlalchemy import create_engine
+from typing import Callable, TypeVar
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 
+T = TypeVar("T")
 
-DATABASE_URL = os.environ.get("DATABASE_URL") 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+
+class PreSerializedJSON(str):
+    """JSON text produced ahead of time (e.g. by ingestion worker processes); written to JSON columns as-is."""
+
+def _json_serializer(value):
+    return value if isinstance(value, PreSerializedJSON) else json.dumps(value)
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+# --- Connection pool settings (per process, per engine) ---
+# Sync handlers run on Starlette's threadpool (40 threads): a pool smaller than
+# the number of concurrently polling requests makes them queue for connections.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+# Upper bound for read-path statements (dashboard, reports, findings browsing); 0 = none.
+# Ingestion, migrations and rebuilds are never limited.
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+# --- Async read engine ---
+# DB_ASYNC_READS=1 serves the read endpoints from an asyncpg engine on the event
+# loop instead of sync sessions on the threadpool. DATABASE_ASYNC_URL defaults to
+# DATABASE_URL with the asyncpg driver.
+DB_ASYNC_READS = os.environ.get("DB_ASYNC_READS", "0") == "1"
+DATABASE_ASYNC_URL = os.environ.get("DATABASE_ASYNC_URL")
+# asyncpg prepares every statement; this many are kept per connection
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_PREPARED_STATEMENT_CACHE_SIZE", "256"))
+
+engine = create_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    json_serializer=_json_serializer,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+_async_engine = None
+_async_sessionmaker = None
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_async_engine():
+    """Returns the asyncpg engine (created on first use: sync-only deployments never load asyncpg)."""
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+        url = make_url(DATABASE_ASYNC_URL or DATABASE_URL).set(drivername="postgresql+asyncpg")
+        url = url.update_query_dict({"prepared_statement_cache_size": str(DB_PREPARED_STATEMENT_CACHE_SIZE)})
+        server_settings = {"application_name": "grc-api-async"}
+        if DB_STATEMENT_TIMEOUT_MS:
+            server_settings["statement_timeout"] = str(DB_STATEMENT_TIMEOUT_MS)
+        _async_engine = create_async_engine(
+            url,
+            pool_pre_ping=True,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            json_serializer=_json_serializer,
+            connect_args={"server_settings": server_settings},
+        )
+        _async_sessionmaker = async_sessionmaker(_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+async def dispose_async_engine():
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_sessionmaker = None
+
+def _run_sync_read(fn: Callable[[Session], T]) -> T:
+    db = SessionLocal()
+    try:
+        if DB_STATEMENT_TIMEOUT_MS:
+            db.execute(text("SET LOCAL statement_timeout = :ms"), {"ms": DB_STATEMENT_TIMEOUT_MS})
+        return fn(db)
+    finally:
+        db.close()
+
+async def run_read(fn: Callable[[Session], T]) -> T:
+    """
+    Runs fn(session) for a read endpoint. With DB_ASYNC_READS the (sync) query code
+    runs through AsyncSession.run_sync on the asyncpg engine, without a thread;
+    otherwise on the threadpool with a regular session.
+    """
+    if DB_ASYNC_READS:
+        get_async_engine()
+        async with _async_sessionmaker() as session:
+            return await session.run_sync(fn)
+    return await run_in_threadpool(_run_sync_read, fn)
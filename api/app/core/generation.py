@@ -0,0 +1,38 @@
+"""
+Data generation counter.
+
+A Postgres sequence (models.data_generation_seq) that is advanced after every commit that changed ingested
+data. Readers compare it against the generation a cached response was computed
+for: same generation, same data. Sequences are non-transactional and never
+block, so concurrent ingestion chunks do not contend on it, and the value is
+shared by every API worker process.
+"""
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+_CHANGED_KEY = "data_generation_changed"
+
+
+def mark_data_changed(db: Session):
+    """Flags the current transaction; the generation advances once it commits."""
+    db.info[_CHANGED_KEY] = True
+
+def current_generation(db: Session) -> int:
+    """Returns the current data generation (one tiny read, no table scan)."""
+    # A fresh sequence reports last_value=1 before its first nextval(), hence is_called
+    return db.execute(text(
+        "SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM data_generation_seq"
+    )).scalar()
+
+@event.listens_for(Session, "after_commit")
+def _advance_generation(session: Session):
+    # Bumped only AFTER commit, so a reader can never cache pre-commit data
+    # under the new generation number.
+    if session.info.pop(_CHANGED_KEY, False):
+        with session.get_bind().connect() as conn:
+            conn.execute(text("SELECT nextval('data_generation_seq')"))
+            conn.commit()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_generation_change(session: Session):
+    session.info.pop(_CHANGED_KEY, None)
@@ -0,0 +1,151 @@
+"""
+In-process metrics exposed in Prometheus text format at GET /metrics.
+
+Histograms keep fixed cumulative buckets per label set (one lock-protected list
+update per observation), so instrumenting hot paths costs well under a
+microsecond. Ingestion workers running in a separate process (INGEST_EXECUTOR=
+process) hand their observations back with drain_state()/merge_state().
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Default latency buckets (seconds)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with an optional set of labels."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [count per bucket (+Inf last), sum]
+        self._series: Dict[LabelValues, list] = {}
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        """Observes the wall time of the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def _merge(self, labels: LabelValues, series: list):
+        with self._lock:
+            mine = self._series.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0])
+            mine[0] = [a + b for a, b in zip(mine[0], series[0])]
+            mine[1] += series[1]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        for labels, (counts, total) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter with an optional set of labels."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._series: Dict[LabelValues, float] = {}
+        REGISTRY.append(self)
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def _merge(self, labels: LabelValues, value: float):
+        self.inc(*labels, amount=value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._series)
+        for labels, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: LabelValues, le: str = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+REGISTRY: List = []
+
+def render() -> str:
+    """All registered metrics in Prometheus text exposition format."""
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+def drain_state() -> Dict[str, list]:
+    """Returns and resets every metric's series (picklable; see merge_state)."""
+    state = {}
+    for metric in REGISTRY:
+        with metric._lock:
+            series, metric._series = metric._series, {}
+        state[metric.name] = list(series.items())
+    return state
+
+def merge_state(state: Dict[str, list]):
+    """Adds series drained from another process into this process' metrics."""
+    by_name = {metric.name: metric for metric in REGISTRY}
+    for name, series in state.items():
+        metric = by_name.get(name)
+        if metric is not None:
+            for labels, value in series:
+                metric._merge(tuple(labels), value)
+
+
+# --- Application metrics ---
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "grc_http_request_duration_seconds", "HTTP request latency by route.", ["method", "route", "status"]
+)
+INGEST_STAGE_SECONDS = Histogram(
+    "grc_ingest_stage_seconds", "Time spent per ingestion pipeline stage, per chunk.", ["stage", "source"]
+)
+INGEST_ROWS = Counter(
+    "grc_ingest_rows_total", "Rows seen by the ingestion pipeline by outcome.", ["source", "outcome"]
+)
+AI_SUMMARY_SECONDS = Histogram(
+    "grc_ai_summary_seconds", "AI summary generation time (including retries) by outcome.", ["status"]
+)
+ANALYTICS_QUERY_SECONDS = Histogram(
+    "grc_analytics_query_seconds", "Dashboard analytics query time.", ["query"]
+)
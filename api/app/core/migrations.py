@@ -0,0 +1,160 @@
+"""
+Versioned schema migrations.
+
+Base.metadata.create_all only creates missing tables, so existing deployments
+never pick up new columns or indexes. Every schema change after the baseline is
+recorded here as a numbered migration; run_migrations() applies the ones not yet
+listed in schema_migrations, in order, at startup (or via
+`python -m app.manage migrate`).
+
+A migration is a list of SQL statements. Statements are idempotent (IF NOT
+EXISTS) so a fresh database, where create_all already built the current schema,
+just records them as applied. Migrations marked `transactional=False` run in
+autocommit mode, which CREATE INDEX CONCURRENTLY requires so large tables stay
+writable while indexes build.
+"""
+import logging
+from datetime import datetime
+from typing import List, NamedTuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant: serializes migration runs across API workers
+MIGRATION_LOCK_ID = 7412001
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    statements: List[str]
+    transactional: bool = True
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Columns added since the baseline schema", [
+        "ALTER TABLE findings ADD COLUMN IF NOT EXISTS summary_id INTEGER REFERENCES ai_summaries(id)",
+    ]),
+    Migration(2, "Indexes for the analytics and ingestion queries", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_findings_asset_id ON findings (asset_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_findings_source_type ON findings (source_type)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_findings_ingestion_date_covering "
+        "ON findings (ingestion_date) INCLUDE (normalized_severity, source_type)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_risks_rating_finding ON risks (risk_rating, finding_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_finding_control_link_control_id "
+        "ON finding_control_link (control_id, finding_id)",
+        "ANALYZE findings",
+        "ANALYZE risks",
+        "ANALYZE finding_control_link",
+    ], transactional=False),
+    Migration(3, "Keyset pagination indexes for GET /findings", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_findings_ingestion_date_id ON findings (ingestion_date, id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_findings_source_date_id "
+        "ON findings (source_type, ingestion_date, id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_findings_asset_date_id "
+        "ON findings (asset_id, ingestion_date, id)",
+    ], transactional=False),
+    Migration(4, "Finding fingerprints for incremental re-ingestion", [
+        "ALTER TABLE findings ADD COLUMN IF NOT EXISTS fingerprint VARCHAR",
+        "ALTER TABLE findings ADD COLUMN IF NOT EXISTS last_seen TIMESTAMP",
+        "ALTER TABLE findings ADD COLUMN IF NOT EXISTS status VARCHAR DEFAULT 'open'",
+        "ALTER TABLE findings ADD COLUMN IF NOT EXISTS closed_at TIMESTAMP",
+        "UPDATE findings SET status = 'open' WHERE status IS NULL",
+        "UPDATE findings SET last_seen = ingestion_date WHERE last_seen IS NULL",
+        # Same recipe as crud_findings.finding_fingerprint
+        "UPDATE findings f SET fingerprint = md5("
+        "a.ip_address || '|' || lower(btrim(regexp_replace(f.normalized_title, '\\s+', ' ', 'g'))) "
+        "|| '|' || f.source_type) "
+        "FROM assets a WHERE a.id = f.asset_id AND f.fingerprint IS NULL",
+        # Earlier re-uploads stored the same finding many times: keep the newest copy
+        # open and close the others (their fingerprint is cleared to free the unique key)
+        "UPDATE findings SET status = 'closed', closed_at = now() at time zone 'utc', fingerprint = NULL "
+        "WHERE id IN (SELECT id FROM (SELECT id, row_number() OVER "
+        "(PARTITION BY fingerprint ORDER BY id DESC) AS copy FROM findings WHERE fingerprint IS NOT NULL) d "
+        "WHERE copy > 1)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_findings_fingerprint ON findings (fingerprint)",
+        "CREATE INDEX IF NOT EXISTS ix_findings_open_source_last_seen "
+        "ON findings (source_type, last_seen) WHERE status = 'open'",
+        # Dashboard counts now cover open findings only: emptied here, rebuilt on startup
+        # (crud_aggregates.ensure_aggregates)
+        "DELETE FROM agg_risk_rating_counts",
+        # Guarded (to_regclass) so the migration stays valid once a later one drops these tables
+        "DO $$ BEGIN IF to_regclass('agg_control_finding_counts') IS NOT NULL THEN "
+        "DELETE FROM agg_control_finding_counts; END IF; END $$",
+        "DO $$ BEGIN IF to_regclass('agg_daily_finding_counts') IS NOT NULL THEN "
+        "DELETE FROM agg_daily_finding_counts; END IF; END $$",
+    ]),
+    Migration(5, "Compact evidence storage", [
+        "ALTER TABLE findings ADD COLUMN IF NOT EXISTS evidence_schema_id INTEGER REFERENCES evidence_schemas(id)",
+        # Already zlib-compressed: TOAST should not try to compress it again
+        "ALTER TABLE finding_evidence ALTER COLUMN data SET STORAGE EXTERNAL",
+    ]),
+    Migration(6, "Trend rollups by granularity, severity and source", [
+        # Replaced by agg_finding_trend_counts (created empty by create_all and filled on
+        # startup by crud_aggregates.ensure_aggregates)
+        "DROP TABLE IF EXISTS agg_daily_finding_counts",
+    ]),
+    Migration(7, "Versioned risk models", [
+        # risk_models / risk_model_scores come from create_all; existing scores keep NULL
+        # (they predate versioning) until the next re-score
+        "ALTER TABLE risks ADD COLUMN IF NOT EXISTS model_version INTEGER",
+    ]),
+    Migration(8, "Framework crosswalk references and per-control severity counts", [
+        # Filled in by crud_compliance.seed_initial_compliance_data on startup
+        "ALTER TABLE framework_control_link ADD COLUMN IF NOT EXISTS reference VARCHAR",
+        # Replaced by agg_control_severity_counts (filled by crud_aggregates.ensure_aggregates)
+        "DROP TABLE IF EXISTS agg_control_finding_counts",
+    ]),
+    Migration(9, "Retry bookkeeping for failed AI summaries", [
+        # Rows that failed before this have failed_at NULL: retried on the next pass
+        "ALTER TABLE ai_summaries ADD COLUMN IF NOT EXISTS failures INTEGER DEFAULT 0",
+        "ALTER TABLE ai_summaries ADD COLUMN IF NOT EXISTS failed_at TIMESTAMP",
+    ]),
+    Migration(10, "Index for risk model re-score catch-up", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_risks_model_version ON risks (model_version)",
+    ], transactional=False),
+]
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    with engine.connect() as conn:
+        return list(conn.execute(text("SELECT version FROM schema_migrations ORDER BY version")).scalars())
+
+def run_migrations(engine: Engine) -> List[int]:
+    """Applies pending migrations in version order. Returns the versions applied."""
+    applied = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        # Session-level advisory lock: only one worker migrates, the others wait then skip
+        lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        try:
+            lock_conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INTEGER PRIMARY KEY, description VARCHAR, applied_at TIMESTAMP)"
+            ))
+            done = set(lock_conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+            for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+                if migration.version in done:
+                    continue
+                _apply(engine, lock_conn, migration)
+                applied.append(migration.version)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+    return applied
+
+def _apply(engine: Engine, autocommit_conn, migration: Migration):
+    record = text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)")
+    params = {"v": migration.version, "d": migration.description, "t": datetime.utcnow()}
+
+    if migration.transactional:
+        # All statements and the bookkeeping row commit together
+        with engine.begin() as conn:
+            for statement in migration.statements:
+                conn.execute(text(statement))
+            conn.execute(record, params)
+    else:
+        for statement in migration.statements:
+            autocommit_conn.execute(text(statement))
+        autocommit_conn.execute(record, params)
+    logger.info("Applied migration %s: %s", migration.version, migration.description)
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, Date, DateTime, Float, LargeBinary, Table, Sequence, Index, text
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.dialects.postgresql import JSONB
 from .database import Base
 from datetime import datetime
@@ -28,10 +28,18 @@ class Risk(Base):
     cia_confidentiality = Column(Float)
     cia_integrity = Column(Float)
     cia_availability = Column(Float)
+    model_version = Column(Integer) # risk_models.version that produced the scores (NULL: before versioning)
     
     # Relationship back to Finding
     finding = relationship("Finding", back_populates="risk", uselist=False)
 
+    # Rating filters/counts resolve to findings without touching the heap
+    __table_args__ = (
+        Index("ix_risks_rating_finding", "risk_rating", "finding_id"),
+        # Re-score catch-up passes: rows not yet on the target version
+        Index("ix_risks_model_version", "model_version"),
+    )
+
 class Framework(Base):
     __tablename__ = "frameworks"
     id = Column(Integer, primary_key=True, index=True)
@@ -61,14 +69,17 @@ class Control(Base):
 finding_control_link = Table(
     'finding_control_link', Base.metadata,
     Column('finding_id', ForeignKey('findings.id'), primary_key=True),
-    Column('control_id', ForeignKey('controls.id'), primary_key=True)
+    Column('control_id', ForeignKey('controls.id'), primary_key=True),
+    # The PK serves finding -> controls; this serves control -> findings
+    Index('ix_finding_control_link_control_id', 'control_id', 'finding_id'),
 )
 
 # --- Framework Control Mapping (M:M Linking Table) ---
 framework_control_link = Table(
     'framework_control_link', Base.metadata,
     Column('framework_id', ForeignKey('frameworks.id'), primary_key=True),
-    Column('control_id', ForeignKey('controls.id'), primary_key=True)
+    Column('control_id', ForeignKey('controls.id'), primary_key=True),
+    Column('reference', String), # the framework's own control id, e.g. 'CM-3' or 'A.12.6.1'
 )
 
 
@@ -77,17 +88,166 @@ class Finding(Base):
     __tablename__ = "findings"
     
     id = Column(Integer, primary_key=True, index=True)
-    asset_id = Column(Integer, ForeignKey("assets.id"))
+    asset_id = Column(Integer, ForeignKey("assets.id"), index=True)
     
     normalized_title = Column(String, index=True)
-    source_type = Column(String) 
+    source_type = Column(String, index=True) 
     normalized_severity = Column(String) # 'Low', 'Medium', 'High', 'Critical'
     
-    summary = Column(String) # AI SUMMARY COLUMN
+    summary = Column(String) # AI SUMMARY COLUMN (legacy per-row text; new rows use summary_id)
+    summary_id = Column(Integer, ForeignKey("ai_summaries.id")) # Shared, content-addressed summary
     
-    raw_evidence = Column(JSONB) 
-    ingestion_date = Column(DateTime, default=datetime.utcnow)
+    # Compact evidence (see crud/crud_evidence.py): values only, keys in the shared schema row.
+    # Deferred: only loaded when the evidence itself is requested.
+    raw_evidence = deferred(Column(JSONB))
+    evidence_schema_id = Column(Integer, ForeignKey("evidence_schemas.id")) # NULL: raw_evidence is the full dict
+    ingestion_date = Column(DateTime, default=datetime.utcnow) # first seen
+
+    # Re-ingestion state: a finding is identified across scans by its fingerprint
+    # (md5 of asset IP | normalized title | source, see crud_findings.finding_fingerprint)
+    fingerprint = Column(String)
+    last_seen = Column(DateTime, default=datetime.utcnow)
+    status = Column(String, default="open") # 'open', 'closed' (absent from a later full scan)
+    closed_at = Column(DateTime)
+
     controls = relationship("Control", secondary=finding_control_link, back_populates="findings")
     
     asset = relationship("Asset", back_populates="findings")
-    risk = relationship("Risk", back_populates="finding", uselist=False)
\ No newline at end of file
+    risk = relationship("Risk", back_populates="finding", uselist=False)
+    cached_summary = relationship("AISummary")
+    evidence_blob = relationship("FindingEvidence", uselist=False, lazy="select")
+
+    # Covering index for date-range / trend queries (index-only scans by day, severity, source)
+    # plus (ingestion_date, id) keyset indexes for GET /findings pagination
+    __table_args__ = (
+        Index(
+            "ix_findings_ingestion_date_covering", "ingestion_date",
+            postgresql_include=["normalized_severity", "source_type"],
+        ),
+        Index("ix_findings_ingestion_date_id", "ingestion_date", "id"),
+        Index("ix_findings_source_date_id", "source_type", "ingestion_date", "id"),
+        Index("ix_findings_asset_date_id", "asset_id", "ingestion_date", "id"),
+        Index("ix_findings_fingerprint", "fingerprint", unique=True),
+        # Closing findings missing from a scan: open rows of one source not seen since it started
+        Index(
+            "ix_findings_open_source_last_seen", "source_type", "last_seen",
+            postgresql_where=text("status = 'open'"),
+        ),
+    )
+
+
+# AI Summary Cache (one row per distinct prompt, shared by every matching finding)
+class AISummary(Base):
+    __tablename__ = "ai_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String, unique=True, index=True) # sha256 of the normalized prompt inputs
+
+    # Prompt inputs, kept so pending rows can be regenerated after a restart
+    normalized_title = Column(String)
+    normalized_severity = Column(String)
+    control_context = Column(String)
+
+    summary = Column(String)
+    status = Column(String, default="pending") # 'pending', 'done', 'failed' (filled by the summary worker)
+    # Failed rows are retried after a cooldown, up to a cap (crud_summaries.retryable_failed)
+    failures = Column(Integer, default=0)
+    failed_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Evidence key sets, shared by every finding whose scanner row had the same columns
+class EvidenceSchema(Base):
+    __tablename__ = "evidence_schemas"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key_hash = Column(String, unique=True, index=True) # md5 of keys + derived
+    keys = Column(JSONB) # original column order
+    derived = Column(JSONB) # {column: normalized field it equals}, not stored per finding
+
+
+# Large evidence, zlib-compressed and kept out of the findings table
+class FindingEvidence(Base):
+    __tablename__ = "finding_evidence"
+
+    finding_id = Column(Integer, ForeignKey("findings.id"), primary_key=True)
+    data = Column(LargeBinary) # zlib(JSON array of the stored values)
+
+
+# Risk model versions (see crud/crud_risk_models.py). Exactly one is 'active':
+# ingestion scores with it and the dashboard counts describe it.
+class RiskModel(Base):
+    __tablename__ = "risk_models"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String)
+    definition = Column(JSONB) # risk_model.json format
+    status = Column(String, default="draft") # 'draft', 'rescoring', 'active', 'retired'
+    total_rows = Column(BigInteger) # re-score progress: risk rows to visit...
+    rescored_rows = Column(BigInteger, default=0) # ...and rows rewritten so far
+    created_at = Column(DateTime, default=datetime.utcnow)
+    activated_at = Column(DateTime)
+
+# Score lookup per model version and severity, joined by the set-based re-score
+# (normalized_severity '*' holds the model's default for unknown severities)
+class RiskModelScore(Base):
+    __tablename__ = "risk_model_scores"
+
+    version = Column(Integer, ForeignKey("risk_models.version"), primary_key=True)
+    normalized_severity = Column(String, primary_key=True)
+    inherent_score = Column(Float)
+    risk_rating = Column(String)
+    cia_confidentiality = Column(Float)
+    cia_integrity = Column(Float)
+    cia_availability = Column(Float)
+
+
+# Background ingestion jobs (progress reported by GET /findings/jobs/{id})
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(String, primary_key=True) # uuid4 hex
+    source_name = Column(String)
+    filename = Column(String)
+
+    status = Column(String, default="queued") # 'queued', 'running', 'completed', 'failed'
+    stage = Column(String, default="queued") # current pipeline stage, e.g. 'persisting'
+    rows_processed = Column(Integer, default=0)
+    rows_failed = Column(Integer, default=0)
+    errors = Column(JSONB, default=list)
+    result = Column(JSONB) # preview finding/controls once completed
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+
+
+# --- Dashboard Aggregates ---
+# Maintained transactionally by the ingestion write path (crud_aggregates) so the
+# dashboard reads a handful of precomputed rows instead of scanning findings.
+class RiskRatingCount(Base):
+    __tablename__ = "agg_risk_rating_counts"
+    risk_rating = Column(String, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+# Open findings per control and severity (compliance heatmaps; control maturity sums them)
+class ControlSeverityCount(Base):
+    __tablename__ = "agg_control_severity_counts"
+    control_id = Column(Integer, ForeignKey("controls.id"), primary_key=True)
+    normalized_severity = Column(String, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+# New findings per time bucket, severity and source: the trend is rolled up at
+# every granularity on write, so a chart of any range reads only its own buckets
+class FindingTrendCount(Base):
+    __tablename__ = "agg_finding_trend_counts"
+    granularity = Column(String, primary_key=True)  # day / week / month
+    bucket = Column(Date, primary_key=True)  # first day of the bucket (weeks start on Monday)
+    normalized_severity = Column(String, primary_key=True)
+    source_type = Column(String, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+
+# Advanced after every commit that changes ingested data (see core/generation.py)
+data_generation_seq = Sequence("data_generation_seq", metadata=Base.metadata)
@@ -0,0 +1,57 @@
+"""
+Generation-stamped response cache with ETag / If-None-Match support.
+
+Responses are cached per URL (path + query) together with the data generation
+they were computed for (see core.generation). While the generation is
+unchanged a poll costs one sequence read: a 304 if the client already has the
+current ETag, otherwise the cached bytes.
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from .generation import current_generation
+
+MAX_CACHED_RESPONSES = 256
+
+# cache key -> (generation, JSON body), least recently used first
+_cache: OrderedDict = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cache_key(request: Request) -> str:
+    return request.url.path + "?" + "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+
+def cached_json_response(request: Request, db: Session, compute: Callable[[], Any]) -> Response:
+    """Returns compute()'s JSON, served from cache (or as a 304) while the data generation is unchanged."""
+    generation = current_generation(db)
+    etag = f'"g{generation}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    # 1. Client already has this generation
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    # 2. Cached body for this generation
+    key = _cache_key(request)
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == generation:
+            _cache.move_to_end(key)
+            return Response(cached[1], media_type="application/json", headers=headers)
+
+    # 3. Recompute and remember
+    body = json.dumps(jsonable_encoder(compute())).encode("utf-8")
+    with _lock:
+        _cache[key] = (generation, body)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_RESPONSES:
+            _cache.popitem(last=False)
+    return Response(body, media_type="application/json", headers=headers)
+
+def clear():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,81 @@
+"""
+COPY-based bulk writes for the ingestion path.
+
+A multi-row INSERT makes SQLAlchemy render and bind every value of the chunk;
+COPY FROM STDIN streams the rows as tab-separated text that the server parses
+itself. Both helpers run on the session's own connection, so the rows join the
+caller's transaction (and roll back with it). They use the psycopg2 cursor API.
+
+INGEST_COPY=0 switches the ingestion writers back to multi-row INSERTs.
+"""
+import io
+import json
+import os
+from typing import Any, Dict, List, Sequence, Tuple
+from sqlalchemy import Table
+from sqlalchemy.orm import Session
+
+INGEST_COPY = os.environ.get("INGEST_COPY", "1") == "1"
+
+# COPY text format: backslash escapes for the delimiter, line breaks and itself
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _field(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, (dict, list)):
+        # JSON columns; PreSerializedJSON values are already text
+        value = json.dumps(value)
+    elif not isinstance(value, str):
+        return str(value)  # numbers, and datetimes as 'YYYY-MM-DD HH:MM:SS[.ffffff]'
+    return value.translate(_ESCAPES)
+
+def _copy(cursor, target: str, columns: Sequence[str], rows: List[Dict[str, Any]]):
+    buf = io.StringIO()
+    buf.writelines("\t".join([_field(row[c]) for c in columns]) + "\n" for row in rows)
+    buf.seek(0)
+    cursor.copy_expert(f"COPY {target} ({', '.join(columns)}) FROM STDIN", buf)
+
+def copy_rows(db: Session, table: Table, rows: List[Dict[str, Any]]):
+    """Appends `rows` (dicts with the same keys) to `table` with one COPY. Does not commit."""
+    if not rows:
+        return
+    cursor = db.connection().connection.cursor()
+    try:
+        _copy(cursor, table.name, list(rows[0]), rows)
+    finally:
+        cursor.close()
+
+def copy_insert_returning(
+    db: Session, table: Table, rows: List[Dict[str, Any]], conflict_columns: Sequence[str], returning: Sequence[str]
+) -> List[Tuple]:
+    """
+    COPY-backed INSERT ... ON CONFLICT (conflict_columns) DO NOTHING RETURNING.
+    The rows are copied into a per-connection temporary staging table (emptied
+    on commit) and moved over with one INSERT ... SELECT. Does not commit.
+    Returns the `returning` columns of the rows actually inserted.
+    """
+    if not rows:
+        return []
+    columns = list(rows[0])
+    column_list = ", ".join(columns)
+    staging = f"copy_staging_{table.name}"
+    cursor = db.connection().connection.cursor()
+    try:
+        # Created once per connection; the column list of a table's writer never changes
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DELETE ROWS "
+            f"AS SELECT {column_list} FROM {table.name} WITH NO DATA"
+        )
+        _copy(cursor, staging, columns, rows)
+        cursor.execute(
+            f"INSERT INTO {table.name} ({column_list}) SELECT {column_list} FROM {staging} "
+            f"ON CONFLICT ({', '.join(conflict_columns)}) DO NOTHING RETURNING {', '.join(returning)}"
+        )
+        inserted = cursor.fetchall()
+        # Emptied now as well, in case the table is written again in this transaction
+        cursor.execute(f"TRUNCATE {staging}")
+        return inserted
+    finally:
+        cursor.close()
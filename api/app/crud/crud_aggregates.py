@@ -0,0 +1,150 @@
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Hashable, Optional, Tuple, Union
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from ..core import models
+from ..core.generation import mark_data_changed
+
+# --- Incremental Aggregate Maintenance ---
+# Every bulk write helper calls these inside the caller's transaction, so the
+# aggregate rows always commit (or roll back) together with the base rows.
+
+# Aggregate rows need a key even when a finding has no severity/source
+UNKNOWN_SEVERITY = "Unknown"
+UNKNOWN_SOURCE = "unknown"
+
+def _bump(db: Session, model, key_columns: Union[str, Tuple[str, ...]], counts: Dict[Hashable, int]):
+    """
+    Adds `counts` to the aggregate table with one INSERT ... ON CONFLICT DO UPDATE.
+    With several key columns the count keys are tuples in the same order.
+    """
+    counts = {key: n for key, n in counts.items() if n}
+    if not counts:
+        return
+    mark_data_changed(db)
+    if isinstance(key_columns, str):
+        key_columns = (key_columns,)
+        counts = {(key,): n for key, n in counts.items()}
+    table = model.__table__
+    stmt = pg_insert(table).values([
+        # Sorted so concurrent writers lock the aggregate rows in the same order
+        {**dict(zip(key_columns, key)), "count": counts[key]} for key in sorted(counts)
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={"count": table.c.count + stmt.excluded["count"]},
+    ))
+
+def bump_risk_ratings(db: Session, ratings: Counter):
+    _bump(db, models.RiskRatingCount, "risk_rating", ratings)
+
+def bump_control_counts(db: Session, control_counts: Counter):
+    """Adds open-finding counts keyed by (control_id, severity)."""
+    counts = Counter()
+    for (control_id, severity), n in control_counts.items():
+        counts[(control_id, severity or UNKNOWN_SEVERITY)] += n
+    _bump(db, models.ControlSeverityCount, ("control_id", "normalized_severity"), counts)
+
+
+# --- Trend Rollups ---
+
+TREND_GRANULARITIES = ("day", "week", "month")
+
+def trend_bucket(granularity: str, day: Optional[date]) -> Optional[date]:
+    """
+    First day of the bucket containing `day` (ISO weeks: Monday, like date_trunc('week')).
+    A datetime is bucketed by its UTC day (ingestion dates are naive UTC); None stays None.
+    """
+    if day is None:
+        return None
+    if isinstance(day, datetime):
+        if day.tzinfo is not None:
+            day = day.astimezone(timezone.utc)
+        day = day.date()
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+def bump_trend_counts(db: Session, day: date, counts: Counter):
+    """Adds new findings first seen on `day`; `counts` is keyed by (severity, source)."""
+    rows = Counter()
+    for (severity, source), n in counts.items():
+        for granularity in TREND_GRANULARITIES:
+            rows[(granularity, trend_bucket(granularity, day),
+                  severity or UNKNOWN_SEVERITY, source or UNKNOWN_SOURCE)] += n
+    _bump(db, models.FindingTrendCount,
+          ("granularity", "bucket", "normalized_severity", "source_type"), rows)
+
+
+# --- Full Rebuild ---
+
+# Rating counts cover open findings
+# Rating each risk row is counted under. The rating counts describe the active risk
+# model; a row already moved to another version by a running re-score
+# (crud_risk_models.rescore) counts with the active model's rating for its severity
+# ('*' is crud_risk_models.DEFAULT_SEVERITY_KEY).
+COUNTED_RATING_SQL = """
+SELECT CASE WHEN r.model_version IS NULL OR a.version IS NULL OR r.model_version = a.version
+            THEN r.risk_rating ELSE coalesce(s.risk_rating, d.risk_rating) END AS rating
+FROM risks r
+JOIN findings f ON f.id = r.finding_id
+LEFT JOIN risk_models a ON a.status = 'active'
+LEFT JOIN risk_model_scores s ON s.version = a.version AND s.normalized_severity = f.normalized_severity
+LEFT JOIN risk_model_scores d ON d.version = a.version AND d.normalized_severity = '*'
+"""
+
+RISK_RATING_COUNTS_SQL = f"""INSERT INTO agg_risk_rating_counts (risk_rating, count)
+       SELECT rating, count(*) FROM ({COUNTED_RATING_SQL} WHERE f.status = 'open') c
+       WHERE rating IS NOT NULL GROUP BY rating"""
+
+REBUILD_STATEMENTS = [
+    # Block incremental writers until the rebuilt numbers are committed
+    "LOCK TABLE agg_risk_rating_counts, agg_control_severity_counts, agg_finding_trend_counts IN EXCLUSIVE MODE",
+    "DELETE FROM agg_risk_rating_counts",
+    "DELETE FROM agg_control_severity_counts",
+    "DELETE FROM agg_finding_trend_counts",
+    # Rating and control counts cover open findings; the trend counts every finding
+    # on the day it was first seen
+    RISK_RATING_COUNTS_SQL,
+    f"""INSERT INTO agg_control_severity_counts (control_id, normalized_severity, count)
+       SELECT l.control_id, coalesce(f.normalized_severity, '{UNKNOWN_SEVERITY}'), count(*)
+       FROM finding_control_link l JOIN findings f ON f.id = l.finding_id
+       WHERE f.status = 'open' GROUP BY 1, 2""",
+    # One pass over findings (an index-only scan of ix_findings_ingestion_date_covering)
+    # gives the daily rows; weeks and months are rolled up from those
+    f"""INSERT INTO agg_finding_trend_counts (granularity, bucket, normalized_severity, source_type, count)
+       SELECT g.granularity, date_trunc(g.granularity, d.day)::date, d.severity, d.source, sum(d.n)
+       FROM (SELECT date(ingestion_date) AS day,
+                    coalesce(normalized_severity, '{UNKNOWN_SEVERITY}') AS severity,
+                    coalesce(source_type, '{UNKNOWN_SOURCE}') AS source, count(*) AS n
+             FROM findings WHERE ingestion_date IS NOT NULL GROUP BY 1, 2, 3) d
+       CROSS JOIN (VALUES ('day'), ('week'), ('month')) AS g (granularity)
+       GROUP BY 1, 2, 3, 4""",
+]
+
+def rebuild_aggregates(db: Session):
+    """Recomputes every aggregate table from the base tables in one transaction."""
+    for statement in REBUILD_STATEMENTS:
+        db.execute(text(statement))
+    mark_data_changed(db)
+    db.commit()
+
+def rebuild_risk_rating_counts(db: Session):
+    """Recomputes only the rating counts (after a risk model switch). Does not commit."""
+    db.execute(text("LOCK TABLE agg_risk_rating_counts IN EXCLUSIVE MODE"))
+    db.execute(text("DELETE FROM agg_risk_rating_counts"))
+    db.execute(text(RISK_RATING_COUNTS_SQL))
+    mark_data_changed(db)
+
+def ensure_aggregates(db: Session):
+    """Backfills the aggregate tables on first start against a database that predates them."""
+    if db.query(models.Finding.id).first() is None:
+        return
+    if (db.query(models.FindingTrendCount).first() is None
+            or (db.query(models.ControlSeverityCount).first() is None
+                and db.query(models.finding_control_link).first() is not None)):
+        rebuild_aggregates(db)
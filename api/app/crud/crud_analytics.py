@@ -1,28 +1,134 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from sqlalchemy import func, distinct
+from ..compliance_engine.crosswalk import CrosswalkIndex
 from ..core import models
+from ..core.generation import current_generation
+from . import crud_aggregates, crud_compliance
+from ..core.metrics import ANALYTICS_QUERY_SECONDS
+
+# All dashboard queries read the precomputed aggregate tables maintained
+# by the ingestion path (see crud_aggregates), so their cost no longer grows
+# with the findings table. `python -m app.manage rebuild-aggregates` recomputes them.
+# Each query is built by a *_query() function so the plan checker
+# (`python -m app.manage explain-analytics`) can EXPLAIN exactly what runs.
 
 # 1. Total Risks by Rating (For Risk Matrix/Summary Card)
+def risks_by_rating_query(db: Session):
+    return db.query(
+        models.RiskRatingCount.risk_rating,
+        models.RiskRatingCount.count,
+    ).filter(models.RiskRatingCount.count > 0)
+
 def get_risks_by_rating(db: Session):
     """Counts the total number of findings grouped by risk rating (Low/Med/High/Critical)."""
-    return db.query(
-        models.Risk.risk_rating,
-        func.count(models.Risk.id).label('count')
-    ).group_by(models.Risk.risk_rating).all()
+    with ANALYTICS_QUERY_SECONDS.time("risks_by_rating"):
+        return risks_by_rating_query(db).all()
 
 # 2. Control Maturity (For Compliance Dashboard)
-def get_control_maturity_status(db: Session):
-    """Counts how many times each control is referenced (showing compliance footprint)."""
-    # Join on the M:M link table (finding_control_link) to count related findings
+def control_maturity_query(db: Session):
+    counts = models.ControlSeverityCount
     return db.query(
         models.Control.control_name,
-        func.count(models.finding_control_link.c.finding_id).label('finding_count')
-    ).join(models.finding_control_link).group_by(models.Control.control_name).all()
+        func.sum(counts.count).label('finding_count')
+    ).join(counts, counts.control_id == models.Control.id
+    ).group_by(models.Control.id, models.Control.control_name
+    ).having(func.sum(counts.count) > 0).order_by(models.Control.control_name)
 
-# 3. Findings Trend (Simple count for the trending chart)
-def get_finding_trend(db: Session):
-    """Counts the number of new findings per ingestion date (simple daily/monthly chart)."""
-    return db.query(
-        func.date(models.Finding.ingestion_date).label('date'),
-        func.count(models.Finding.id).label('count')
-    ).group_by(func.date(models.Finding.ingestion_date)).order_by('date').all()
\ No newline at end of file
+def get_control_maturity_status(db: Session):
+    """Counts how many times each control is referenced (showing compliance footprint)."""
+    with ANALYTICS_QUERY_SECONDS.time("control_maturity"):
+        return control_maturity_query(db).all()
+
+# 3. Findings Trend (new findings per day/week/month, from the trend rollup)
+# Every query is a range scan of the rollup's primary key
+# (granularity, bucket, severity, source), so its cost depends on the number of
+# buckets charted, not on the size of the findings table.
+def _trend_filter(query, granularity: str, date_from: Optional[date], date_to: Optional[date]):
+    t = models.FindingTrendCount
+    query = query.filter(t.granularity == granularity, t.count > 0)
+    if date_from is not None:
+        # Include the (partial) bucket the range starts in
+        query = query.filter(t.bucket >= crud_aggregates.trend_bucket(granularity, date_from))
+    if date_to is not None:
+        query = query.filter(t.bucket <= date_to)
+    return query
+
+def finding_trend_query(db: Session, granularity: str = "day",
+                        date_from: Optional[date] = None, date_to: Optional[date] = None):
+    t = models.FindingTrendCount
+    query = db.query(t.bucket.label('date'), func.sum(t.count).label('count'))
+    return _trend_filter(query, granularity, date_from, date_to).group_by(t.bucket).order_by(t.bucket)
+
+def get_finding_trend(db: Session, granularity: str = "day",
+                      date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """Counts the number of new findings per bucket (day, week or month) of their ingestion date."""
+    with ANALYTICS_QUERY_SECONDS.time("finding_trend"):
+        return finding_trend_query(db, granularity, date_from, date_to).all()
+
+def finding_trend_breakdown_query(db: Session, granularity: str = "day",
+                                  date_from: Optional[date] = None, date_to: Optional[date] = None,
+                                  severity: Optional[str] = None, source_type: Optional[str] = None):
+    t = models.FindingTrendCount
+    query = _trend_filter(
+        db.query(t.bucket.label('date'), t.normalized_severity, t.source_type, t.count),
+        granularity, date_from, date_to,
+    )
+    if severity is not None:
+        query = query.filter(t.normalized_severity == severity)
+    if source_type is not None:
+        query = query.filter(t.source_type == source_type)
+    return query.order_by(t.bucket)
+
+def get_finding_trend_breakdown(db: Session, granularity: str = "day",
+                                date_from: Optional[date] = None, date_to: Optional[date] = None,
+                                severity: Optional[str] = None, source_type: Optional[str] = None):
+    """New findings per bucket, split by normalized severity and source."""
+    with ANALYTICS_QUERY_SECONDS.time("finding_trend_breakdown"):
+        return finding_trend_breakdown_query(db, granularity, date_from, date_to, severity, source_type).all()
+
+# 4. Framework Compliance Heatmap (per-control severity breakdown of one framework)
+# The crosswalk (framework -> controls) is an in-memory index (crud_compliance.get_crosswalk)
+# and the counts of every control are one scan of the small per-control aggregate,
+# packed into a (controls x severities) array once per data generation and shared
+# by all frameworks. A heatmap is then an array lookup: no joins per request.
+def control_severity_counts_query(db: Session):
+    counts = models.ControlSeverityCount
+    return db.query(counts.control_id, counts.normalized_severity, counts.count).filter(counts.count > 0)
+
+_control_counts: Tuple[Optional[int], Optional[CrosswalkIndex], Optional[np.ndarray]] = (None, None, None)
+
+def _control_count_matrix(db: Session, crosswalk: CrosswalkIndex) -> np.ndarray:
+    global _control_counts
+    generation = current_generation(db)
+    cached_generation, cached_crosswalk, counts = _control_counts
+    if cached_generation != generation or cached_crosswalk is not crosswalk:
+        counts = crosswalk.count_matrix(control_severity_counts_query(db).all())
+        _control_counts = (generation, crosswalk, counts)
+    return counts
+
+def get_framework_heatmap(db: Session, framework: str) -> Optional[Dict[str, Any]]:
+    """Open findings per control of a framework, by severity (None for an unknown framework)."""
+    with ANALYTICS_QUERY_SECONDS.time("framework_heatmap"):
+        crosswalk = crud_compliance.get_crosswalk(db)
+        entry = crosswalk.framework(framework)
+        if entry is None:
+            return None
+        return crosswalk.heatmap(entry, _control_count_matrix(db, crosswalk))
+
+def list_frameworks(db: Session) -> List[Dict[str, Any]]:
+    return [
+        {"framework": entry["framework"], "version": entry["version"], "controls": len(entry["references"])}
+        for entry in crud_compliance.get_crosswalk(db).frameworks.values()
+    ]
+
+# Registry used by the query-plan checker
+ANALYTICS_QUERIES = {
+    "risks_by_rating": risks_by_rating_query,
+    "control_maturity": control_maturity_query,
+    "finding_trend": finding_trend_query,
+    "finding_trend_by_month": lambda db: finding_trend_breakdown_query(db, "month"),
+    "control_severity_counts": control_severity_counts_query,
+}
@@ -1,5 +1,12 @@
+from collections import Counter
+from sqlalchemy import insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
 from ..core import models
+from ..compliance_engine.control_mapper import CONTROL_MAPPER
+from ..compliance_engine.crosswalk import CrosswalkIndex
+from . import bulk_copy, crud_aggregates
 
 # --- Core Mapping Data for MVP ---
 # Simplified mapping: Link a generic Control to multiple Framework Controls
@@ -27,71 +34,173 @@ CONTROL_FRAMEWORK_MAP = {
     ],
 }
 
+# Serializes seeding when several API workers start at once
+SEED_LOCK_ID = 7412002
+
 def seed_initial_compliance_data(db: Session):
-    """Creates initial frameworks and controls if they don't exist."""
-    # 1. Create Frameworks
-    for name, version in FRAMEWORK_DATA.items():
-        if not db.query(models.Framework).filter(models.Framework.name == name).first():
-            db_framework = models.Framework(name=name, version=version)
-            db.add(db_framework)
+    """
+    Creates initial frameworks and controls if they don't exist, and the
+    crosswalk links (with each framework's control reference) that are missing
+    or outdated. Set-based, in one transaction: on an already seeded database
+    this is three SELECTs and a commit.
+    """
+    # 1. Only one worker seeds at a time (released on commit)
+    db.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": SEED_LOCK_ID})
+
+    # 2. Frameworks (name is unique)
+    framework_ids = dict(db.query(models.Framework.name, models.Framework.id).all())
+    missing_frameworks = [
+        {"name": name, "version": version} for name, version in FRAMEWORK_DATA.items() if name not in framework_ids
+    ]
+    if missing_frameworks:
+        framework_ids.update(db.execute(
+            pg_insert(models.Framework).values(missing_frameworks)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(models.Framework.name, models.Framework.id)
+        ).all())
+
+    # 3. Controls
+    control_ids = dict(db.query(models.Control.control_name, models.Control.id).all())
+    missing_controls = [item for item in CONTROL_DATA if item["control_name"] not in control_ids]
+    if missing_controls:
+        control_ids.update(db.execute(
+            insert(models.Control).values(missing_controls)
+            .returning(models.Control.control_name, models.Control.id)
+        ).all())
+
+    # 4. Framework Links (M:M crosswalk), written only when missing or when the reference changed
+    link = models.framework_control_link
+    existing_links = {
+        (framework_id, control_id): reference
+        for framework_id, control_id, reference in db.query(link.c.framework_id, link.c.control_id, link.c.reference).all()
+    }
+    link_rows = [
+        {"framework_id": framework_ids[fw_name], "control_id": control_ids[control_name], "reference": reference}
+        for control_name, references in CONTROL_FRAMEWORK_MAP.items() if control_name in control_ids
+        for fw_name, reference in references if fw_name in framework_ids
+    ]
+    link_rows = [
+        row for row in link_rows
+        if (row["framework_id"], row["control_id"]) not in existing_links
+        or existing_links[(row["framework_id"], row["control_id"])] != row["reference"]
+    ]
+    if link_rows:
+        stmt = pg_insert(link).values(link_rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["framework_id", "control_id"], set_={"reference": stmt.excluded.reference},
+        ))
     db.commit()
 
-    # 2. Create Controls and their Framework Links
-    for item in CONTROL_DATA:
-        if not db.query(models.Control).filter(models.Control.control_name == item["control_name"]).first():
-            # Create the general Control
-            db_control = models.Control(**item)
-            db.add(db_control)
-            db.commit()
-            db.refresh(db_control)
-            
-            # Link Control to Frameworks (M:M)
-            for fw_name, fw_id in CONTROL_FRAMEWORK_MAP.get(item["control_name"], []):
-                db_framework = db.query(models.Framework).filter(models.Framework.name == fw_name).first()
-                if db_framework:
-                    # Append the control to the framework's controls list
-                    db_control.frameworks.append(db_framework)
-            db.commit()
+    # New controls or links may have been created: reload the caches on next use
+    invalidate_control_ids()
+    invalidate_crosswalk()
             
+# --- Control id cache ---
+# Controls are seeded once and never renamed, so name -> id is loaded a single
+# time per process instead of being re-queried for every finding.
+_control_ids: Dict[str, int] = {}
+
+def get_control_ids(db: Session) -> Dict[str, int]:
+    """Returns the cached control_name -> id map (loaded on first use)."""
+    if not _control_ids:
+        _control_ids.update(db.query(models.Control.control_name, models.Control.id).all())
+    return _control_ids
+
+def invalidate_control_ids():
+    """Forces the next get_control_ids() call to reload from the database."""
+    _control_ids.clear()
+
+# --- Crosswalk index ---
+# Frameworks, controls and their links only change when seeding writes them, so
+# the crosswalk is loaded once per process and rebuilt after a seed.
+_crosswalk: Optional[CrosswalkIndex] = None
+
+def get_crosswalk(db: Session) -> CrosswalkIndex:
+    """Returns the cached framework -> control crosswalk (loaded on first use)."""
+    global _crosswalk
+    crosswalk = _crosswalk
+    if crosswalk is None:
+        link = models.framework_control_link
+        rows = (
+            db.query(models.Framework.name, models.Framework.version, link.c.reference,
+                     models.Control.id, models.Control.control_name, models.Control.cia_domain)
+            .select_from(models.Framework)
+            .outerjoin(link, link.c.framework_id == models.Framework.id)
+            .outerjoin(models.Control, models.Control.id == link.c.control_id)
+            .order_by(models.Framework.name)
+            .all()
+        )
+        crosswalk = _crosswalk = CrosswalkIndex(rows)
+    return crosswalk
+
+def invalidate_crosswalk():
+    """Forces the next get_crosswalk() call to reload from the database."""
+    global _crosswalk
+    _crosswalk = None
+
+def match_control_names(finding_title: str) -> List[str]:
+    """Returns the names of the controls a finding title maps to (compiled keyword rules)."""
+    return list(CONTROL_MAPPER.match(finding_title))
+
+def control_context(finding_title: str) -> str:
+    """Mapped control names as one string (used as AI prompt context and summary cache key)."""
+    return "; ".join(CONTROL_MAPPER.match(finding_title))
+
 def map_finding_to_controls(db: Session, finding_id: int, finding_title: str):
     """
-    MVP: Maps a finding to controls based on simple title matching.
+    Maps a single finding to controls using the compiled keyword rules.
     (This will be enhanced by NLP later)
     """
     db_finding = db.query(models.Finding).filter(models.Finding.id == finding_id).first()
     if not db_finding:
         return []
-    
-    # 1. Simple Keyword Mapping Logic:
-    # List to hold the NAMES of controls we want to find
-    control_names_to_find = []
-
-    if "patch" in finding_title.lower() or "ssh" in finding_title.lower() or "config" in finding_title.lower():
-        control_names_to_find.append("Patch Management & Configuration Hardening")
-
-    if "access" in finding_title.lower() or "privilege" in finding_title.lower():
-        control_names_to_find.append("Access Control & Principle of Least Privilege")
-
-
-    # 2. Retrieve Controls and Link them
-    for control_name in control_names_to_find:
-        # Get the Control object from the DB
-        control = db.query(models.Control).filter(
-            models.Control.control_name == control_name
-        ).first()
-    
-        if control:
-            # CRITICAL FIX: Merge the control object into the session before linking.
-            merged_control = db.merge(control) 
-        
-            # This condition should always be true, but it's safety measure
-            if merged_control not in db_finding.controls: 
-                db_finding.controls.append(merged_control)
-    
-    # Save the finding object and the new relationship link
-    db.add(db_finding) 
+
+    bulk_map_findings_to_controls(db, [finding_id], [finding_title], [db_finding.normalized_severity])
     db.commit()
     db.refresh(db_finding)
 
     # Now the control names should be available
-    return db_finding.controls
\ No newline at end of file
+    return db_finding.controls
+
+def bulk_map_findings_to_controls(
+    db: Session, finding_ids: List[int], finding_titles: List[str], finding_severities: List[str]
+) -> Dict[int, List[Tuple[int, str]]]:
+    """
+    Set-based version of map_finding_to_controls for a whole batch.
+    Each distinct title is matched once against the compiled rules, control ids
+    come from the in-memory cache, and every finding_control_link row is written
+    with a single (COPY-fed) INSERT. The findings' severities feed the per-control
+    severity counts. Does not commit (the caller owns the transaction).
+    Returns {finding_id: [(control_id, control_name), ...]}.
+    """
+    control_ids = get_control_ids(db)
+
+    matches_by_title: Dict[str, List[Tuple[int, str]]] = {}
+    mapped: Dict[int, List[Tuple[int, str]]] = {}
+    link_rows = []
+    for finding_id, title in zip(finding_ids, finding_titles):
+        matches = matches_by_title.get(title)
+        if matches is None:
+            matches = matches_by_title[title] = [
+                (control_ids[name], name) for name in CONTROL_MAPPER.match(title) if name in control_ids
+            ]
+        mapped[finding_id] = matches
+        link_rows.extend({"finding_id": finding_id, "control_id": cid} for cid, _ in matches)
+
+    if link_rows:
+        # Only links that were actually inserted count towards the control footprint
+        severities = dict(zip(finding_ids, finding_severities))
+        link = models.finding_control_link
+        if bulk_copy.INGEST_COPY:
+            inserted = bulk_copy.copy_insert_returning(
+                db, link, link_rows, ["finding_id", "control_id"], ["finding_id", "control_id"]
+            )
+        else:
+            inserted = db.execute(
+                pg_insert(link).on_conflict_do_nothing().returning(link.c.finding_id, link.c.control_id),
+                link_rows,
+            ).all()
+        crud_aggregates.bump_control_counts(db, Counter(
+            (control_id, severities[finding_id]) for finding_id, control_id in inserted
+        ))
+    return mapped
@@ -0,0 +1,157 @@
+"""
+Compact raw_evidence storage.
+
+With EVIDENCE_MODE=compact (default) a finding's scanner row is stored as:
+  - evidence_schema_id: a shared evidence_schemas row holding the row's key list
+    (interned by content hash, so one row per distinct column set) and the keys
+    whose value equals a normalized column (Raw_IP_Address -> ip_address, ...);
+  - raw_evidence: a JSON array with only the remaining values, in key order
+    (NULL when nothing is left);
+  - finding_evidence.data: the same array zlib-compressed, out of line, when its
+    JSON is at least EVIDENCE_COMPRESS_MIN_BYTES long (raw_evidence is then NULL).
+expand_evidence() rebuilds the original dict. Rows written before this mode (or
+with EVIDENCE_MODE=full) have no schema id and keep the full dict in raw_evidence.
+"""
+import hashlib
+import json
+import os
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import Integer, any_, delete, literal
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.orm import Session
+from ..core import models
+from ..core.database import PreSerializedJSON
+from .key_cache import KeyedIdCache
+
+EVIDENCE_MODE = os.environ.get("EVIDENCE_MODE", "compact")
+# Value arrays at least this long (JSON bytes) are compressed out of line; 0 disables
+EVIDENCE_COMPRESS_MIN_BYTES = int(os.environ.get("EVIDENCE_COMPRESS_MIN_BYTES", "1024"))
+
+EVIDENCE_SCHEMA_CACHE = KeyedIdCache(
+    "evidence_schemas", models.EvidenceSchema, "key_hash",
+    max_size=int(os.environ.get("EVIDENCE_SCHEMA_CACHE_SIZE", "10000")),
+)
+
+# Raw input column -> how its value is recovered from the finding's normalized columns
+DERIVED_FIELDS = {
+    "Raw_IP_Address": "ip_address",
+    "Raw_Vulnerability_Title": "normalized_title",
+    "Vendor_Severity_Code": "severity_code",
+}
+
+def _derived_value(derivation: str, ip_address: str, normalized_title: str, normalized_severity: str):
+    if derivation == "ip_address":
+        return ip_address
+    if derivation == "normalized_title":
+        return normalized_title
+    return normalized_severity.upper()  # severity_code
+
+
+# --- Write side (CPU only: runs in prepare_chunk, possibly in worker processes) ---
+
+def compact_evidence_column(
+    evidence: List[Dict[str, Any]], ip_addresses: List[str], titles: List[str], severities: List[str]
+) -> Tuple[List[str], List[Optional[str]], List[Optional[bytes]], Dict[str, Dict[str, Any]]]:
+    """
+    Compacts a column of evidence dicts. Returns (schema hash per row, JSON values
+    per row or None, compressed blob per row or None, {schema hash: schema row}).
+    """
+    hashes, values_json, blobs = [], [], []
+    schemas: Dict[str, Dict[str, Any]] = {}
+    hash_by_shape: Dict[Tuple, str] = {}
+    for row, ip, title, severity in zip(evidence, ip_addresses, titles, severities):
+        # 1. Fields that only repeat a normalized column are not stored
+        derived = {
+            key: derivation for key, derivation in DERIVED_FIELDS.items()
+            if key in row and row[key] == _derived_value(derivation, ip, title, severity)
+        }
+        keys = tuple(row)
+
+        # 2. Intern the key set (almost always identical across a chunk)
+        shape = (keys, tuple(derived.items()))
+        key_hash = hash_by_shape.get(shape)
+        if key_hash is None:
+            schema = {"keys": list(keys), "derived": derived}
+            key_hash = hashlib.md5(json.dumps(schema, sort_keys=True).encode("utf-8")).hexdigest()
+            hash_by_shape[shape] = key_hash
+            schemas[key_hash] = {"key_hash": key_hash, **schema}
+        hashes.append(key_hash)
+
+        # 3. Remaining values, compressed out of line when large
+        values = [row[key] for key in keys if key not in derived]
+        encoded = json.dumps(values) if values else None
+        if encoded is not None and EVIDENCE_COMPRESS_MIN_BYTES and len(encoded) >= EVIDENCE_COMPRESS_MIN_BYTES:
+            blobs.append(zlib.compress(encoded.encode("utf-8")))
+            values_json.append(None)
+        else:
+            blobs.append(None)
+            values_json.append(PreSerializedJSON(encoded) if encoded is not None else None)
+    return hashes, values_json, blobs, schemas
+
+
+# --- Database side ---
+
+def resolve_schemas(db: Session, schemas: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """Returns {schema hash: evidence_schemas.id}, inserting unknown schemas. Does not commit."""
+    if not schemas:
+        return {}
+    ids, _ = EVIDENCE_SCHEMA_CACHE.resolve(db, schemas)
+    return ids
+
+def store_evidence_blobs(db: Session, blobs: Dict[int, bytes]):
+    """Writes (or replaces) the out-of-line evidence of the given findings."""
+    if not blobs:
+        return
+    stmt = pg_insert(models.FindingEvidence)
+    db.execute(
+        stmt.on_conflict_do_update(index_elements=["finding_id"], set_={"data": stmt.excluded.data}),
+        [{"finding_id": finding_id, "data": data} for finding_id, data in sorted(blobs.items())],
+    )
+
+def delete_evidence_blobs(db: Session, finding_ids: List[int]):
+    if finding_ids:
+        db.execute(delete(models.FindingEvidence).where(
+            models.FindingEvidence.finding_id == any_(literal(finding_ids, ARRAY(Integer)))
+        ))
+
+
+# --- Read side ---
+
+_schemas: Dict[int, Tuple[List[str], Dict[str, str]]] = {}
+_schemas_lock = threading.Lock()
+
+def _get_schema(db: Session, schema_id: int) -> Tuple[List[str], Dict[str, str]]:
+    # Schemas are immutable once written, so they are cached for the process lifetime
+    with _schemas_lock:
+        schema = _schemas.get(schema_id)
+    if schema is None:
+        row = db.get(models.EvidenceSchema, schema_id)
+        schema = (row.keys, row.derived or {})
+        with _schemas_lock:
+            _schemas[schema_id] = schema
+    return schema
+
+def expand_evidence(db: Session, finding: models.Finding) -> Optional[Dict[str, Any]]:
+    """The finding's original evidence dict (loads raw_evidence / the compressed blob on demand)."""
+    if finding.evidence_schema_id is None:
+        return finding.raw_evidence
+    keys, derived = _get_schema(db, finding.evidence_schema_id)
+
+    values = finding.raw_evidence
+    if values is None:
+        blob = finding.evidence_blob
+        values = json.loads(zlib.decompress(blob.data)) if blob is not None else []
+
+    stored = iter(values)
+    evidence = {}
+    for key in keys:
+        if key in derived:
+            evidence[key] = _derived_value(
+                derived[key], finding.asset.ip_address if finding.asset else None,
+                finding.normalized_title, finding.normalized_severity or "",
+            )
+        else:
+            evidence[key] = next(stored)
+    return evidence
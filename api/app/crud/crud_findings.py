@@ -1,7 +1,19 @@
-from sqlalchemy.orm import Session
-from ..core import models, schemas
+import base64
+import binascii
+import hashlib
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import Integer, String, any_, func, insert, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload
+from ..core import models
+from . import bulk_copy, crud_aggregates, crud_risk_models
+from ..core.generation import mark_data_changed
+from .key_cache import KeyedIdCache
 from ..core.schemas import FindingCreate, RiskCreate
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 
 
 def get_asset_by_ip(db: Session, ip_address: str):
@@ -32,12 +44,17 @@ def create_finding(db: Session, finding: FindingCreate, asset_id: int):
     # Create the DB model instance
     db_finding = models.Finding(
         asset_id=asset_id,
+        fingerprint=finding_fingerprint(finding.ip_address, finding.normalized_title, finding.source_type),
         normalized_title=finding.normalized_title,
         source_type=finding.source_type,
         normalized_severity=finding.normalized_severity,
         raw_evidence=finding.raw_evidence,
     )
     db.add(db_finding)
+    db.flush()
+    crud_aggregates.bump_trend_counts(db, db_finding.ingestion_date.date(), Counter({
+        (db_finding.normalized_severity, db_finding.source_type): 1
+    }))
     db.commit()
     db.refresh(db_finding)
     return db_finding
@@ -53,6 +70,355 @@ def create_risk(db: Session, risk: RiskCreate, finding_id: int):
         cia_availability=risk.cia_availability,
     )
     db.add(db_risk)
+    crud_aggregates.bump_risk_ratings(db, Counter({risk.risk_rating: 1}))
     db.commit()
     db.refresh(db_risk)
-    return db_risk
\ No newline at end of file
+    return db_risk
+
+# --- Bulk CRUD (set-based ingestion path) ---
+# These helpers take plain row dicts (see normalization.NORMALIZED_COLUMNS) and
+# never commit: the caller owns the transaction so a whole chunk of rows lands
+# (or rolls back) together.
+
+# Process-wide ip_address -> asset id cache (scans repeat the same hosts thousands of times)
+ASSET_RESOLVER = KeyedIdCache(
+    "assets", models.Asset, "ip_address",
+    max_size=int(os.environ.get("ASSET_CACHE_SIZE", "100000")),
+)
+
+def bulk_get_or_create_assets(db: Session, findings: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Resolves every distinct IP in the batch to an asset id via the shared ASSET_RESOLVER:
+    cache hits cost nothing, misses one INSERT ... ON CONFLICT (ip_address) DO NOTHING.
+    """
+    rows_by_ip = {
+        f["ip_address"]: {"asset_name": f["asset_name"], "ip_address": f["ip_address"], "asset_type": "Server"}
+        for f in findings
+    }
+    asset_ids, _ = ASSET_RESOLVER.resolve(db, rows_by_ip)
+    return asset_ids
+
+def finding_fingerprint(ip_address: str, normalized_title: str, source_type: str) -> str:
+    """
+    Identity of a finding across scans: md5 of asset IP | whitespace-collapsed,
+    lower-cased title | source. Migration 4 backfills existing rows with the same recipe in SQL.
+    """
+    title = " ".join(normalized_title.split()).lower()
+    return hashlib.md5(f"{ip_address}|{title}|{source_type}".encode("utf-8")).hexdigest()
+
+def lookup_findings_by_fingerprint(db: Session, fingerprints: List[str]) -> Dict[str, Any]:
+    """
+    Returns {fingerprint: row(id, normalized_severity, status, risk_id)} for the
+    fingerprints already stored. The finding rows stay locked (in fingerprint order) until
+    the caller's transaction ends, so concurrent uploads cannot classify the same row twice.
+    """
+    if not fingerprints:
+        return {}
+    rows = (
+        db.query(
+            models.Finding.fingerprint, models.Finding.id, models.Finding.normalized_severity,
+            models.Finding.status, models.Risk.id.label("risk_id"),
+        )
+        .outerjoin(models.Risk, models.Risk.finding_id == models.Finding.id)
+        .filter(models.Finding.fingerprint == any_(literal(sorted(fingerprints), ARRAY(String))))
+        .order_by(models.Finding.fingerprint)
+        .with_for_update(of=models.Finding)
+        .all()
+    )
+    return {row.fingerprint: row for row in rows}
+
+def touch_findings(db: Session, finding_ids: List[int], seen_at: datetime):
+    """Marks unchanged findings as seen again (a single UPDATE; nothing else is rewritten)."""
+    if finding_ids:
+        db.execute(
+            update(models.Finding)
+            .where(models.Finding.id == any_(literal(finding_ids, ARRAY(Integer))))
+            .values(last_seen=seen_at),
+            execution_options={"synchronize_session": False},
+        )
+
+def bulk_create_findings(
+    db: Session,
+    findings: List[Dict[str, Any]],
+    asset_ids: Dict[str, int],
+    summary_ids: List[int],
+    seen_at: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """
+    Inserts a batch of new findings with one INSERT ... ON CONFLICT (fingerprint)
+    DO NOTHING RETURNING, fed by COPY (see bulk_copy). Each finding references its
+    shared, content-addressed AI summary row. Returns {fingerprint: id} for the rows
+    inserted (a fingerprint inserted meanwhile by a concurrent upload is skipped).
+    """
+    if not findings:
+        return {}
+    ingestion_date = seen_at or datetime.utcnow()
+    rows = [
+        {
+            "asset_id": asset_ids[f["ip_address"]],
+            "fingerprint": f["fingerprint"],
+            "normalized_title": f["normalized_title"],
+            "source_type": f["source_type"],
+            "normalized_severity": f["normalized_severity"],
+            "summary_id": summary_id,
+            "raw_evidence": f["raw_evidence"],
+            "evidence_schema_id": f.get("evidence_schema_id"),
+            "ingestion_date": ingestion_date,
+            "last_seen": ingestion_date,
+            "status": "open",
+        }
+        for f, summary_id in zip(findings, summary_ids)
+    ]
+    if bulk_copy.INGEST_COPY:
+        finding_ids = dict(bulk_copy.copy_insert_returning(
+            db, models.Finding.__table__, rows, ["fingerprint"], ["fingerprint", "id"]
+        ))
+    else:
+        finding_ids = dict(db.execute(
+            pg_insert(models.Finding)
+            .on_conflict_do_nothing(index_elements=["fingerprint"])
+            .returning(models.Finding.fingerprint, models.Finding.id),
+            rows,
+        ).all())
+    crud_aggregates.bump_trend_counts(db, ingestion_date.date(), Counter(
+        (row["normalized_severity"], row["source_type"]) for row in rows if row["fingerprint"] in finding_ids
+    ))
+    return finding_ids
+
+def _control_links(db: Session, finding_ids: List[int]) -> List[Tuple[int, int]]:
+    """(finding_id, control_id) links of the given findings."""
+    link = models.finding_control_link
+    return db.query(link.c.finding_id, link.c.control_id).filter(
+        link.c.finding_id == any_(literal(finding_ids, ARRAY(Integer)))
+    ).all()
+
+def bulk_update_changed_findings(
+    db: Session,
+    findings: List[Dict[str, Any]],
+    existing: Dict[str, Any],
+    risks: Dict[str, Any],
+    summary_ids: List[int],
+    seen_at: datetime,
+):
+    """
+    Applies a re-scan to findings whose severity changed or that were closed and came
+    back: rewrites the finding, re-scores its risk row and moves the dashboard counts
+    from the old rating/severity to the new one (reopened findings count again).
+    `risks` is columnar, aligned with `findings`; `existing` is lookup_findings_by_fingerprint().
+    The caller holds the risk model lock (crud_risk_models.lock_active_model).
+    """
+    if not findings:
+        return
+    ratings = risks["risk_rating"].tolist()
+    risk_columns = {name: values.tolist() for name, values in risks.items()}
+
+    finding_rows, risk_updates, risk_inserts = [], [], []
+    # finding id -> (severity its controls are counted under now (None: not counted), new severity)
+    rating_counts, severity_moves = Counter(), {}
+    counted_ids = []  # open findings whose old rating is in the dashboard counts
+    for i, (f, summary_id) in enumerate(zip(findings, summary_ids)):
+        old = existing[f["fingerprint"]]
+        finding_rows.append({
+            "id": old.id,
+            "normalized_severity": f["normalized_severity"],
+            "raw_evidence": f["raw_evidence"],
+            "evidence_schema_id": f.get("evidence_schema_id"),
+            "summary_id": summary_id,
+            "last_seen": seen_at,
+            "status": "open",
+            "closed_at": None,
+        })
+        risk_row = {name: values[i] for name, values in risk_columns.items()}
+        if old.risk_id is None:
+            risk_inserts.append({**risk_row, "finding_id": old.id})
+        else:
+            risk_updates.append({**risk_row, "id": old.risk_id})
+
+        rating_counts[ratings[i]] += 1
+        if old.status == "open":
+            if old.risk_id is not None:
+                counted_ids.append(old.id)
+            severity_moves[old.id] = (old.normalized_severity, f["normalized_severity"])
+        else:
+            severity_moves[old.id] = (None, f["normalized_severity"])
+
+    # Old ratings as counted (a running re-score may already have rewritten the rows)
+    rating_counts.subtract(crud_risk_models.counted_ratings(db, counted_ids))
+
+    db.execute(update(models.Finding), finding_rows)
+    if risk_updates:
+        db.execute(update(models.Risk), risk_updates)
+    if risk_inserts:
+        db.execute(insert(models.Risk), risk_inserts)
+
+    crud_aggregates.bump_risk_ratings(db, rating_counts)
+    control_counts = Counter()
+    for finding_id, control_id in _control_links(db, list(severity_moves)):
+        counted, severity = severity_moves[finding_id]
+        if counted is not None:
+            control_counts[(control_id, counted)] -= 1
+        control_counts[(control_id, severity)] += 1
+    crud_aggregates.bump_control_counts(db, control_counts)
+
+def close_missing_findings(db: Session, source_type: str, seen_before: datetime) -> int:
+    """
+    Closes the open findings of `source_type` that a full scan started at `seen_before`
+    did not report, and removes them from the dashboard counts. Does not commit.
+    Returns how many findings were closed.
+    """
+    # The counts being decremented must not switch models before this commits
+    crud_risk_models.lock_active_model(db)
+    closed_ids = db.execute(
+        update(models.Finding)
+        .where(
+            models.Finding.source_type == source_type,
+            models.Finding.status == "open",
+            models.Finding.last_seen < seen_before,
+        )
+        .values(status="closed", closed_at=datetime.utcnow())
+        .returning(models.Finding.id),
+        execution_options={"synchronize_session": False},
+    ).scalars().all()
+    if not closed_ids:
+        return 0
+
+    ids = literal(closed_ids, ARRAY(Integer))
+    ratings = crud_risk_models.counted_ratings(db, closed_ids)
+    crud_aggregates.bump_risk_ratings(db, Counter({rating: -n for rating, n in ratings.items()}))
+    link = models.finding_control_link
+    controls = (
+        db.query(link.c.control_id, models.Finding.normalized_severity, func.count())
+        .join(models.Finding, models.Finding.id == link.c.finding_id)
+        .filter(link.c.finding_id == any_(ids))
+        .group_by(link.c.control_id, models.Finding.normalized_severity)
+        .all()
+    )
+    crud_aggregates.bump_control_counts(db, Counter({(cid, severity): -n for cid, severity, n in controls}))
+    mark_data_changed(db)
+    return len(closed_ids)
+
+def bulk_create_risks(db: Session, risks: Dict[str, Any], finding_ids: List[int]):
+    """
+    Inserts one risk row per finding with a single COPY (or multi-row INSERT).
+    `risks` is columnar (as returned by risk_calc.calculate_risk_batch).
+    """
+    if not finding_ids:
+        return
+    columns = {name: list(values.tolist()) for name, values in risks.items()}
+    columns["finding_id"] = finding_ids
+    rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    if bulk_copy.INGEST_COPY:
+        bulk_copy.copy_rows(db, models.Risk.__table__, rows)
+    else:
+        db.execute(insert(models.Risk), rows)
+    crud_aggregates.bump_risk_ratings(db, Counter(columns["risk_rating"]))
+
+
+# --- Finding browsing (keyset pagination) ---
+
+# Page size bounds for GET /findings
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(ingestion_date: datetime, finding_id: int) -> str:
+    """Opaque cursor pointing just after the given (ingestion_date, id) position."""
+    raw = json.dumps([ingestion_date.isoformat(), finding_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor. Raises ValueError for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date_str, finding_id = json.loads(raw)
+        return datetime.fromisoformat(date_str), int(finding_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError("Invalid cursor.") from e
+
+def list_findings(
+    db: Session,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    severity: Optional[str] = None,
+    risk_rating: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    source_type: Optional[str] = None,
+    control_id: Optional[int] = None,
+    status: Optional[str] = None,
+) -> Tuple[List[models.Finding], Optional[str]]:
+    """
+    Returns one page of findings, newest first, plus the cursor for the next page
+    (None on the last page). Pages are addressed by (ingestion_date, id) rather
+    than OFFSET, so every page is an index range scan no matter how deep it is.
+    Asset, risk and cached summary are loaded in the same query and controls with
+    one extra IN query per page (no N+1).
+    """
+    Finding = models.Finding
+
+    # 1. Asset/risk are joined (and reused for eager loading) so their filters are plain WHEREs
+    query = db.query(Finding).join(Finding.asset)
+    query = query.join(Finding.risk) if risk_rating else query.outerjoin(Finding.risk)
+    query = query.options(
+        contains_eager(Finding.asset),
+        contains_eager(Finding.risk),
+        joinedload(Finding.cached_summary),
+        selectinload(Finding.controls),
+    )
+
+    # 2. Filters
+    if severity:
+        query = query.filter(Finding.normalized_severity == severity)
+    if risk_rating:
+        query = query.filter(models.Risk.risk_rating == risk_rating)
+    if ip_address:
+        query = query.filter(models.Asset.ip_address == ip_address)
+    if source_type:
+        query = query.filter(Finding.source_type == source_type)
+    if status:
+        query = query.filter(Finding.status == status)
+    if control_id is not None:
+        link = models.finding_control_link
+        query = query.filter(
+            select(link.c.finding_id)
+            .where(link.c.control_id == control_id, link.c.finding_id == Finding.id)
+            .exists()
+        )
+
+    # 3. Keyset: strictly after the last row of the previous page
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Finding.ingestion_date, Finding.id) < tuple_(after_date, after_id))
+
+    # 4. One extra row tells us whether there is a next page
+    rows = query.order_by(Finding.ingestion_date.desc(), Finding.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].ingestion_date, rows[-1].id)
+    return rows, next_cursor
+
+def finding_to_dict(db_finding: models.Finding) -> Dict[str, Any]:
+    """Serializes a finding (with its already-loaded asset, risk and controls) for the API."""
+    risk = db_finding.risk
+    summary = db_finding.cached_summary.summary if db_finding.cached_summary else db_finding.summary
+    return {
+        "id": db_finding.id,
+        "title": db_finding.normalized_title,
+        "severity": db_finding.normalized_severity,
+        "source": db_finding.source_type,
+        "status": db_finding.status,
+        "ingestion_date": db_finding.ingestion_date.isoformat() if db_finding.ingestion_date else None,
+        "last_seen": db_finding.last_seen.isoformat() if db_finding.last_seen else None,
+        "asset": {
+            "id": db_finding.asset.id,
+            "name": db_finding.asset.asset_name,
+            "ip_address": db_finding.asset.ip_address,
+        },
+        "risk": {
+            "rating": risk.risk_rating,
+            "inherent_score": risk.inherent_score,
+            "residual_score": risk.residual_score,
+            "model_version": risk.model_version,
+        } if risk else None,
+        "controls": [{"control_id": c.id, "control_name": c.control_name} for c in db_finding.controls],
+        "summary": summary,
+    }
@@ -0,0 +1,55 @@
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy.orm import Session
+from ..core import models
+
+
+def create_job(db: Session, source_name: str, filename: str) -> models.IngestionJob:
+    """Registers a new queued ingestion job."""
+    db_job = models.IngestionJob(
+        id=uuid.uuid4().hex,
+        source_name=source_name,
+        filename=filename,
+        status="queued",
+        stage="queued",
+        rows_processed=0,
+        rows_failed=0,
+        errors=[],
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def get_job(db: Session, job_id: str) -> Optional[models.IngestionJob]:
+    """Retrieves an ingestion job by id."""
+    return db.query(models.IngestionJob).filter(models.IngestionJob.id == job_id).first()
+
+def update_job(db: Session, job_id: str, **fields: Any):
+    """Updates job progress fields and commits (a single UPDATE by primary key)."""
+    db.query(models.IngestionJob).filter(models.IngestionJob.id == job_id).update(
+        fields, synchronize_session=False
+    )
+    db.commit()
+
+def job_to_dict(db_job: models.IngestionJob) -> Dict[str, Any]:
+    """Serializes a job for the progress API, including its current throughput."""
+    end = db_job.finished_at or datetime.utcnow()
+    elapsed = (end - db_job.started_at).total_seconds() if db_job.started_at else 0.0
+    return {
+        "job_id": db_job.id,
+        "source": db_job.source_name,
+        "filename": db_job.filename,
+        "status": db_job.status,
+        "stage": db_job.stage,
+        "rows_processed": db_job.rows_processed,
+        "rows_failed": db_job.rows_failed,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(db_job.rows_processed / elapsed, 1) if elapsed > 0 else 0.0,
+        "errors": db_job.errors or [],
+        "result": db_job.result,
+        "created_at": db_job.created_at.isoformat() if db_job.created_at else None,
+        "started_at": db_job.started_at.isoformat() if db_job.started_at else None,
+        "finished_at": db_job.finished_at.isoformat() if db_job.finished_at else None,
+    }
@@ -0,0 +1,67 @@
+from typing import Any, Dict, Iterator, List, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from ..core import models
+
+# Rows fetched per round-trip from the server-side cursor
+REPORT_YIELD_PER = 2000
+
+
+def findings_detail_query():
+    """
+    One row per finding joined with its asset, risk, summary and mapped control names.
+    Controls come from a correlated subquery on the link table's (finding_id, control_id)
+    primary key, so rows can stream in id order without a full-table aggregation first.
+    """
+    control_names = (
+        select(func.string_agg(models.Control.control_name, "; "))
+        .select_from(models.finding_control_link)
+        .join(models.Control, models.Control.id == models.finding_control_link.c.control_id)
+        .where(models.finding_control_link.c.finding_id == models.Finding.id)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            models.Finding.id,
+            models.Finding.ingestion_date,
+            models.Finding.normalized_title,
+            models.Finding.normalized_severity,
+            models.Finding.source_type,
+            models.Finding.status,
+            models.Finding.last_seen,
+            models.Asset.ip_address,
+            models.Asset.asset_name,
+            models.Risk.inherent_score,
+            models.Risk.risk_rating,
+            func.coalesce(models.AISummary.summary, models.Finding.summary).label("summary"),
+            control_names.label("controls"),
+        )
+        .select_from(models.Finding)
+        .join(models.Asset, models.Asset.id == models.Finding.asset_id)
+        .outerjoin(models.Risk, models.Risk.finding_id == models.Finding.id)
+        .outerjoin(models.AISummary, models.AISummary.id == models.Finding.summary_id)
+        .order_by(models.Finding.id)
+    )
+
+def iter_findings_detail(db: Session) -> Iterator[Dict[str, Any]]:
+    """Streams findings_detail_query() rows from a server-side cursor (bounded memory)."""
+    result = db.execute(
+        findings_detail_query().execution_options(stream_results=True, yield_per=REPORT_YIELD_PER)
+    )
+    for row in result.mappings():
+        yield row
+
+def findings_detail_columns() -> List[str]:
+    """Column names of findings_detail_query(), in select order."""
+    return list(findings_detail_query().selected_columns.keys())
+
+def iter_findings_detail_batches(db: Session, batch_size: int = REPORT_YIELD_PER) -> Iterator[List[Tuple]]:
+    """
+    Same server-side cursor as iter_findings_detail, but yields plain row tuples one
+    fetch (batch_size rows) at a time, for encoders that work a batch at a time.
+    """
+    result = db.execute(
+        findings_detail_query().execution_options(stream_results=True, yield_per=batch_size)
+    )
+    for partition in result.partitions():
+        yield [tuple(row) for row in partition]
@@ -0,0 +1,258 @@
+"""
+Versioned risk models and set-based re-scoring.
+
+Risk model definitions (risk_model.json format) are stored as numbered versions
+in risk_models; exactly one is active. Ingestion scores new and changed findings
+with the active version and tags each risk row with it (risks.model_version).
+
+rescore() moves every risk row to another version without a Python loop. The
+version's scores per severity are written to risk_model_scores. risks is then
+rewritten in place in RESCORE_CHUNK_SIZE id ranges by an UPDATE ... FROM joined
+against that lookup, with one commit per range and progress recorded on the
+version row. The switch is a single transaction that catches up rows written
+meanwhile, recomputes the rating counts and flips the active version.
+
+Only the dashboard rating counts (agg_risk_rating_counts) switch atomically: they
+keep describing the active model while chunks run (crud_aggregates.COUNTED_RATING_SQL).
+Per-finding reads of risks (GET /findings and its risk_rating filter, the export,
+the full report) see a mix of old and new ratings until the switch commits.
+"""
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import func, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from ..core import models
+from ..core.generation import mark_data_changed
+from ..risk_engine.risk_calc import RISK_MATRIX, RiskMatrix
+from . import crud_aggregates
+
+# Risk rows rewritten per re-score transaction
+RESCORE_CHUNK_SIZE = int(os.environ.get("RESCORE_CHUNK_SIZE", "50000"))
+
+# Arbitrary constants: ingestion chunks hold the model lock shared, the switch
+# exclusively; only one re-score runs at a time
+RISK_MODEL_LOCK_ID = 7412003
+RESCORE_LOCK_ID = 7412004
+
+# risk_model_scores key holding the score of severities the model does not list
+DEFAULT_SEVERITY_KEY = "*"
+
+RESCORE_SQL = """
+UPDATE risks r SET
+    inherent_score = coalesce(s.inherent_score, d.inherent_score),
+    risk_rating = coalesce(s.risk_rating, d.risk_rating),
+    cia_confidentiality = coalesce(s.cia_confidentiality, d.cia_confidentiality),
+    cia_integrity = coalesce(s.cia_integrity, d.cia_integrity),
+    cia_availability = coalesce(s.cia_availability, d.cia_availability),
+    model_version = :version
+FROM findings f
+LEFT JOIN risk_model_scores s ON s.version = :version AND s.normalized_severity = f.normalized_severity
+JOIN risk_model_scores d ON d.version = :version AND d.normalized_severity = :default_key
+WHERE f.id = r.finding_id AND r.id >= :low AND r.id < :high
+  -- IS DISTINCT FROM, spelled so ix_risks_model_version can serve the catch-up passes
+  AND (r.model_version < :version OR r.model_version > :version OR r.model_version IS NULL)
+"""
+
+# Ratings of some findings' risk rows as the dashboard counts hold them
+COUNTED_RATINGS_SQL = f"""
+SELECT rating, count(*) FROM ({crud_aggregates.COUNTED_RATING_SQL} WHERE r.finding_id = ANY(:ids)) c
+WHERE rating IS NOT NULL GROUP BY rating
+"""
+
+
+# --- Compiled models (process cache; versions are immutable once registered) ---
+
+_matrices: Dict[int, RiskMatrix] = {}
+# Last active version seen by this process: lets prepare_chunk score with it
+# without a database round-trip (the writer re-checks under the model lock)
+_current: Optional[Tuple[int, RiskMatrix]] = None
+
+def _matrix(db: Session, version: int) -> RiskMatrix:
+    matrix = _matrices.get(version)
+    if matrix is None:
+        matrix = _matrices[version] = RiskMatrix(db.get(models.RiskModel, version).definition)
+    return matrix
+
+def current_model() -> Tuple[Optional[int], RiskMatrix]:
+    """The active (version, matrix) last seen by this process; (None, file model) before any."""
+    return _current or (None, RISK_MATRIX)
+
+def lock_active_model(db: Session) -> Tuple[int, RiskMatrix]:
+    """
+    Returns the active (version, matrix) and holds the model lock (shared) until the
+    caller's transaction ends, so a model switch cannot commit in between.
+    """
+    global _current
+    db.execute(text("SELECT pg_advisory_xact_lock_shared(:id)"), {"id": RISK_MODEL_LOCK_ID})
+    version = db.query(models.RiskModel.version).filter(models.RiskModel.status == "active").scalar()
+    if version is None:
+        raise RuntimeError("No active risk model (the API seeds one on startup).")
+    _current = (version, _matrix(db, version))
+    return _current
+
+def counted_ratings(db: Session, finding_ids: List[int]) -> Counter:
+    """
+    {rating: n} as agg_risk_rating_counts currently count these findings' risk rows
+    (see crud_aggregates.COUNTED_RATING_SQL). The caller holds the model lock.
+    """
+    if not finding_ids:
+        return Counter()
+    return Counter(dict(db.execute(text(COUNTED_RATINGS_SQL), {"ids": list(finding_ids)}).all()))
+
+
+# --- Registration ---
+
+def _write_scores(db: Session, version: int, matrix: RiskMatrix):
+    severities = [str(label) for label in matrix.labels]
+    scored = matrix.score_severities(severities)
+    default = matrix.score_matrix([matrix.definition["default_likelihood"]], [matrix.definition["default_impact"]])
+    rows = [
+        {"version": version, "normalized_severity": severity,
+         **{column: values.tolist()[i] for column, values in scored.items()}}
+        for i, severity in enumerate(severities)
+    ]
+    rows.append({"version": version, "normalized_severity": DEFAULT_SEVERITY_KEY,
+                 **{column: values.tolist()[0] for column, values in default.items()}})
+    db.execute(pg_insert(models.RiskModelScore).values(rows).on_conflict_do_nothing())
+
+def register_risk_model(db: Session, definition: Dict[str, Any], status: str = "draft") -> models.RiskModel:
+    """Stores a new model version (with its score lookup) and commits. Raises ValueError if malformed."""
+    try:
+        matrix = RiskMatrix(definition)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid risk model definition: {e!r}") from e
+
+    # Exclusive model lock (held until the commit below): concurrent registrations
+    # would otherwise compute the same next version
+    db.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": RISK_MODEL_LOCK_ID})
+    version = (db.query(func.max(models.RiskModel.version)).scalar() or 0) + 1
+    model = models.RiskModel(version=version, name=matrix.name, definition=definition, status=status,
+                             activated_at=datetime.utcnow() if status == "active" else None)
+    db.add(model)
+    db.flush()
+    _write_scores(db, version, matrix)
+    db.commit()
+    _matrices[version] = matrix
+    return model
+
+def seed_risk_models(db: Session):
+    """Registers the file model (risk_calc.RISK_MATRIX) as active version 1 on an empty database."""
+    db.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": RISK_MODEL_LOCK_ID})
+    if db.query(models.RiskModel.version).first() is None:
+        register_risk_model(db, RISK_MATRIX.definition, status="active")
+    else:
+        db.commit()
+
+def list_risk_models(db: Session):
+    return db.query(models.RiskModel).order_by(models.RiskModel.version).all()
+
+def risk_model_to_dict(model: models.RiskModel) -> Dict[str, Any]:
+    return {
+        "version": model.version,
+        "name": model.name,
+        "status": model.status,
+        "total_rows": model.total_rows,
+        "rescored_rows": model.rescored_rows,
+        "created_at": model.created_at,
+        "activated_at": model.activated_at,
+    }
+
+
+# --- Re-scoring ---
+
+def _rescore_range(db: Session, version: int, low: int, high: int) -> int:
+    return db.execute(
+        text(RESCORE_SQL), {"version": version, "default_key": DEFAULT_SEVERITY_KEY, "low": low, "high": high}
+    ).rowcount
+
+def rescore(
+    db: Session,
+    version: int,
+    chunk_size: int = RESCORE_CHUNK_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Re-scores every risk row with model `version`, then makes it the active model.
+    Rows already scored by that version are skipped, so an interrupted run can be
+    resumed (or the active version re-applied to rows ingested during a switch).
+    `progress(rescored, total)` is called after each committed chunk. Returns the
+    number of rows rewritten.
+    """
+    model = db.get(models.RiskModel, version)
+    if model is None:
+        raise ValueError(f"Unknown risk model version {version}.")
+
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        if not lock_conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": RESCORE_LOCK_ID}).scalar():
+            raise RuntimeError("Another re-score is already running.")
+        try:
+            # 1. Plan: id ranges over the risks table
+            low, high = db.query(func.min(models.Risk.id), func.max(models.Risk.id)).one()
+            model.total_rows = db.query(func.count(models.Risk.id)).filter(
+                models.Risk.model_version.is_distinct_from(version)
+            ).scalar()
+            model.rescored_rows = 0
+            if model.status != "active":
+                model.status = "rescoring"
+            db.commit()
+
+            # 2. Chunked set-based UPDATEs, one transaction each (the dashboard still
+            #    shows the current model: aggregates are not touched here)
+            done = 0
+            if low is not None:
+                for start in range(low, high + 1, chunk_size):
+                    done += _rescore_range(db, version, start, start + chunk_size)
+                    db.execute(update(models.RiskModel).where(models.RiskModel.version == version)
+                               .values(rescored_rows=done))
+                    db.commit()
+                    if progress:
+                        progress(done, model.total_rows)
+
+            # 3. Fresh statistics, so the catch-up passes plan on ix_risks_model_version
+            db.execute(text("ANALYZE risks"))
+            db.commit()
+
+            # 4. Atomic switch
+            done += activate(db, version)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": RESCORE_LOCK_ID})
+    return done
+
+def activate(db: Session, version: int) -> int:
+    """
+    Makes `version` the active model: re-scores rows not yet on that version, then,
+    in one transaction under the exclusive model lock, catches up the rows ingestion
+    wrote since, flips the status and recomputes the rating counts. Returns the number
+    of rows caught up.
+    """
+    global _current
+    # 1. Unlocked catch-up: rows written (or rewritten) by ingestion while the chunks ran
+    caught_up = _rescore_range(db, version, 0, 2 ** 31)
+    db.commit()
+
+    # 2. Exclusive model lock: ingestion chunks that already read the old version commit
+    #    first, later ones wait; only what they wrote since step 1 is left to re-score
+    db.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": RISK_MODEL_LOCK_ID})
+    caught_up += _rescore_range(db, version, 0, 2 ** 31)
+
+    # 3. Version switch, then the dashboard counts for the new scores (counted under
+    #    the active version, so the switch comes first)
+    now = datetime.utcnow()
+    db.execute(update(models.RiskModel)
+               .where(models.RiskModel.status == "active", models.RiskModel.version != version)
+               .values(status="retired"))
+    # An interrupted re-score of another version goes back to draft
+    db.execute(update(models.RiskModel)
+               .where(models.RiskModel.status == "rescoring", models.RiskModel.version != version)
+               .values(status="draft"))
+    db.execute(update(models.RiskModel).where(models.RiskModel.version == version).values(
+        status="active", activated_at=now, rescored_rows=models.RiskModel.rescored_rows + caught_up,
+    ))
+    crud_aggregates.rebuild_risk_rating_counts(db)
+    mark_data_changed(db)
+    db.commit()
+    _current = (version, _matrix(db, version))
+    return caught_up
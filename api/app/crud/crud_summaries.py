@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from ..core import models
+from ..risk_engine import ai_utils
+from .key_cache import KeyedIdCache
+
+# Process-wide content_hash -> ai_summaries.id cache in front of the summary table
+SUMMARY_CACHE = KeyedIdCache(
+    "ai_summaries", models.AISummary, "content_hash",
+    max_size=int(os.environ.get("SUMMARY_CACHE_SIZE", "50000")),
+)
+
+# A 'failed' summary (retries exhausted, e.g. during an API outage) is queued again
+# once SUMMARY_RETRY_COOLDOWN seconds have passed, until it has failed SUMMARY_RETRY_LIMIT times
+SUMMARY_RETRY_LIMIT = int(os.environ.get("AI_SUMMARY_RETRY_LIMIT", "5"))
+SUMMARY_RETRY_COOLDOWN = float(os.environ.get("AI_SUMMARY_RETRY_COOLDOWN", "600"))
+
+# Bump when the prompt changes so old summaries are not reused for the new prompt
+PROMPT_VERSION = 1
+
+def summary_key(normalized_title: str, normalized_severity: str, control_context: str) -> str:
+    """Content hash of the normalized prompt inputs (plus model and prompt version)."""
+    payload = json.dumps([
+        PROMPT_VERSION, ai_utils.SUMMARY_MODEL,
+        " ".join(normalized_title.lower().split()), normalized_severity, control_context,
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def retryable_failed():
+    """Filter for 'failed' summaries that are due for another attempt."""
+    cutoff = datetime.utcnow() - timedelta(seconds=SUMMARY_RETRY_COOLDOWN)
+    return (
+        (models.AISummary.status == "failed")
+        & (models.AISummary.failures < SUMMARY_RETRY_LIMIT)
+        & or_(models.AISummary.failed_at.is_(None), models.AISummary.failed_at < cutoff)
+    )
+
+def _job_inputs(title: str, severity: str, control_context: str) -> Dict[str, Any]:
+    return {'normalized_title': title, 'normalized_severity': severity, 'control_context': control_context}
+
+def bulk_get_or_create_summaries(
+    db: Session, findings: List[Dict[str, Any]], control_contexts: List[str]
+) -> Tuple[List[int], List[Tuple[int, Dict[str, Any]]]]:
+    """
+    Resolves each finding to a shared ai_summaries row (creating 'pending' rows for
+    prompts never seen before). Does not commit.
+    Returns (summary id per finding, [(summary_id, prompt inputs)] for the rows that
+    still need a model call: new ones, plus existing 'failed' ones due for a retry).
+    """
+    keys = []
+    key_by_inputs: Dict[Tuple[str, str, str], str] = {}
+    rows_by_key: Dict[str, Dict[str, Any]] = {}
+    for f, control_context in zip(findings, control_contexts):
+        inputs = (f["normalized_title"], f["normalized_severity"], control_context)
+        key = key_by_inputs.get(inputs)
+        if key is None:
+            key = key_by_inputs[inputs] = summary_key(*inputs)
+        keys.append(key)
+        if key not in rows_by_key:
+            rows_by_key[key] = {
+                "content_hash": key,
+                "normalized_title": f["normalized_title"],
+                "normalized_severity": f["normalized_severity"],
+                "control_context": control_context,
+                "status": "pending",
+            }
+
+    summary_ids, created = SUMMARY_CACHE.resolve(db, rows_by_key)
+    new_jobs = [
+        (summary_id, _job_inputs(
+            rows_by_key[key]["normalized_title"], rows_by_key[key]["normalized_severity"],
+            rows_by_key[key]["control_context"],
+        ))
+        for key, summary_id in created.items()
+    ]
+
+    # Cached rows whose last attempt failed (one primary-key lookup per chunk)
+    existing = [summary_id for key, summary_id in summary_ids.items() if key not in created]
+    if existing:
+        retry = db.query(
+            models.AISummary.id, models.AISummary.normalized_title,
+            models.AISummary.normalized_severity, models.AISummary.control_context,
+        ).filter(models.AISummary.id.in_(existing), retryable_failed())
+        new_jobs.extend((summary_id, _job_inputs(*inputs)) for summary_id, *inputs in retry)
+    return [summary_ids[key] for key in keys], new_jobs
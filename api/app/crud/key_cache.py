@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Tuple
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+# Session.info key holding ids inserted by the current transaction, per cache
+_PENDING_KEY = "pending_key_cache_ids"
+
+
+class KeyedIdCache:
+    """
+    Process-wide, bounded (LRU) cache of natural key -> primary key in front of a
+    table with a unique key column (assets by IP, AI summaries by content hash...).
+
+    resolve() turns a batch of keys into ids with one INSERT ... ON CONFLICT DO
+    NOTHING RETURNING for the cache misses plus (at most) one SELECT for rows that
+    already existed. Concurrent writers of the same keys cannot race on the unique
+    index: the loser's rows simply conflict and are picked up by the SELECT.
+    """
+
+    def __init__(self, name: str, model, key_column: str, max_size: int):
+        self.name = name
+        self.model = model
+        self.key_column = key_column
+        self.max_size = max_size
+        self._cache: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        _CACHES[name] = self
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, int]:
+        """Returns the cached ids for the given keys (and refreshes their LRU position)."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                row_id = self._cache.get(key)
+                if row_id is not None:
+                    self._cache.move_to_end(key)
+                    found[key] = row_id
+        return found
+
+    def remember(self, ids: Dict[Hashable, int]):
+        """Adds resolved ids to the cache, evicting the least recently used entries."""
+        with self._lock:
+            for key, row_id in ids.items():
+                self._cache[key] = row_id
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def resolve(
+        self, db: Session, rows_by_key: Dict[Hashable, Dict[str, Any]]
+    ) -> Tuple[Dict[Hashable, int], Dict[Hashable, int]]:
+        """
+        Resolves every key to an id, inserting `rows_by_key[key]` for unknown keys.
+        Returns (ids for all keys, ids of the rows this call inserted).
+        Does not commit: ids inserted here are only cached once the session commits.
+        """
+        ids = self.get_many(rows_by_key)
+
+        # Sorted so concurrent transactions take row locks in the same order (no deadlocks)
+        missing = sorted(key for key in rows_by_key if key not in ids)
+        if not missing:
+            return ids, {}
+
+        key_attr = getattr(self.model, self.key_column)
+        created = dict(db.execute(
+            pg_insert(self.model)
+            .on_conflict_do_nothing(index_elements=[self.key_column])
+            .returning(key_attr, self.model.id),
+            [rows_by_key[key] for key in missing],
+        ).all())
+
+        existing_keys = [key for key in missing if key not in created]
+        if existing_keys:
+            existing = dict(
+                db.query(key_attr, self.model.id).filter(key_attr.in_(existing_keys)).all()
+            )
+            # Already committed by someone else, so safe to cache right away
+            self.remember(existing)
+            ids.update(existing)
+
+        # Our own inserts only become cacheable once the caller's transaction commits
+        db.info.setdefault(_PENDING_KEY, {}).setdefault(self.name, {}).update(created)
+
+        ids.update(created)
+        return ids, created
+
+
+_CACHES: Dict[str, KeyedIdCache] = {}
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_ids(session: Session):
+    for name, ids in session.info.pop(_PENDING_KEY, {}).items():
+        _CACHES[name].remember(ids)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_ids(session: Session):
+    session.info.pop(_PENDING_KEY, None)
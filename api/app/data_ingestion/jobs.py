@@ -0,0 +1,175 @@
+"""
+Background ingestion jobs.
+
+The upload endpoint only spools the file to JOB_SPOOL_DIR, registers an
+ingestion_jobs row and returns its id; a pool of ingestion workers runs the
+bulk pipeline and records progress on the job row after every chunk, which
+GET /findings/jobs/{id} reports.
+
+INGEST_EXECUTOR selects the pool: 'thread' (default, in-process) or 'process'
+(a multi-process executor, for many concurrent uploads on multi-core hosts).
+In thread mode a single large upload is additionally sharded across cores
+(see sharding.py).
+"""
+import functools
+import os
+import tempfile
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional
+from ..core import database, metrics
+from ..crud import crud_jobs
+from ..risk_engine.summary_worker import SUMMARY_WORKER
+from . import sharding
+
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "2"))
+INGEST_EXECUTOR = os.environ.get("INGEST_EXECUTOR", "thread")
+JOB_SPOOL_DIR = os.environ.get("JOB_SPOOL_DIR") or os.path.join(tempfile.gettempdir(), "grc_ingest_jobs")
+
+_executor: Optional[Executor] = None
+
+
+def _init_worker_process():
+    # Forked children must not reuse the parent's pooled connections
+    database.engine.dispose(close=False)
+    # ...nor report the parent's metrics back to it as their own
+    metrics.drain_state()
+
+def get_executor() -> Executor:
+    """Returns the shared ingestion executor (created on first use)."""
+    global _executor
+    if _executor is None:
+        if INGEST_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=INGEST_WORKERS, initializer=_init_worker_process)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+    return _executor
+
+def shutdown_executor():
+    """
+    Stops accepting jobs and waits for running ones (called on app shutdown). Queued
+    jobs are cancelled: their rows are marked failed and their spool files removed.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+    sharding.shutdown_shard_executor()
+
+def spool_path(job_id: str) -> str:
+    os.makedirs(JOB_SPOOL_DIR, exist_ok=True)
+    return os.path.join(JOB_SPOOL_DIR, f"{job_id}.upload")
+
+def run_ingestion_job(
+    job_id: str, path: str, source_name: str, full_scan: bool = True, file_format: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Runs the full bulk pipeline for one spooled upload, updating the job row as it goes.
+    The reader is picked by readers.resolve_format (csv, nessus, jsonl).
+    For a full scan, findings of the source that the upload no longer reports are closed.
+    """
+    # The pipeline pulls in pandas/numpy: imported on the first job, not at API startup
+    from .pipeline import BULK_CHUNK_SIZE, ingest_batches, ingest_prepared
+    from .readers import READERS, resolve_format
+
+    db = database.SessionLocal()
+    try:
+        file_format = resolve_format(path, source_name, file_format)
+        sharded = file_format == "csv" and INGEST_EXECUTOR == "thread" and sharding.use_sharding(path)
+        # Stages: parsing/sharding (until the first chunk is written) -> persisting -> closing -> done
+        crud_jobs.update_job(
+            db, job_id, status="running", stage="sharding" if sharded else "parsing", started_at=datetime.utcnow(),
+        )
+
+        def on_stage(stage: str):
+            crud_jobs.update_job(db, job_id, stage=stage)
+
+        def on_progress(rows_seen: int, result: Dict[str, Any]):
+            crud_jobs.update_job(
+                db, job_id,
+                stage="persisting",
+                rows_processed=rows_seen,
+                rows_failed=result["failed_rows"],
+                errors=result["errors"],
+            )
+
+        if sharded:
+            # Large upload: shards are prepared on all cores, this thread writes
+            result = ingest_prepared(
+                db, sharding.iter_prepared_shards(path, source_name), source_name,
+                on_progress=on_progress, close_missing=full_scan, on_stage=on_stage,
+            )
+        else:
+            with open(path, "rb") as f:
+                result = ingest_batches(
+                    db, READERS[file_format](f, BULK_CHUNK_SIZE), source_name,
+                    on_progress=on_progress, close_missing=full_scan, on_stage=on_stage,
+                )
+
+        crud_jobs.update_job(
+            db, job_id,
+            status="completed",
+            stage="done",
+            rows_failed=result["failed_rows"],
+            errors=result["errors"],
+            result={
+                "format": file_format,
+                "count": result["count"],
+                "new": result["new"],
+                "changed": result["changed"],
+                "unchanged": result["unchanged"],
+                "closed": result["closed"],
+                "preview_finding_id": result["preview_finding_id"],
+                "mapped_controls_preview": result["mapped_controls_preview"],
+            },
+            finished_at=datetime.utcnow(),
+        )
+        if INGEST_EXECUTOR == "process":
+            # Stage metrics recorded in this worker process are merged by the parent
+            result["metrics"] = metrics.drain_state()
+        return result
+    except Exception as e:
+        db.rollback()
+        crud_jobs.update_job(
+            db, job_id, status="failed", stage="failed",
+            errors=[{"error": str(e)}], finished_at=datetime.utcnow(),
+        )
+        raise
+    finally:
+        db.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+def _fail_cancelled_job(job_id: str, path: str):
+    # Dropped from the queue by shutdown_executor before a worker picked it up
+    db = database.SessionLocal()
+    try:
+        crud_jobs.update_job(
+            db, job_id, status="failed", stage="failed",
+            errors=[{"error": "Interrupted by shutdown before ingestion started; upload the file again."}],
+            finished_at=datetime.utcnow(),
+        )
+    finally:
+        db.close()
+    if os.path.exists(path):
+        os.remove(path)
+
+def _on_job_done(job_id: str, path: str, future: Future):
+    if future.cancelled():
+        _fail_cancelled_job(job_id, path)
+        return
+    if INGEST_EXECUTOR != "process":
+        return
+    if future.exception() is None:
+        metrics.merge_state(future.result().get("metrics", {}))
+    # Process workers cannot reach this process' summary pool: pick up what they left pending
+    if SUMMARY_WORKER.running:
+        SUMMARY_WORKER.requeue_pending()
+
+def submit_job(
+    job_id: str, path: str, source_name: str, full_scan: bool = True, file_format: Optional[str] = None
+) -> Future:
+    """Hands a spooled upload to the ingestion pool."""
+    future = get_executor().submit(run_ingestion_job, job_id, path, source_name, full_scan, file_format)
+    future.add_done_callback(functools.partial(_on_job_done, job_id, path))
+    return future
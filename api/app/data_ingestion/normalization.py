@@ -1,7 +1,8 @@
 from ..core.schemas import FindingCreate
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 # Note: Since Pandas creates float/NaN, we need a small utility to check for it.
 import pandas as pd 
+import numpy as np
 
 # Define the standard severity mapping for your Risk Engine
 SEVERITY_MAP = {
@@ -25,6 +26,8 @@ def normalize_finding(raw_data: Dict[str, Any], source_name: str) -> FindingCrea
 
     # 2. Normalize Title (Ensure string conversion to pass Pydantic validation)
     raw_title = raw_data.get("Raw_Vulnerability_Title", "Unknown Finding")
+    if isinstance(raw_title, float) and pd.isna(raw_title):
+        raw_title = "Unknown Finding"
     normalized_title_safe = str(raw_title) 
 
     # For MVP, asset name is derived from the IP address
@@ -49,4 +52,59 @@ def normalize_finding(raw_data: Dict[str, Any], source_name: str) -> FindingCrea
         source_type=source_name,
         normalized_severity=normalized_severity,
         raw_evidence=raw_evidence_clean # <--- USE THE CLEANED DICT HERE
-    )
\ No newline at end of file
+    )
+
+# --- Batch (columnar) normalization ---
+# Same rules as normalize_finding, but applied to a whole DataFrame chunk with
+# column operations instead of a Python loop + one Pydantic model per row.
+
+NORMALIZED_COLUMNS = [
+    "asset_name", "ip_address", "normalized_title",
+    "source_type", "normalized_severity", "raw_evidence",
+]
+
+def normalize_dataframe(df: pd.DataFrame, source_name: str) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    """
+    Normalizes a raw scan DataFrame (or chunk) in one vectorized pass.
+    Returns (batch, errors): `batch` has one row per valid finding with the
+    FindingCreate columns; `errors` lists the positional rows that were rejected.
+    """
+    # 1. Normalize Severity (column-wide upper-case + map lookup)
+    if "Vendor_Severity_Code" in df:
+        raw_severity = df["Vendor_Severity_Code"].astype(str).str.upper()
+    else:
+        raw_severity = pd.Series("INFO", index=df.index)
+    normalized_severity = raw_severity.map(SEVERITY_MAP).fillna("Low")
+
+    # 2. Normalize Title (string coercion; blank titles fall back to the default)
+    if "Raw_Vulnerability_Title" in df:
+        raw_title = df["Raw_Vulnerability_Title"]
+        normalized_title = raw_title.where(raw_title.notna(), "Unknown Finding").astype(str)
+    else:
+        normalized_title = pd.Series("Unknown Finding", index=df.index)
+
+    # 3. Asset/IP must be a real string, otherwise the row is rejected
+    #    (this is the check FindingCreate validation used to do per row)
+    if "Raw_IP_Address" in df:
+        ip_address = df["Raw_IP_Address"]
+    else:
+        ip_address = pd.Series(None, index=df.index, dtype=object)
+    valid = ip_address.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+
+    # 4. Evidence: NaN -> None for every cell at once, then one dict per row
+    evidence = df.astype(object).where(df.notna(), None).to_dict("records")
+
+    batch = pd.DataFrame({
+        "asset_name": ip_address,
+        "ip_address": ip_address,
+        "normalized_title": normalized_title,
+        "source_type": source_name,
+        "normalized_severity": normalized_severity,
+        "raw_evidence": pd.Series(evidence, index=df.index, dtype=object),
+    }, columns=NORMALIZED_COLUMNS)
+
+    errors = [
+        {"row": int(pos), "error": "Raw_IP_Address is missing or not a string"}
+        for pos in np.flatnonzero(~valid)
+    ]
+    return batch[valid].reset_index(drop=True), errors
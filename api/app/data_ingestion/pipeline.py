@@ -0,0 +1,328 @@
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Any, Iterable, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from .normalization import NORMALIZED_COLUMNS, normalize_dataframe
+from ..core.database import PreSerializedJSON
+from ..core.metrics import INGEST_ROWS, INGEST_STAGE_SECONDS
+from ..crud import crud_evidence, crud_findings, crud_compliance, crud_risk_models, crud_summaries
+from ..risk_engine.risk_calc import calculate_risk_batch
+from ..risk_engine.summary_worker import SUMMARY_WORKER
+
+# Rows written per transaction. Large enough to amortize round-trips,
+# small enough that one bad chunk only loses a bounded amount of work.
+BULK_CHUNK_SIZE = 1000
+
+# Cap on how many individual error entries we echo back to the client.
+MAX_REPORTED_ERRORS = 100
+
+
+def new_ingestion_result(source_name: str) -> Dict[str, Any]:
+    """Creates the running tally that process_chunk() updates."""
+    return {
+        "source": source_name,
+        "count": 0,
+        "new": 0,
+        "changed": 0,
+        "unchanged": 0,
+        "closed": 0,
+        "failed_rows": 0,
+        "failed_chunks": 0,
+        "errors": [],
+        "preview_finding_id": None,
+        "mapped_controls_preview": [],
+    }
+
+def _record_error(result: Dict[str, Any], error: Dict[str, Any]):
+    if len(result["errors"]) < MAX_REPORTED_ERRORS:
+        result["errors"].append(error)
+
+def _record_stage(timings: Optional[Dict[str, float]], stage: str, source_name: str, seconds: float):
+    INGEST_STAGE_SECONDS.observe(seconds, stage, source_name)
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+@contextmanager
+def _timed(timings: Optional[Dict[str, float]], stage: str, source_name: str):
+    """Records the block's wall time in the stage histogram (and adds it to timings[stage])."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_stage(timings, stage, source_name, time.perf_counter() - start)
+
+def _take(columns: Dict[str, np.ndarray], positions) -> Dict[str, np.ndarray]:
+    """Selects rows (by position) from columnar risk results."""
+    index = np.asarray(positions, dtype=np.intp)
+    return {name: values[index] for name, values in columns.items()}
+
+# Columns of a prepared batch (NORMALIZED_COLUMNS + fingerprint and compact evidence)
+PREPARED_COLUMNS = NORMALIZED_COLUMNS + ["fingerprint", "evidence_schema", "evidence_blob"]
+
+def prepare_chunk(chunk: pd.DataFrame, source_name: str, serialize_evidence: bool = False) -> Dict[str, Any]:
+    """
+    CPU-only half of process_chunk: normalize, fingerprint and risk-score one raw
+    chunk. Touches no database, so it can run in worker processes (see sharding.py).
+    Returns a compact columnar batch: {"rows", "columns", "risks", "evidence_schemas",
+    "errors", "stage_seconds"}. With `serialize_evidence`, raw_evidence is turned into
+    JSON text here rather than by the writer (compact evidence always is).
+    """
+    stage_seconds = {}
+
+    # 1. Normalize the whole chunk with column operations (bad rows are reported, not fatal)
+    start = time.perf_counter()
+    batch, row_errors = normalize_dataframe(chunk, source_name)
+    # A finding listed twice in the chunk is stored once (last occurrence wins)
+    batch["fingerprint"] = [
+        crud_findings.finding_fingerprint(ip, title, source_name)
+        for ip, title in zip(batch["ip_address"], batch["normalized_title"])
+    ]
+    unique = batch.drop_duplicates("fingerprint", keep="last")
+    columns = {name: unique[name].tolist() for name in NORMALIZED_COLUMNS + ["fingerprint"]}
+    stage_seconds["normalize"] = time.perf_counter() - start
+
+    # 2. Evidence: values only, keys interned per schema (see crud_evidence)
+    start = time.perf_counter()
+    evidence_schemas = {}
+    if crud_evidence.EVIDENCE_MODE == "compact":
+        (columns["evidence_schema"], columns["raw_evidence"], columns["evidence_blob"],
+         evidence_schemas) = crud_evidence.compact_evidence_column(
+            columns["raw_evidence"], columns["ip_address"],
+            columns["normalized_title"], columns["normalized_severity"],
+        )
+    else:
+        if serialize_evidence:
+            columns["raw_evidence"] = [PreSerializedJSON(json.dumps(e)) for e in columns["raw_evidence"]]
+        columns["evidence_schema"] = columns["evidence_blob"] = [None] * len(columns["fingerprint"])
+    stage_seconds["evidence"] = time.perf_counter() - start
+
+    # 3. Risk Engine: one vectorized pass over the severity column. Every row is
+    #    scored here (cheap, and off the writer); the writer keeps new/changed rows only.
+    #    The model is the last active one this process saw; the writer re-checks it
+    start = time.perf_counter()
+    risk_model_version, matrix = crud_risk_models.current_model()
+    risks = calculate_risk_batch(np.asarray(columns["normalized_severity"], dtype=object), matrix)
+    stage_seconds["risk"] = time.perf_counter() - start
+
+    return {
+        "rows": len(chunk),
+        "accepted": len(batch),
+        "columns": columns,
+        "risks": risks,
+        "risk_model_version": risk_model_version,
+        "evidence_schemas": evidence_schemas,
+        "errors": row_errors,
+        "stage_seconds": stage_seconds,
+    }
+
+def write_prepared(
+    db: Session,
+    prepared: Dict[str, Any],
+    source_name: str,
+    row_offset: int,
+    result: Dict[str, Any],
+    timings: Optional[Dict[str, float]] = None,
+    seen_at: Optional[datetime] = None,
+):
+    """
+    Database half of process_chunk: classify -> persist -> map one prepared batch in
+    a single transaction and queue the AI summaries.
+
+    Rows are matched to stored findings by fingerprint: unchanged findings only get
+    their last_seen bumped, new ones are inserted, and changed (severity) or reopened
+    ones are rewritten; risks, mapping and AI summaries are only written for new and
+    changed rows. A database failure rolls back (and reports) the chunk.
+    """
+    seen_at = seen_at or datetime.utcnow()
+    for stage, seconds in prepared["stage_seconds"].items():
+        _record_stage(timings, stage, source_name, seconds)
+
+    INGEST_ROWS.inc(source_name, "rejected", amount=len(prepared["errors"]))
+    for error in prepared["errors"]:
+        result["failed_rows"] += 1
+        _record_error(result, {"row": row_offset + error["row"], "error": error["error"]})
+
+    columns = prepared["columns"]
+    accepted = prepared["accepted"]
+    if not columns["fingerprint"]:
+        return
+
+    try:
+        # 0. Scores must come from the active risk model, which cannot switch until this
+        #    transaction ends (batches from worker processes, or prepared before a switch,
+        #    are re-scored here)
+        version, matrix = crud_risk_models.lock_active_model(db)
+        prepared_risks = prepared["risks"]
+        if prepared.get("risk_model_version") != version:
+            with _timed(timings, "risk", source_name):
+                prepared_risks = calculate_risk_batch(np.asarray(columns["normalized_severity"], dtype=object), matrix)
+        prepared_risks = {**prepared_risks, "model_version": np.full(len(columns["fingerprint"]), version)}
+
+        # 1. Classify against stored findings: new / changed (or reopened) / unchanged
+        with _timed(timings, "classify", source_name):
+            existing = crud_findings.lookup_findings_by_fingerprint(db, columns["fingerprint"])
+            new_pos, changed_pos, unchanged_ids = [], [], []
+            for pos, (fingerprint, severity) in enumerate(zip(columns["fingerprint"], columns["normalized_severity"])):
+                stored = existing.get(fingerprint)
+                if stored is None:
+                    new_pos.append(pos)
+                elif stored.status != "open" or stored.normalized_severity != severity:
+                    changed_pos.append(pos)
+                else:
+                    unchanged_ids.append(stored.id)
+            crud_findings.touch_findings(db, unchanged_ids, seen_at)
+
+            work_pos = new_pos + changed_pos
+            normalized = [{name: columns[name][i] for name in PREPARED_COLUMNS} for i in work_pos]
+            risks = _take(prepared_risks, work_pos)
+            new_rows, changed_rows = normalized[:len(new_pos)], normalized[len(new_pos):]
+
+        # 2. Persist assets, findings, risks and control links in ONE transaction
+        with _timed(timings, "assets", source_name):
+            asset_ids = crud_findings.bulk_get_or_create_assets(db, new_rows)
+        with _timed(timings, "summaries", source_name):
+            summary_ids, summary_jobs = crud_summaries.bulk_get_or_create_summaries(
+                db, normalized, [crud_compliance.control_context(f["normalized_title"]) for f in normalized]
+            )
+        with _timed(timings, "persist", source_name):
+            schema_ids = crud_evidence.resolve_schemas(db, prepared["evidence_schemas"])
+            for f in normalized:
+                f["evidence_schema_id"] = schema_ids.get(f["evidence_schema"])
+            inserted = crud_findings.bulk_create_findings(
+                db, new_rows, asset_ids, summary_ids[:len(new_rows)], seen_at
+            )
+            # A row inserted meanwhile by a concurrent upload is left to that upload
+            inserted_pos = [i for i, f in enumerate(new_rows) if f["fingerprint"] in inserted]
+            finding_ids = [inserted[new_rows[i]["fingerprint"]] for i in inserted_pos]
+            crud_findings.bulk_create_risks(db, _take(risks, inserted_pos), finding_ids)
+            crud_findings.bulk_update_changed_findings(
+                db, changed_rows, existing, _take(risks, range(len(new_rows), len(normalized))),
+                summary_ids[len(new_rows):], seen_at,
+            )
+            # Large evidence goes out of line once the finding ids are known
+            changed_ids = [existing[f["fingerprint"]].id for f in changed_rows]
+            crud_evidence.delete_evidence_blobs(
+                db, [fid for fid, f in zip(changed_ids, changed_rows) if f["evidence_blob"] is None]
+            )
+            crud_evidence.store_evidence_blobs(db, {
+                **{fid: new_rows[i]["evidence_blob"] for i, fid in zip(inserted_pos, finding_ids)
+                   if new_rows[i]["evidence_blob"] is not None},
+                **{fid: f["evidence_blob"] for fid, f in zip(changed_ids, changed_rows) if f["evidence_blob"] is not None},
+            })
+        with _timed(timings, "mapping", source_name):
+            mapped = crud_compliance.bulk_map_findings_to_controls(
+                db, finding_ids, [new_rows[i]["normalized_title"] for i in inserted_pos],
+                [new_rows[i]["normalized_severity"] for i in inserted_pos],
+            )
+        with _timed(timings, "commit", source_name):
+            db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        INGEST_ROWS.inc(source_name, "failed", amount=accepted)
+        result["failed_rows"] += accepted
+        result["failed_chunks"] += 1
+        _record_error(result, {
+            "rows": [row_offset, row_offset + prepared["rows"] - 1],
+            "error": str(e.orig) if getattr(e, "orig", None) else str(e),
+        })
+        return
+
+    # 3. AI Summaries: only prompts never seen before (or whose last attempt failed)
+    #    are queued for the background worker pool (repeat findings reuse the cached
+    #    summary: zero model calls)
+    SUMMARY_WORKER.submit(summary_jobs)
+
+    # 4. Tally (preview is taken from the very first inserted finding)
+    if result["preview_finding_id"] is None and finding_ids:
+        first_id = finding_ids[0]
+        result["preview_finding_id"] = first_id
+        result["mapped_controls_preview"] = [
+            {"control_id": cid, "control_name": name} for cid, name in mapped[first_id]
+        ]
+    unchanged = accepted - len(finding_ids) - len(changed_rows)
+    INGEST_ROWS.inc(source_name, "new", amount=len(finding_ids))
+    INGEST_ROWS.inc(source_name, "changed", amount=len(changed_rows))
+    INGEST_ROWS.inc(source_name, "unchanged", amount=unchanged)
+    result["new"] += len(finding_ids)
+    result["changed"] += len(changed_rows)
+    result["unchanged"] += unchanged
+    result["count"] += accepted
+
+def process_chunk(
+    db: Session,
+    chunk: pd.DataFrame,
+    source_name: str,
+    row_offset: int,
+    result: Dict[str, Any],
+    timings: Optional[Dict[str, float]] = None,
+    seen_at: Optional[datetime] = None,
+):
+    """
+    Runs normalize -> classify -> risk -> persist -> map for one raw DataFrame chunk
+    (prepare_chunk, then write_prepared). Row-level validation failures are skipped
+    and reported. Every stage is timed into the grc_ingest_stage_seconds histogram
+    and, if `timings` is given, added to it.
+    """
+    write_prepared(db, prepare_chunk(chunk, source_name), source_name, row_offset, result, timings, seen_at)
+
+def ingest_prepared(
+    db: Session,
+    prepared_batches: Iterable[Dict[str, Any]],
+    source_name: str,
+    on_progress: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+    timings: Optional[Dict[str, float]] = None,
+    close_missing: bool = True,
+    on_stage: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Writes prepared batches (prepare_chunk output, in file order) one transaction
+    each. `on_progress(rows_seen, result)` is called after every batch; `timings`
+    collects per-stage seconds. `on_stage('closing')` is called before the
+    close-missing sweep.
+
+    With `close_missing` (the upload is a full scan of the source), open findings of
+    this source that the scan did not report are closed at the end. This is skipped
+    if any chunk failed or nothing was accepted, since absence then proves nothing.
+    """
+    result = new_ingestion_result(source_name)
+    seen_at = datetime.utcnow()
+    row_offset = 0
+    for prepared in prepared_batches:
+        write_prepared(db, prepared, source_name, row_offset, result, timings, seen_at)
+        row_offset += prepared["rows"]
+        if on_progress is not None:
+            on_progress(row_offset, result)
+
+    if close_missing and result["failed_chunks"] == 0 and result["count"] > 0:
+        if on_stage is not None:
+            on_stage("closing")
+        with _timed(timings, "close", source_name):
+            result["closed"] = crud_findings.close_missing_findings(db, source_name, seen_at)
+            db.commit()
+        INGEST_ROWS.inc(source_name, "closed", amount=result["closed"])
+    return result
+
+def ingest_batches(
+    db: Session,
+    batches: Iterable[pd.DataFrame],
+    source_name: str,
+    on_progress: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+    timings: Optional[Dict[str, float]] = None,
+    close_missing: bool = True,
+    on_stage: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Pulls raw row batches from a generator (e.g. readers.iter_csv_batches) and pushes
+    each one through normalize -> risk -> persist. Only the current batch is alive
+    at any time, so memory stays flat no matter how many rows the source yields.
+    See ingest_prepared for `on_progress`, `timings`, `close_missing` and `on_stage`.
+    """
+    return ingest_prepared(
+        db, (prepare_chunk(chunk, source_name) for chunk in batches), source_name,
+        on_progress=on_progress, timings=timings, close_missing=close_missing, on_stage=on_stage,
+    )
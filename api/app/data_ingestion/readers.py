@@ -0,0 +1,186 @@
+"""
+Streaming source readers.
+
+Each reader turns an uploaded file into raw DataFrame chunks of at most
+`batch_size` rows with the scanner input columns normalize_dataframe expects
+(Raw_IP_Address, Raw_Vulnerability_Title, Vendor_Severity_Code); any other
+column is kept as evidence. Only one chunk is held in memory at a time, whatever
+the file size.
+
+  csv     flat Raw_* CSV
+  nessus  Nessus v2 XML (.nessus), one row per ReportItem
+  jsonl   line-delimited JSON objects (also the aliases in JSONL_FIELD_ALIASES)
+
+The reader for an upload is chosen by an explicit format, then by the source
+name (SOURCE_FORMATS), then by sniffing the first bytes of the file.
+"""
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional
+from xml.etree.ElementTree import iterparse
+import pandas as pd
+
+INPUT_COLUMNS = ["Raw_IP_Address", "Raw_Vulnerability_Title", "Vendor_Severity_Code"]
+
+
+def iter_csv_batches(fileobj: BinaryIO, batch_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Streams a CSV file as raw DataFrame chunks of at most `batch_size` rows.
+    Pandas parses the (binary) file incrementally, so only one batch is ever held
+    in memory regardless of the file size.
+    """
+    reader = pd.read_csv(fileobj, chunksize=batch_size, encoding="utf-8")
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+
+# --- Nessus v2 XML ---
+
+# ReportItem severity attribute -> vendor severity code (see normalization.SEVERITY_MAP)
+NESSUS_SEVERITY = {"0": "INFO", "1": "LOW", "2": "MEDIUM", "3": "HIGH", "4": "CRITICAL"}
+
+# ReportItem attributes / child elements kept as evidence columns
+NESSUS_ATTRIBUTES = {"port": "Port", "protocol": "Protocol", "svc_name": "Service",
+                     "pluginID": "Plugin_ID", "pluginFamily": "Plugin_Family"}
+NESSUS_ELEMENTS = {"risk_factor": "Risk_Factor", "cvss3_base_score": "CVSS3_Base_Score",
+                   "synopsis": "Synopsis", "solution": "Solution"}
+NESSUS_COLUMNS = (INPUT_COLUMNS + ["Hostname"] + list(NESSUS_ATTRIBUTES.values())
+                  + list(NESSUS_ELEMENTS.values()) + ["CVE"])
+
+def _nessus_row(item, host_ip: Optional[str], hostname: Optional[str]) -> Dict[str, Optional[str]]:
+    row = {
+        "Raw_IP_Address": host_ip,
+        "Raw_Vulnerability_Title": item.get("pluginName"),
+        "Vendor_Severity_Code": NESSUS_SEVERITY.get(item.get("severity"), "INFO"),
+        "Hostname": hostname,
+    }
+    for attribute, column in NESSUS_ATTRIBUTES.items():
+        row[column] = item.get(attribute)
+    for tag, column in NESSUS_ELEMENTS.items():
+        row[column] = item.findtext(tag)
+    cves = [cve.text for cve in item.iter("cve")]
+    row["CVE"] = ",".join(cves) if cves else None
+    return row
+
+def iter_nessus_batches(fileobj: BinaryIO, batch_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Streams a .nessus (v2) export with iterparse: every ReportItem becomes a row,
+    and each ReportHost is cleared and detached once read, so memory is bounded
+    by one host plus the current batch.
+    """
+    rows: List[Dict[str, Optional[str]]] = []
+    report = None
+    host_ip = hostname = None
+    for event, elem in iterparse(fileobj, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == "Report":
+                report = elem
+            elif tag == "ReportHost":
+                # The host-ip tag (below) wins; the host name is the fallback
+                host_ip, hostname = elem.get("name"), None
+            continue
+
+        if tag == "tag":
+            name = elem.get("name")
+            if name == "host-ip":
+                host_ip = elem.text
+            elif name in ("host-fqdn", "hostname") and hostname is None:
+                hostname = elem.text
+        elif tag == "ReportItem":
+            rows.append(_nessus_row(elem, host_ip, hostname))
+            elem.clear()
+            if len(rows) >= batch_size:
+                yield pd.DataFrame(rows, columns=NESSUS_COLUMNS)
+                rows = []
+        elif tag == "ReportHost":
+            elem.clear()
+            if report is not None:
+                report.remove(elem)
+    if rows:
+        yield pd.DataFrame(rows, columns=NESSUS_COLUMNS)
+
+
+# --- Line-delimited JSON ---
+
+# Alternative field names accepted for the input columns (coalesced in this order)
+JSONL_FIELD_ALIASES = {
+    "Raw_IP_Address": ["ip_address", "ip", "host_ip", "host"],
+    "Raw_Vulnerability_Title": ["title", "vulnerability_title", "name", "plugin_name"],
+    "Vendor_Severity_Code": ["severity", "vendor_severity", "risk"],
+}
+
+def iter_jsonl_batches(fileobj: BinaryIO, batch_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Streams line-delimited JSON (one finding object per line) in chunks. Values
+    are kept as parsed (no dtype or date inference); numeric severities use the
+    Nessus 0-4 scale.
+    """
+    reader = pd.read_json(
+        fileobj, lines=True, chunksize=batch_size, dtype=False, convert_dates=False, encoding="utf-8"
+    )
+    with reader:
+        while True:
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                return
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON lines input: {e}") from e
+            if chunk.empty:
+                continue  # a run of blank lines
+
+            # Alias fields fill the rows where the input column is missing
+            for column, aliases in JSONL_FIELD_ALIASES.items():
+                for alias in aliases:
+                    if alias in chunk:
+                        chunk[column] = chunk[column].combine_first(chunk[alias]) if column in chunk else chunk[alias]
+                        chunk = chunk.drop(columns=alias)
+            if "Vendor_Severity_Code" in chunk:
+                chunk["Vendor_Severity_Code"] = chunk["Vendor_Severity_Code"].map(_jsonl_severity)
+            yield chunk
+
+def _jsonl_severity(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and pd.notna(value):
+        return NESSUS_SEVERITY.get(str(int(value)), "INFO")
+    return value
+
+
+# --- Registry ---
+
+Reader = Callable[[BinaryIO, int], Iterator[pd.DataFrame]]
+
+READERS: Dict[str, Reader] = {
+    "csv": iter_csv_batches,
+    "nessus": iter_nessus_batches,
+    "jsonl": iter_jsonl_batches,
+}
+
+# Sources whose uploads always arrive in one native format
+SOURCE_FORMATS: Dict[str, str] = {
+    "nessus_xml": "nessus",
+    "jsonl": "jsonl",
+}
+
+def sniff_format(path: str) -> str:
+    """Guesses the format from the first non-blank byte: '<' XML, '{' JSON lines, else CSV."""
+    with open(path, "rb") as f:
+        head = f.read(512).lstrip(b"\xef\xbb\xbf \t\r\n")
+    if head.startswith(b"<"):
+        return "nessus"
+    if head.startswith(b"{"):
+        return "jsonl"
+    return "csv"
+
+def resolve_format(path: str, source_name: str, requested: Optional[str] = None) -> str:
+    """Picks the reader for an upload: explicit format, then the source's registered format, then sniffing."""
+    if requested:
+        if requested not in READERS:
+            raise ValueError(f"Unknown format '{requested}' (expected one of {', '.join(READERS)}).")
+        return requested
+    return SOURCE_FORMATS.get(source_name) or sniff_format(path)
+
+def register_reader(format_name: str, reader: Reader, sources: List[str] = ()):
+    """Adds a reader (and optionally the sources that always use it)."""
+    READERS[format_name] = reader
+    for source_name in sources:
+        SOURCE_FORMATS[source_name] = format_name
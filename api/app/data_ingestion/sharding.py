@@ -0,0 +1,108 @@
+"""
+Parallel (sharded) CSV ingestion.
+
+A large upload is split into byte-range shards aligned on line boundaries. A
+process pool parses, normalizes, fingerprints, risk-scores and JSON-encodes each
+shard (pipeline.prepare_chunk) and sends back compact columnar batches; the job's
+own thread is the single writer that runs the bulk database work
+(pipeline.ingest_prepared) in file order. CPU-bound preparation therefore scales
+with INGEST_SHARD_WORKERS while the database sees one ordered stream of
+transactions, exactly as in sequential mode.
+
+Byte-range splitting assumes one record per line: CSVs with quoted fields that
+contain newlines must be ingested sequentially (INGEST_SHARD_WORKERS=0).
+"""
+import csv
+import io
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+INGEST_SHARD_WORKERS = int(os.environ.get("INGEST_SHARD_WORKERS", str(os.cpu_count() or 1)))
+# Target shard size; also the unit of work handed to one worker
+SHARD_BYTES = int(os.environ.get("INGEST_SHARD_BYTES", str(4 * 1024 * 1024)))
+# Uploads smaller than this are not worth the hand-off and run sequentially
+PARALLEL_MIN_BYTES = int(os.environ.get("INGEST_PARALLEL_MIN_BYTES", str(16 * 1024 * 1024)))
+
+_shard_executor: Optional[Executor] = None
+
+
+def use_sharding(path: str) -> bool:
+    """True when an upload should go through the sharded path."""
+    return INGEST_SHARD_WORKERS > 1 and os.path.getsize(path) >= PARALLEL_MIN_BYTES
+
+def get_shard_executor() -> Executor:
+    """Returns the shared shard worker pool (created on first use)."""
+    global _shard_executor
+    if _shard_executor is None:
+        # 'spawn': the API process runs threads (event loop, summary workers), which fork would copy mid-state
+        _shard_executor = ProcessPoolExecutor(
+            max_workers=INGEST_SHARD_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _shard_executor
+
+def shutdown_shard_executor():
+    global _shard_executor
+    if _shard_executor is not None:
+        _shard_executor.shutdown(wait=True, cancel_futures=True)
+        _shard_executor = None
+
+def plan_shards(path: str, shard_bytes: int = SHARD_BYTES) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """
+    Reads the header and splits the rest of the file into [start, end) byte ranges
+    of roughly shard_bytes, each starting and ending on a line boundary.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        header = next(csv.reader([header_line.decode("utf-8-sig")]))
+        shards, start = [], f.tell()
+        while start < size:
+            f.seek(min(start + shard_bytes, size))
+            if f.tell() < size:
+                f.readline()  # finish the current line
+            end = f.tell()
+            shards.append((start, end))
+            start = end
+    return header, shards
+
+def prepare_shard(path: str, start: int, end: int, header: List[str], source_name: str) -> List[Dict[str, Any]]:
+    """Worker entry point: parses one byte range and prepares it in BULK_CHUNK_SIZE batches."""
+    import pandas as pd
+    from .pipeline import BULK_CHUNK_SIZE, prepare_chunk
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    frame = pd.read_csv(io.BytesIO(data), header=None, names=header, encoding="utf-8")
+    return [
+        prepare_chunk(frame.iloc[i:i + BULK_CHUNK_SIZE].reset_index(drop=True), source_name, serialize_evidence=True)
+        for i in range(0, len(frame), BULK_CHUNK_SIZE)
+    ]
+
+def iter_prepared_shards(path: str, source_name: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yields prepared batches for the whole file in file order, keeping at most two
+    shards per worker in flight so memory stays bounded while the writer catches up.
+    """
+    header, shards = plan_shards(path)
+    executor = get_shard_executor()
+    window = 2 * INGEST_SHARD_WORKERS
+    pending = deque()
+    shard_iter = iter(shards)
+    try:
+        for start, end in shard_iter:
+            pending.append(executor.submit(prepare_shard, path, start, end, header, source_name))
+            if len(pending) >= window:
+                break
+        while pending:
+            batches = pending.popleft().result()
+            next_shard = next(shard_iter, None)
+            if next_shard is not None:
+                pending.append(executor.submit(prepare_shard, path, *next_shard, header, source_name))
+            yield from batches
+    finally:
+        for future in pending:
+            future.cancel()
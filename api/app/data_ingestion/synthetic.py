@@ -0,0 +1,129 @@
+"""
+Synthetic scan generator (Raw_IP_Address,Raw_Vulnerability_Title,Vendor_Severity_Code).
+
+Used by the benchmark suite (api/benchmarks) and `python -m app.manage generate-scan`
+to produce scans of any size with a controllable shape:
+  - rows:       number of rows
+  - hosts:      distinct IP addresses (asset cardinality)
+  - titles:     distinct vulnerability titles (rows / titles = average repetition)
+  - nan_rate:   fraction of cells blanked out in each column
+Output is deterministic for a given seed. Besides CSV, the scan can be written as
+Nessus v2 XML or line-delimited JSON (see data_ingestion/readers.py).
+"""
+import json
+from typing import Iterator
+from xml.sax.saxutils import quoteattr
+import numpy as np
+import pandas as pd
+
+SCAN_COLUMNS = ["Raw_IP_Address", "Raw_Vulnerability_Title", "Vendor_Severity_Code"]
+
+# Title stems modelled on data/*.csv; a numeric suffix makes the distinct variants
+TITLE_TEMPLATES = [
+    "Missing Security Patch KB{n}",
+    "Outdated SSH Protocol Version (Configuration Hardening) #{n}",
+    "Weak Password Policy Enforcement on Server {n}",
+    "Privilege Escalation Vulnerability in Authentication Module {n}",
+    "Unrestricted Administrative Access via RDP on Host Group {n}",
+    "Open Port ({n}) Exposed to External Network",
+    "Outdated Version of Third-Party Library {n}",
+    "Unencrypted API Gateway Endpoint {n}",
+    "Server Disclosure of Sensitive Information {n}",
+    "Unmanaged Asset Detected on Network Segment {n}",
+]
+
+# Vendor severity codes and how often each one appears
+SEVERITY_CODES = ["CRITICAL", "HIGH", "MEDIUM", "LOW", "INFO", "WARNING"]
+SEVERITY_WEIGHTS = [0.08, 0.22, 0.30, 0.20, 0.15, 0.05]
+
+# Vendor severity code -> Nessus ReportItem severity (0-4)
+NESSUS_SEVERITY_LEVELS = {"CRITICAL": 4, "HIGH": 3, "MEDIUM": 2, "WARNING": 2, "LOW": 1, "INFO": 0}
+
+# Rows generated per DataFrame by iter_scan_batches
+DEFAULT_BATCH_SIZE = 100_000
+
+
+def host_addresses(hosts: int) -> np.ndarray:
+    """`hosts` distinct private IPv4 addresses in 10.0.0.0/8."""
+    i = np.arange(1, hosts + 1)
+    return np.array(
+        [f"10.{a}.{b}.{c}" for a, b, c in zip((i >> 16) & 255, (i >> 8) & 255, i & 255)],
+        dtype=object,
+    )
+
+def title_variants(titles: int) -> np.ndarray:
+    """`titles` distinct titles, cycling through TITLE_TEMPLATES."""
+    return np.array(
+        [TITLE_TEMPLATES[k % len(TITLE_TEMPLATES)].format(n=k // len(TITLE_TEMPLATES) + 1) for k in range(titles)],
+        dtype=object,
+    )
+
+def iter_scan_batches(
+    rows: int,
+    hosts: int = 1000,
+    titles: int = 200,
+    nan_rate: float = 0.0,
+    seed: int = 0,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Yields the synthetic scan as DataFrames of at most batch_size rows."""
+    rng = np.random.default_rng(seed)
+    host_pool = host_addresses(hosts)
+    title_pool = title_variants(titles)
+    severity_pool = np.array(SEVERITY_CODES, dtype=object)
+
+    for start in range(0, rows, batch_size):
+        n = min(batch_size, rows - start)
+        columns = {
+            "Raw_IP_Address": host_pool[rng.integers(0, hosts, n)],
+            "Raw_Vulnerability_Title": title_pool[rng.integers(0, titles, n)],
+            "Vendor_Severity_Code": rng.choice(severity_pool, n, p=SEVERITY_WEIGHTS),
+        }
+        if nan_rate > 0:
+            for values in columns.values():
+                values[rng.random(n) < nan_rate] = np.nan
+        yield pd.DataFrame(columns, columns=SCAN_COLUMNS)
+
+def generate_scan(rows: int, **kwargs) -> pd.DataFrame:
+    """The whole synthetic scan as one DataFrame (see iter_scan_batches for the knobs)."""
+    return pd.concat(iter_scan_batches(rows, **kwargs), ignore_index=True)
+
+def write_scan_csv(path: str, rows: int, **kwargs):
+    """Writes a synthetic scan CSV batch by batch (memory stays bounded)."""
+    for i, batch in enumerate(iter_scan_batches(rows, **kwargs)):
+        batch.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+
+def _nessus_host(ip, items) -> str:
+    name = "" if not isinstance(ip, str) else f" name={quoteattr(ip)}"
+    properties = "" if not isinstance(ip, str) else f'<HostProperties><tag name="host-ip">{ip}</tag></HostProperties>\n'
+    report_items = "".join(
+        '<ReportItem port="0" svc_name="general" protocol="tcp"'
+        + ("" if not isinstance(severity, str) else f' severity="{NESSUS_SEVERITY_LEVELS.get(severity, 0)}"')
+        + ("" if not isinstance(title, str) else f" pluginName={quoteattr(title)}")
+        + f' pluginID="{10000 + k}"><risk_factor>{severity if isinstance(severity, str) else "None"}</risk_factor>'
+        + "</ReportItem>\n"
+        for k, (title, severity) in enumerate(items)
+    )
+    return f"<ReportHost{name}>\n{properties}{report_items}</ReportHost>\n"
+
+def write_scan_nessus(path: str, rows: int, **kwargs):
+    """Writes the synthetic scan as a Nessus v2 XML export (one ReportHost per host and batch)."""
+    with open(path, "w", encoding="utf-8") as out:
+        out.write('<?xml version="1.0" ?>\n<NessusClientData_v2>\n<Report name="synthetic">\n')
+        for batch in iter_scan_batches(rows, **kwargs):
+            # NaN host addresses form their own group (written without a name)
+            hosts = batch["Raw_IP_Address"].fillna("")
+            for ip, group in batch.groupby(hosts, sort=False):
+                items = zip(group["Raw_Vulnerability_Title"], group["Vendor_Severity_Code"])
+                out.write(_nessus_host(ip or None, items))
+        out.write("</Report>\n</NessusClientData_v2>\n")
+
+def write_scan_jsonl(path: str, rows: int, **kwargs):
+    """Writes the synthetic scan as line-delimited JSON (blank cells become null)."""
+    with open(path, "w", encoding="utf-8") as out:
+        for batch in iter_scan_batches(rows, **kwargs):
+            records = batch.astype(object).where(batch.notna(), None).to_dict("records")
+            out.writelines(json.dumps(record) + "\n" for record in records)
+
+# Writer per output format (manage.py generate-scan --format)
+SCAN_WRITERS = {"csv": write_scan_csv, "nessus": write_scan_nessus, "jsonl": write_scan_jsonl}
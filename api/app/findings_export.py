@@ -0,0 +1,107 @@
+"""
+Incremental encoders for the findings export (GET /findings/export).
+
+Each encoder consumes batches of row tuples (one server-side cursor fetch at a
+time, see crud_reports.iter_findings_detail_batches) and yields encoded bytes per
+batch, so memory is bounded by one batch whatever the table size. Parquet writes
+one row group per batch and needs `pyarrow` (listed in requirements.txt).
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+Batches = Iterable[List[Tuple[Any, ...]]]
+
+
+def _iso(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def iter_csv(columns: List[str], batches: Batches) -> Iterator[bytes]:
+    """Header line, then one CSV block per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def iter_ndjson(columns: List[str], batches: Batches) -> Iterator[bytes]:
+    """One JSON object per line."""
+    for batch in batches:
+        lines = [
+            json.dumps(dict(zip(columns, map(_iso, row))), separators=(",", ":"))
+            for row in batch
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+# Arrow types of the findings_detail_query() columns (anything else is a string)
+PARQUET_TYPES = {
+    "id": "int64",
+    "ingestion_date": "timestamp",
+    "last_seen": "timestamp",
+    "inherent_score": "float64",
+}
+
+def iter_parquet(columns: List[str], batches: Batches) -> Iterator[bytes]:
+    """Parquet file with one row group per batch (requires pyarrow)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {"int64": pa.int64(), "float64": pa.float64(), "timestamp": pa.timestamp("us")}
+    schema = pa.schema([
+        (name, arrow_types.get(PARQUET_TYPES.get(name), pa.string())) for name in columns
+    ])
+
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="snappy") as writer:
+        for batch in batches:
+            arrays = [pa.array(list(values), type=field.type) for values, field in zip(zip(*batch), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    # Footer is written on close
+    yield sink.drain()
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# format -> (media type, file extension, encoder)
+EXPORT_FORMATS: Dict[str, Tuple[str, str, Callable[[List[str], Batches], Iterator[bytes]]]] = {
+    "csv": ("text/csv", "csv", iter_csv),
+    "ndjson": ("application/x-ndjson", "ndjson", iter_ndjson),
+    "parquet": ("application/vnd.apache.parquet", "parquet", iter_parquet),
+}
@@ -1,9 +1,33 @@
-from fastapi import FastAPI
+import asyncio
+import time
+_IMPORT_STARTED = time.perf_counter()
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager 
 from fastapi.middleware.cors import CORSMiddleware # CORSMiddleware is correctly imported here
-from .core import models, database 
+from .core import models, database, metrics, migrations
 from .routers import findings, dashboard, reports # Ensure 'reports' is imported
-from .crud import crud_compliance
+from .crud import crud_compliance, crud_aggregates, crud_risk_models
+from .data_ingestion import jobs
+from .risk_engine.summary_worker import SUMMARY_WORKER
+
+# Seconds spent in each startup step (also reported on GET /startup)
+STARTUP_TIMINGS = {"imports": time.perf_counter() - _IMPORT_STARTED}
+
+def _timed_step(name: str, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    STARTUP_TIMINGS[name] = time.perf_counter() - start
+    return result
+
+def _seed():
+    db = database.SessionLocal()
+    try:
+        crud_compliance.seed_initial_compliance_data(db)
+        crud_risk_models.seed_risk_models(db)
+        crud_aggregates.ensure_aggregates(db)
+    finally:
+        db.close()
 
 # -------------------------------------------------------------
 # 1. LIFESPAN MANAGER (DB SETUP ON STARTUP)
@@ -11,15 +35,30 @@ from .crud import crud_compliance
 async def lifespan(app: FastAPI):
     """Initializes DB tables and seeds compliance data on startup."""
     
-    # 1. Create tables
-    models.Base.metadata.create_all(bind=database.engine)
+    started = time.perf_counter()
+
+    # 1. Create tables, then apply schema migrations (columns/indexes on existing tables)
+    _timed_step("create_all", models.Base.metadata.create_all, database.engine)
+    _timed_step("migrations", migrations.run_migrations, database.engine)
     
-    # 2. Run Seeding Logic
-    db = database.SessionLocal()
-    crud_compliance.seed_initial_compliance_data(db)
-    db.close()
+    # 2. Run Seeding Logic (single transaction; a no-op check on a seeded database)
+    _timed_step("seed", _seed)
+
+    # 3. Start the background AI summary workers (findings are saved as 'pending')
+    start = time.perf_counter()
+    await SUMMARY_WORKER.start()
+    STARTUP_TIMINGS["summary_worker"] = time.perf_counter() - start
+
+    # 4. Startup timing report
+    STARTUP_TIMINGS["lifespan"] = time.perf_counter() - started
+    print("Startup: " + ", ".join(f"{step} {seconds * 1000:.0f}ms" for step, seconds in STARTUP_TIMINGS.items()))
     
     yield 
+
+    # 5. Shutdown: let running ingestion jobs finish, then drain the summary workers
+    await asyncio.to_thread(jobs.shutdown_executor)
+    await SUMMARY_WORKER.stop()
+    await database.dispose_async_engine()
 # -------------------------------------------------------------
 
 # 2. INITIALIZE APP
@@ -40,9 +79,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 # ----------------------------------------------------
 
+# Request latency per route template (not raw path, to keep label cardinality bounded)
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            request.method, route.path if route else "unmatched", str(status),
+        )
+# ----------------------------------------------------
+
 # 4. INCLUDE ALL ROUTERS
 app.include_router(findings.router) 
 app.include_router(dashboard.router)
@@ -52,4 +109,14 @@ app.include_router(reports.router) # CRITICAL: Include the reports router now!
 @app.get("/", tags=["Status"])
 def read_root():
     """Confirms the API is running."""
-    return {"status": "GRC-MMAP API Operational"}
\ No newline at end of file
+    return {"status": "GRC-MMAP API Operational"}
+
+@app.get("/startup", tags=["Status"])
+def read_startup_timings():
+    """Seconds spent in each startup step of this worker (imports, schema, seeding, workers)."""
+    return {step: round(seconds, 4) for step, seconds in STARTUP_TIMINGS.items()}
+
+@app.get("/metrics", tags=["Status"], response_class=PlainTextResponse)
+def read_metrics():
+    """Request, ingestion-stage, AI summary and analytics timings (Prometheus text format)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
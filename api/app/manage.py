@@ -0,0 +1,195 @@
+"""
+Operational commands for the GRC-MMAP API.
+
+Usage (from the api/ directory, with DATABASE_URL set):
+    python -m app.manage migrate
+    python -m app.manage rebuild-aggregates
+    python -m app.manage explain-analytics [--seed-rows N]
+    python -m app.manage generate-scan out.csv --rows 100000 [--hosts --titles --nan-rate --seed]
+    python -m app.manage risk-models
+    python -m app.manage rescore [--model new_model.json | --version N] [--chunk-size N]
+"""
+import argparse
+import json
+import sys
+import time
+from sqlalchemy import text
+from .core import database, migrations, models
+from .crud import crud_aggregates, crud_analytics, crud_risk_models
+
+# Tables that grow with ingestion: a sequential scan on these is flagged
+LARGE_TABLES = {"findings", "risks", "finding_control_link", "assets"}
+
+
+def migrate(args):
+    """Creates missing tables and applies pending schema migrations."""
+    models.Base.metadata.create_all(bind=database.engine)
+    applied = migrations.run_migrations(database.engine)
+    db = database.SessionLocal()
+    try:
+        crud_risk_models.seed_risk_models(db)
+        # Migrations may empty the aggregate tables to have them recomputed
+        crud_aggregates.ensure_aggregates(db)
+    finally:
+        db.close()
+    if applied:
+        print("Applied migrations: %s." % ", ".join(map(str, applied)))
+    else:
+        print("Schema is up to date (versions: %s)." % migrations.applied_versions(database.engine))
+
+
+def rebuild_aggregates(args):
+    """Recomputes the dashboard aggregate tables from findings/risks/links."""
+    db = database.SessionLocal()
+    try:
+        crud_aggregates.rebuild_aggregates(db)
+    finally:
+        db.close()
+    print("Dashboard aggregates rebuilt.")
+
+
+def _seed_synthetic_findings(db, rows: int):
+    """Pushes `rows` synthetic scanner rows through the normal ingestion pipeline."""
+    from .data_ingestion.pipeline import BULK_CHUNK_SIZE, ingest_batches
+    from .data_ingestion.synthetic import iter_scan_batches
+
+    batches = iter_scan_batches(rows, hosts=max(rows // 20, 1), batch_size=BULK_CHUNK_SIZE)
+    result = ingest_batches(db, batches, "plancheck")
+    print(f"Seeded {result['count']} synthetic findings ({result['failed_rows']} failed).")
+
+
+def generate_scan(args):
+    """Writes a synthetic scan as CSV, Nessus XML or JSON lines (see app/data_ingestion/synthetic.py)."""
+    from .data_ingestion.synthetic import SCAN_WRITERS
+
+    SCAN_WRITERS[args.format](args.path, args.rows, hosts=args.hosts, titles=args.titles,
+                              nan_rate=args.nan_rate, seed=args.seed)
+    print(f"Wrote {args.rows} rows to {args.path} ({args.format}).")
+
+
+def risk_models(args):
+    """Lists the stored risk model versions and their re-score progress."""
+    db = database.SessionLocal()
+    try:
+        for model in crud_risk_models.list_risk_models(db):
+            progress = f"{model.rescored_rows or 0}/{model.total_rows}" if model.total_rows is not None else "-"
+            print(f"v{model.version:<4} {model.status:<10} {model.name or '':<20} rescored {progress}")
+    finally:
+        db.close()
+
+
+def rescore(args):
+    """Re-scores all risks with a risk model version (registering --model first) and activates it."""
+    db = database.SessionLocal()
+    try:
+        crud_risk_models.seed_risk_models(db)
+        if args.model:
+            with open(args.model) as f:
+                version = crud_risk_models.register_risk_model(db, json.load(f)).version
+            print(f"Registered risk model version {version}.")
+        elif args.version:
+            version = args.version
+        else:
+            # Catch up rows not yet scored by the active version
+            version, _ = crud_risk_models.lock_active_model(db)
+            db.rollback()
+
+        def progress(done: int, total: int):
+            print(f"  {done:,}/{total:,} risks re-scored ({done / max(total, 1):.0%})", flush=True)
+
+        start = time.perf_counter()
+        rewritten = crud_risk_models.rescore(db, version, chunk_size=args.chunk_size, progress=progress)
+    except (ValueError, RuntimeError) as e:
+        print(f"Re-score failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+    print(f"Risk model version {version} is active ({rewritten:,} risks re-scored in {time.perf_counter() - start:.1f}s).")
+
+
+def _seq_scans(plan: dict):
+    """Yields the relation names of all Seq Scan nodes in an EXPLAIN (FORMAT JSON) plan."""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan.get("Relation Name")
+    for child in plan.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+def explain_analytics(args):
+    """EXPLAINs every analytics query and flags sequential scans on large tables."""
+    db = database.SessionLocal()
+    try:
+        if args.seed_rows:
+            _seed_synthetic_findings(db, args.seed_rows)
+            crud_aggregates.rebuild_aggregates(db)
+        for table in sorted(LARGE_TABLES):
+            db.execute(text(f"ANALYZE {table}"))
+        db.commit()
+
+        # 1. Compile each dashboard query to plain SQL
+        queries = {}
+        for name, build in crud_analytics.ANALYTICS_QUERIES.items():
+            statement = build(db).statement
+            queries[name] = str(statement.compile(
+                dialect=database.engine.dialect, compile_kwargs={"literal_binds": True}
+            ))
+
+        # 2. EXPLAIN each one and walk the plan tree
+        flagged = []
+        for name, sql in queries.items():
+            raw = db.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            scans = sorted({rel for rel in _seq_scans(plan) if rel in LARGE_TABLES})
+            status = "SEQ SCAN on " + ", ".join(scans) if scans else "ok"
+            print(f"{name:<24} cost={plan['Total Cost']:<10} {status}")
+            if args.verbose:
+                print(json.dumps(plan, indent=2))
+            if scans:
+                flagged.append(name)
+    finally:
+        db.close()
+
+    if flagged:
+        print(f"{len(flagged)} quer{'y' if len(flagged) == 1 else 'ies'} flagged: {', '.join(flagged)}")
+        sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.manage", description=__doc__.split("\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("migrate", help=migrate.__doc__).set_defaults(func=migrate)
+    commands.add_parser("rebuild-aggregates", help=rebuild_aggregates.__doc__).set_defaults(func=rebuild_aggregates)
+
+    explain = commands.add_parser("explain-analytics", help=explain_analytics.__doc__)
+    explain.add_argument("--seed-rows", type=int, default=0,
+                         help="ingest this many synthetic findings first (use a scratch database)")
+    explain.add_argument("--verbose", action="store_true", help="print the full JSON plans")
+    explain.set_defaults(func=explain_analytics)
+
+    generate = commands.add_parser("generate-scan", help=generate_scan.__doc__)
+    generate.add_argument("path")
+    generate.add_argument("--rows", type=int, default=10_000)
+    generate.add_argument("--hosts", type=int, default=1000, help="distinct IP addresses")
+    generate.add_argument("--titles", type=int, default=200, help="distinct vulnerability titles")
+    generate.add_argument("--nan-rate", type=float, default=0.0, help="fraction of blank cells per column")
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--format", choices=["csv", "nessus", "jsonl"], default="csv")
+    generate.set_defaults(func=generate_scan)
+
+    commands.add_parser("risk-models", help=risk_models.__doc__).set_defaults(func=risk_models)
+
+    rescore_parser = commands.add_parser("rescore", help=rescore.__doc__)
+    target = rescore_parser.add_mutually_exclusive_group()
+    target.add_argument("--model", help="risk model JSON file (risk_model.json format) to register as a new version")
+    target.add_argument("--version", type=int, help="existing version to switch to (default: the active one)")
+    rescore_parser.add_argument("--chunk-size", type=int, default=crud_risk_models.RESCORE_CHUNK_SIZE,
+                                help="risk rows per UPDATE transaction")
+    rescore_parser.set_defaults(func=rescore)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,103 @@
-from jinja2 import Environment, FileSystemLoader
+import os
+import tempfile
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
 from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator
 
-# Set up Jinja2 environment to load templates from the folder
-template_dir = Path(__file__).resolve().parent / "report_templates" 
-env = Environment(loader=FileSystemLoader(template_dir))
+# Set up Jinja2 environment to load templates from the folder.
+# Compiled template bytecode is cached on disk so a fresh worker skips the
+# parse/compile step, and templates are not re-stat'ed on every request
+# (set REPORT_TEMPLATE_RELOAD=1 while editing templates).
+template_dir = Path(__file__).resolve().parent / "report_templates"
+bytecode_dir = os.environ.get("REPORT_BYTECODE_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "grc_jinja_bytecode")
+os.makedirs(bytecode_dir, exist_ok=True)
+env = Environment(
+    loader=FileSystemLoader(template_dir),
+    bytecode_cache=FileSystemBytecodeCache(bytecode_dir),
+    auto_reload=os.environ.get("REPORT_TEMPLATE_RELOAD") == "1",
+    autoescape=select_autoescape(["html"]),
+)
+
+# Generated reports are cached as files keyed on the data generation
+REPORT_CACHE_DIR = os.environ.get("REPORT_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "grc_reports")
+
+# Streamed output is coalesced into writes of roughly this many bytes
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+def _report_context(dashboard_data: dict) -> Dict[str, Any]:
+    return {
+        "report_title": "Project GRC-MMAP Executive Summary",
+        "generation_date": dashboard_data['finding_trend'][-1]['date'] if dashboard_data['finding_trend'] else 'N/A',
+        "data": dashboard_data,
+    }
 
 def generate_executive_report(dashboard_data: dict) -> str:
     """Renders the executive report HTML using dashboard analytics data."""
     template = env.get_template("executive.html")
-    
+
     # Render the template with the data
-    html_output = template.render(
-        report_title="Project GRC-MMAP Executive Summary",
-        generation_date=dashboard_data['finding_trend'][-1]['date'] if dashboard_data['finding_trend'] else 'N/A',
-        data=dashboard_data
-    )
-    return html_output
\ No newline at end of file
+    html_output = template.render(**_report_context(dashboard_data))
+    return html_output
+
+def stream_full_report(dashboard_data: dict, findings: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """
+    Renders the full-detail report incrementally (Jinja generate()), pulling finding
+    rows from `findings` as it goes. Yields UTF-8 chunks of ~STREAM_BUFFER_SIZE bytes.
+    """
+    template = env.get_template("full_detail.html")
+    context = _report_context(dashboard_data)
+    context["report_title"] = "Project GRC-MMAP Full Detail Report"
+
+    buffer, size = [], 0
+    for piece in template.generate(findings=findings, **context):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= STREAM_BUFFER_SIZE:
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+# --- Report artifact cache ---
+
+def cached_report_path(name: str, generation: int) -> Path:
+    """Where the rendered `name` report for a data generation is (or will be) stored."""
+    return Path(REPORT_CACHE_DIR) / f"{name}-g{generation}.html"
+
+def iter_cached_report(path: Path) -> Iterator[bytes]:
+    """Streams a cached report file in STREAM_BUFFER_SIZE chunks."""
+    with open(path, "rb") as f:
+        while chunk := f.read(STREAM_BUFFER_SIZE):
+            yield chunk
+
+def tee_to_cache(chunks: Iterable[bytes], path: Path) -> Iterator[bytes]:
+    """
+    Passes chunks through while writing them to a temp file, which becomes the cached
+    artifact (atomic rename) only if rendering completes. Older generations of the
+    same report are removed afterwards.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".partial")
+    completed = False
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in chunks:
+                out.write(chunk)
+                yield chunk
+        os.replace(tmp_path, path)
+        completed = True
+    finally:
+        if not completed and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    name = path.name.rsplit("-g", 1)[0]
+    for old in path.parent.glob(f"{name}-g*.html"):
+        if old != path:
+            old.unlink(missing_ok=True)
+
+def save_cached_report(path: Path, content: bytes):
+    """Stores an already-rendered report as the cached artifact for its generation."""
+    for _ in tee_to_cache([content], path):
+        pass
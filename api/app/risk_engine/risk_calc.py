@@ -1,53 +1,111 @@
-from typing import Dict, Any
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, Optional, Sequence
+import numpy as np
 from ..core.schemas import FindingCreate, RiskCreate
 
+# The likelihood/impact matrix and rating bands live in a JSON file so they can be
+# tuned without a code change. Point RISK_MODEL_PATH at another file to override.
+# The file seeds version 1 of the risk models stored in the database; later tuning
+# is registered as a new version and applied to existing risks with
+# `python -m app.manage rescore --model file.json` (see crud/crud_risk_models.py).
+DEFAULT_RISK_MODEL_PATH = Path(__file__).resolve().parent / "risk_model.json"
 
-LIKELIHOOD_MAP = {
-    "Critical": 5,
-    "High": 4,
-    "Medium": 3,
-    "Low": 1,
-}
 
+class RiskMatrix:
+    """
+    Compiled form of a risk model definition (see risk_model.json).
+    Severities are turned into lookup arrays once, so scoring a batch is a handful
+    of NumPy operations instead of a dict lookup + if/elif chain per finding.
+    """
+
+    def __init__(self, definition: Dict[str, Any]):
+        self.definition = definition
+        self.name = definition.get("name", "default")
+        self.likelihood_map = dict(definition["likelihood"])
+        self.impact_map = dict(definition["impact"])
+
+        # Sorted severity labels -> index, with one extra slot at the end for "unknown"
+        self.labels = np.array(sorted(set(self.likelihood_map) | set(self.impact_map)))
+        self.likelihood = np.array(
+            [self.likelihood_map.get(s, definition["default_likelihood"]) for s in self.labels]
+            + [definition["default_likelihood"]], dtype=np.float64
+        )
+        self.impact = np.array(
+            [self.impact_map.get(s, definition["default_impact"]) for s in self.labels]
+            + [definition["default_impact"]], dtype=np.float64
+        )
+
+        # Rating bands sorted by ascending threshold for np.searchsorted
+        bands = sorted(definition["rating_bands"], key=lambda b: b["min_score"])
+        self.band_thresholds = np.array([b["min_score"] for b in bands], dtype=np.float64)
+        self.band_ratings = np.array([b["rating"] for b in bands], dtype=object)
+
+    def severity_index(self, severities: Sequence[str]) -> np.ndarray:
+        """Maps severity labels to row indices of the lookup arrays (unknown -> last slot)."""
+        values = np.asarray(severities, dtype=str)
+        idx = np.searchsorted(self.labels, values)
+        idx = np.minimum(idx, len(self.labels) - 1)
+        known = self.labels[idx] == values
+        return np.where(known, idx, len(self.labels))
+
+    def rate(self, scores: np.ndarray) -> np.ndarray:
+        """Assigns the rating band for each score (highest band whose min_score <= score)."""
+        band = np.searchsorted(self.band_thresholds, scores, side="right") - 1
+        return self.band_ratings[np.maximum(band, 0)]
+
+    def score_matrix(self, likelihood: np.ndarray, impact: np.ndarray) -> Dict[str, np.ndarray]:
+        """Scores explicit likelihood/impact arrays; returns columns ready for bulk insert."""
+        likelihood = np.asarray(likelihood, dtype=np.float64)
+        impact = np.asarray(impact, dtype=np.float64)
+        inherent_score = likelihood * impact
+        return {
+            "inherent_score": inherent_score,
+            "risk_rating": self.rate(inherent_score),
+            "cia_confidentiality": impact,
+            "cia_integrity": impact,
+            "cia_availability": impact,
+        }
+
+    def score_severities(self, severities: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Scores an array of normalized severities in one vectorized pass."""
+        idx = self.severity_index(severities)
+        return self.score_matrix(self.likelihood[idx], self.impact[idx])
+
+
+def load_risk_matrix(path: Optional[str] = None) -> RiskMatrix:
+    """Loads and compiles a risk model definition (defaults to RISK_MODEL_PATH / risk_model.json)."""
+    path = path or os.environ.get("RISK_MODEL_PATH") or DEFAULT_RISK_MODEL_PATH
+    with open(path) as f:
+        return RiskMatrix(json.load(f))
 
-IMPACT_MAP = {
-    "Critical": 5, 
-    "High": 4, 
-    "Medium": 3,
-    "Low": 2, 
-}
+
+RISK_MATRIX = load_risk_matrix()
+
+# Kept for callers that read the raw maps directly
+LIKELIHOOD_MAP = RISK_MATRIX.likelihood_map
+IMPACT_MAP = RISK_MATRIX.impact_map
+
+
+def calculate_risk_batch(severities: Sequence[str], matrix: Optional[RiskMatrix] = None) -> Dict[str, np.ndarray]:
+    """
+    Batch version of calculate_risk: scores an array of normalized severities and
+    returns columnar results (one NumPy array per Risk column).
+    """
+    return (matrix or RISK_MATRIX).score_severities(severities)
+
+def score_severity(normalized_severity: str) -> RiskCreate:
+    """
+    Calculates the inherent risk score (Likelihood x Impact) for a severity
+    and assigns basic CIA mapping.
+    """
+    scored = calculate_risk_batch([normalized_severity])
+    return RiskCreate(**{column: values.tolist()[0] for column, values in scored.items()})
 
 def calculate_risk(finding: FindingCreate) -> RiskCreate:
     """
     Calculates the inherent risk score (Likelihood x Impact) for a finding
     and assigns basic CIA mapping.
     """
-    
-    likelihood = LIKELIHOOD_MAP.get(finding.normalized_severity, 1)
-
-    
-    impact = IMPACT_MAP.get(finding.normalized_severity, 2)
-    
-    
-    inherent_score = float(likelihood * impact)
-
-    
-    if inherent_score >= 21:
-        risk_rating = "Critical"
-    elif inherent_score >= 13:
-        risk_rating = "High"
-    elif inherent_score >= 7:
-        risk_rating = "Medium"
-    else:
-        risk_rating = "Low"
-
-    
-    cia_score = impact
-    
-    return RiskCreate(
-        inherent_score=inherent_score,
-        risk_rating=risk_rating,
-        cia_confidentiality=cia_score,
-        cia_integrity=cia_score,
-        cia_availability=cia_score,
-    )
\ No newline at end of file
+    return score_severity(finding.normalized_severity)
@@ -0,0 +1,249 @@
+"""
+Background AI summary generation, off the request path.
+
+Findings are persisted pointing at a shared ai_summaries row (see
+crud_summaries); rows created with status='pending' are handed to SUMMARY_WORKER. A fixed number of asyncio worker tasks (the concurrency limit)
+call the chat completions endpoint with the async OpenAI client, retrying with
+exponential backoff and a per-call timeout, and a flusher task writes finished
+summaries back in batched UPDATEs. Rows left 'failed' once retries run out are
+queued again after a cooldown, up to a cap (crud_summaries.retryable_failed).
+
+The client honours OPENAI_BASE_URL, so the pool can be pointed at a local stub
+HTTP server that implements POST /chat/completions (tests/openai_stub.py; see
+tests/test_summary_worker.py for the timeout, retry and concurrency cases).
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy import or_, update
+from ..core import models
+from ..core.database import SessionLocal
+from ..core.generation import mark_data_changed
+from ..core.metrics import AI_SUMMARY_SECONDS
+from ..crud.crud_summaries import SUMMARY_RETRY_COOLDOWN, retryable_failed
+from . import ai_utils
+
+SUMMARY_CONCURRENCY = int(os.environ.get("AI_SUMMARY_CONCURRENCY", "4"))
+SUMMARY_TIMEOUT = float(os.environ.get("AI_SUMMARY_TIMEOUT", "30"))
+SUMMARY_MAX_RETRIES = int(os.environ.get("AI_SUMMARY_MAX_RETRIES", "3"))
+SUMMARY_BACKOFF = float(os.environ.get("AI_SUMMARY_BACKOFF", "1.0"))
+
+logger = logging.getLogger(__name__)
+
+# Finished summaries are written back in batches of up to this many rows,
+# or every FLUSH_INTERVAL seconds, whichever comes first.
+FLUSH_BATCH_SIZE = 200
+FLUSH_INTERVAL = 0.5
+
+# (ai_summaries.id, prompt inputs)
+SummaryJob = Tuple[int, Dict[str, Any]]
+
+
+class SummaryWorkerPool:
+    """Concurrency-limited pool of async summary workers bound to one event loop."""
+
+    def __init__(self, concurrency: int, timeout: float, max_retries: int, backoff: float):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._results: List[Dict[str, Any]] = []
+        self._tasks: List[asyncio.Task] = []
+        self._client = None
+        # Summary ids queued or in flight, so re-submitting the same row is a no-op
+        self._queued: Set[int] = set()
+        self._queued_lock = threading.Lock()
+        # One flush at a time (a cancelled flusher's thread may still be writing during stop())
+        self._flush_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    async def start(self):
+        """Spawns the workers, the flusher and the retry sweep on the running loop, then re-queues pending rows."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._flusher()))
+        self._tasks.append(asyncio.create_task(self._retrier()))
+        await asyncio.to_thread(self.requeue_pending)
+
+    async def stop(self):
+        """Cancels the workers and writes out whatever has already finished."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while self._results:
+            try:
+                await asyncio.to_thread(self._flush)
+            except Exception:
+                # The rows stay 'pending' in the database and are re-queued on next start
+                logger.exception("Could not write %d finished summaries on shutdown", len(self._results))
+                break
+        self._loop = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    def submit(self, jobs: List[SummaryJob]):
+        """
+        Queues (summary_id, prompt inputs) pairs. Safe to call from any thread
+        (e.g. sync request handlers or ingestion workers). If the pool is not
+        running the rows simply stay 'pending' and are picked up on next start.
+        """
+        if not jobs or self._loop is None:
+            return
+        with self._queued_lock:
+            accepted = []
+            for job in jobs:
+                if job[0] not in self._queued:
+                    self._queued.add(job[0])
+                    accepted.append(job)
+        jobs = accepted
+        for job in jobs:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+
+    def _get_client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+            # Retries are handled here (with backoff), not by the client
+            self._client = AsyncOpenAI(timeout=self.timeout, max_retries=0)
+        return self._client
+
+    async def _summarize(self, finding_data: Dict[str, Any]) -> Tuple[str, str]:
+        """Returns (summary, status) after up to max_retries retries."""
+        if ai_utils.is_dummy_key():
+            return ai_utils.dummy_summary(finding_data), "done"
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await asyncio.wait_for(
+                    self._get_client().chat.completions.create(
+                        model=ai_utils.SUMMARY_MODEL,
+                        messages=ai_utils.build_summary_messages(finding_data),
+                        max_tokens=150,
+                    ),
+                    timeout=self.timeout,
+                )
+                return response.choices[0].message.content.strip(), "done"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.warning("OpenAI API error (giving up after %d attempts): %s", attempt + 1, e)
+                    break
+                # Exponential backoff with jitter
+                await asyncio.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+        return ai_utils.SUMMARY_UNAVAILABLE, "failed"
+
+    async def _worker(self):
+        while True:
+            summary_id, finding_data = await self._queue.get()
+            try:
+                start = time.perf_counter()
+                summary, status = await self._summarize(finding_data)
+                AI_SUMMARY_SECONDS.observe(time.perf_counter() - start, status)
+                self._results.append({"id": summary_id, "summary": summary, "status": status})
+            finally:
+                with self._queued_lock:
+                    self._queued.discard(summary_id)
+                self._queue.task_done()
+
+    async def _flusher(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                while self._results:
+                    await asyncio.to_thread(self._flush)
+            except Exception:
+                # Unwritten rows stay in _results: retried on the next tick
+                logger.exception("Writing finished summaries failed; retrying in %ss", FLUSH_INTERVAL)
+
+    async def _retrier(self):
+        # Failed rows whose findings are not re-ingested would otherwise wait for a restart
+        interval = max(SUMMARY_RETRY_COOLDOWN, FLUSH_INTERVAL)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.requeue_pending)
+            except Exception:
+                logger.exception("Re-queueing pending summaries failed; retrying in %ss", interval)
+
+    def _flush(self):
+        """
+        Writes up to FLUSH_BATCH_SIZE finished summaries with one bulk UPDATE by primary
+        key and advances the data generation. The batch leaves _results only once the
+        commit succeeded; on error the session is rolled back and the error raised.
+        """
+        with self._flush_lock:
+            self._flush_batch()
+
+    def _flush_batch(self):
+        batch = self._results[:FLUSH_BATCH_SIZE]
+        if not batch:
+            return
+        failed = [row["id"] for row in batch if row["status"] == "failed"]
+        db = SessionLocal()
+        try:
+            db.execute(update(models.AISummary), batch)
+            if failed:
+                # Retry bookkeeping (see crud_summaries.retryable_failed)
+                db.execute(
+                    update(models.AISummary).where(models.AISummary.id.in_(failed))
+                    .values(failures=models.AISummary.failures + 1, failed_at=datetime.utcnow())
+                )
+            # Cached reports and dashboard responses must pick up the filled-in summaries
+            mark_data_changed(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        # Workers only append and flushes are serialized: the batch is still the head
+        del self._results[:len(batch)]
+
+    def requeue_pending(self):
+        """
+        Re-submits every summary still 'pending' in the database (rows left over by a
+        previous process, e.g. after a restart, or written by an ingestion worker
+        process that has no access to this pool) and every 'failed' one due for a
+        retry. Already-queued rows are skipped.
+        """
+        db = SessionLocal()
+        try:
+            pending = (
+                db.query(
+                    models.AISummary.id, models.AISummary.normalized_title,
+                    models.AISummary.normalized_severity, models.AISummary.control_context,
+                )
+                .filter(or_(models.AISummary.status == "pending", retryable_failed()))
+                .yield_per(1000)
+            )
+            self.submit([
+                (summary_id, {
+                    'normalized_title': title,
+                    'normalized_severity': severity,
+                    'control_context': control_context,
+                })
+                for summary_id, title, severity, control_context in pending
+            ])
+        finally:
+            db.close()
+
+
+SUMMARY_WORKER = SummaryWorkerPool(
+    concurrency=SUMMARY_CONCURRENCY,
+    timeout=SUMMARY_TIMEOUT,
+    max_retries=SUMMARY_MAX_RETRIES,
+    backoff=SUMMARY_BACKOFF,
+)
@@ -1,35 +1,131 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from ..core.database import get_db
-from ..crud import crud_analytics
+from ..core.database import run_read
+from ..core.response_cache import cached_json_response
+from ..crud import crud_aggregates, crud_analytics, crud_risk_models
 
 router = APIRouter(
     prefix="/dashboard",
     tags=["Analytics & Reporting"],
 )
 
-@router.get("/summary")
-def get_dashboard_summary(db: Session = Depends(get_db)):
-    """Provides high-level counts for risk and control status cards."""
-    risks_by_rating = crud_analytics.get_risks_by_rating(db)
-    control_maturity = crud_analytics.get_control_maturity_status(db)
-    finding_trend = crud_analytics.get_finding_trend(db)
-
-    # Convert SQLAlchemy result tuples to dictionaries for clean JSON output
-    risks = [{"rating": r[0], "count": r[1]} for r in risks_by_rating]
-    maturity = [{"control_name": c[0], "finding_count": c[1]} for c in control_maturity]
-    # Note: func.date returns a datetime.date object; convert to string for JSON
-    trend = [{"date": t[0].strftime('%Y-%m-%d'), "count": t[1]} for t in finding_trend]
+GRANULARITY_PATTERN = "^(" + "|".join(crud_aggregates.TREND_GRANULARITIES) + ")$"
+
+# Each slice is computed on its own so endpoints only pay for what they return.
+# Convert SQLAlchemy result tuples to dictionaries for clean JSON output.
+
+def risks_by_rating(db: Session):
+    return [{"rating": r[0], "count": r[1]} for r in crud_analytics.get_risks_by_rating(db)]
+
+def control_maturity(db: Session):
+    return [{"control_name": c[0], "finding_count": c[1]} for c in crud_analytics.get_control_maturity_status(db)]
 
+def finding_trend(db: Session, granularity: str = "day", date_from: Optional[date] = None, date_to: Optional[date] = None):
+    # Note: the trend date is a datetime.date object; convert to string for JSON
+    return [
+        {"date": t[0].strftime('%Y-%m-%d'), "count": t[1]}
+        for t in crud_analytics.get_finding_trend(db, granularity, date_from, date_to)
+    ]
+
+def finding_trend_breakdown(db: Session, granularity: str, date_from: Optional[date], date_to: Optional[date],
+                            severity: Optional[str], source: Optional[str]):
+    buckets = {}
+    for day, bucket_severity, bucket_source, count in crud_analytics.get_finding_trend_breakdown(
+        db, granularity, date_from, date_to, severity, source
+    ):
+        bucket = buckets.setdefault(day, {"date": day.strftime('%Y-%m-%d'), "count": 0, "by_severity": {}, "by_source": {}})
+        bucket["count"] += count
+        bucket["by_severity"][bucket_severity] = bucket["by_severity"].get(bucket_severity, 0) + count
+        bucket["by_source"][bucket_source] = bucket["by_source"].get(bucket_source, 0) + count
+    return list(buckets.values())
+
+def build_dashboard_summary(db: Session, granularity: str = "day",
+                            date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """Assembles the full summary payload (also used by report generation)."""
     return {
-        "risks_by_rating": risks,
-        "control_maturity": maturity,
-        "finding_trend": trend,
+        "risks_by_rating": risks_by_rating(db),
+        "control_maturity": control_maturity(db),
+        "finding_trend": finding_trend(db, granularity, date_from, date_to),
     }
 
-# Endpoint for the Compliance Heatmap (reusing data)
+def framework_heatmap(db: Session, framework: str):
+    heatmap = crud_analytics.get_framework_heatmap(db, framework)
+    if heatmap is None:
+        raise HTTPException(status_code=404, detail=f"Unknown framework '{framework}'.")
+    return heatmap
+
+def _check_range(date_from: Optional[date], date_to: Optional[date]):
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'.")
+
+# Read endpoints go through run_read: a sync session on the threadpool, or the
+# async engine when DB_ASYNC_READS is enabled (see core.database).
+
+@router.get("/summary")
+async def get_dashboard_summary(
+    request: Request,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    granularity: str = Query("day", pattern=GRANULARITY_PATTERN),
+):
+    """
+    Provides high-level counts for risk and control status cards. `from`/`to`
+    (inclusive dates) and `granularity` (day/week/month) shape the finding trend;
+    the rating and control counts always describe the current open findings.
+    """
+    _check_range(date_from, date_to)
+    return await run_read(lambda db: cached_json_response(
+        request, db, lambda: build_dashboard_summary(db, granularity, date_from, date_to)
+    ))
+
+@router.get("/trend")
+async def get_finding_trend(
+    request: Request,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    granularity: str = Query("day", pattern=GRANULARITY_PATTERN),
+    severity: Optional[str] = None,
+    source: Optional[str] = None,
+):
+    """
+    New findings per day, week (starting Monday) or month, each bucket broken down
+    by normalized severity and source. Served from the trend rollup, so years of
+    history cost the same as a week of it.
+    """
+    _check_range(date_from, date_to)
+    return await run_read(lambda db: cached_json_response(
+        request, db, lambda: finding_trend_breakdown(db, granularity, date_from, date_to, severity, source)
+    ))
+
+@router.get("/risk-models")
+async def get_risk_models():
+    """
+    Risk model versions: the active one (which the risk counts describe) and the
+    progress of any re-score in flight (`python -m app.manage rescore`). Not cached:
+    progress advances without changing the dashboard data.
+    """
+    return await run_read(lambda db: [
+        crud_risk_models.risk_model_to_dict(m) for m in crud_risk_models.list_risk_models(db)
+    ])
+
+# Endpoint for the Compliance Heatmap
 @router.get("/compliance/status")
-def get_compliance_status(db: Session = Depends(get_db)):
+async def get_compliance_status(request: Request):
     """Pulls detailed control status showing compliance gaps."""
-    # Reusing the summary function for simplicity for now
-    return get_dashboard_summary(db).get('control_maturity')
\ No newline at end of file
+    return await run_read(lambda db: cached_json_response(request, db, lambda: control_maturity(db)))
+
+@router.get("/compliance/frameworks")
+async def get_compliance_frameworks(request: Request):
+    """Frameworks available for per-framework heatmaps, with their control counts."""
+    return await run_read(lambda db: cached_json_response(request, db, lambda: crud_analytics.list_frameworks(db)))
+
+# Per-framework heatmap (declared after the fixed /compliance/* paths)
+@router.get("/compliance/{framework}")
+async def get_framework_compliance(framework: str, request: Request):
+    """
+    Open findings per control of one framework (e.g. 'NIST 800-53' or 'nist-800-53'),
+    each control broken down by severity, in the framework's reference order.
+    """
+    return await run_read(lambda db: cached_json_response(request, db, lambda: framework_heatmap(db, framework)))
@@ -1,95 +1,142 @@
-from fastapi import APIRouter, UploadFile, File, Depends
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-import pandas as pd
-from io import StringIO
-from typing import List # Required for List[...] type hints
-from ..core import schemas # Required to reference schemas.Finding
-from ..core.database import get_db
-from ..data_ingestion.normalization import normalize_finding
-from ..crud import crud_findings 
-from ..risk_engine.risk_calc import calculate_risk
-from ..core.schemas import FindingCreate, RiskCreate # Required for type hints
-from ..crud import crud_compliance
-from ..risk_engine.ai_utils import generate_audit_summary # <--- NEW IMPORT
+from starlette.concurrency import run_in_threadpool
+from ..core.database import get_db, run_read, SessionLocal
+from ..core import models
+from ..crud import crud_evidence, crud_findings, crud_jobs, crud_reports
+from ..data_ingestion import jobs
+from .. import findings_export
 
 router = APIRouter(
     prefix="/findings",
     tags=["Findings Ingestion & Management"],
 )
 
-@router.post("/upload_csv/{source_name}")
-async def upload_findings_csv(
+# Size of the reads used to spool an upload to disk
+UPLOAD_READ_SIZE = 1024 * 1024
+
+def _findings_page(db: Session, **filters):
+    rows, next_cursor = crud_findings.list_findings(db, **filters)
+    return [crud_findings.finding_to_dict(f) for f in rows], next_cursor
+
+@router.get("")
+async def list_findings(
+    limit: int = Query(crud_findings.DEFAULT_PAGE_SIZE, ge=1, le=crud_findings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    severity: Optional[str] = None,
+    risk_rating: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    source: Optional[str] = None,
+    control_id: Optional[int] = None,
+    status: Optional[str] = Query(None, pattern="^(open|closed)$"),
+):
+    """
+    Browses stored findings, newest first. Pass the returned `next_cursor` as
+    `cursor` to get the following page (keyset pagination: deep pages cost the
+    same as the first one).
+    """
+    try:
+        items, next_cursor = await run_read(lambda db: _findings_page(
+            db, limit=limit, cursor=cursor, severity=severity, risk_rating=risk_rating,
+            ip_address=ip_address, source_type=source, control_id=control_id, status=status,
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+def _export_rows(encoder):
+    # The streamed body outlives the request-scoped session, so the
+    # server-side cursor gets a session of its own.
+    db = SessionLocal()
+    try:
+        yield from encoder(
+            crud_reports.findings_detail_columns(), crud_reports.iter_findings_detail_batches(db)
+        )
+    finally:
+        db.close()
+
+@router.get("/export", response_class=StreamingResponse)
+def export_findings(format: str = Query("csv", pattern="^(csv|ndjson|parquet)$")):
+    """
+    Streams every finding joined with its asset, risk, summary and mapped controls
+    as CSV, NDJSON or Parquet. Rows are encoded batch by batch straight off a
+    server-side cursor, so memory stays flat regardless of table size.
+    Parquet needs pyarrow (in requirements.txt); without it that format answers 501.
+    """
+    if format == "parquet" and not findings_export.parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires the 'pyarrow' package.")
+
+    media_type, extension, encoder = findings_export.EXPORT_FORMATS[format]
+    return StreamingResponse(
+        _export_rows(encoder),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="findings.{extension}"'},
+    )
+
+@router.post("/upload/{source_name}", status_code=202)
+@router.post("/upload_csv/{source_name}", status_code=202)
+async def upload_findings_file(
     source_name: str, 
     file: UploadFile = File(...), 
+    full_scan: bool = True,
+    format: Optional[str] = Query(None, pattern="^(csv|nessus|jsonl)$"),
     db: Session = Depends(get_db)
 ):
     """
-    Ingests audit data from a CSV file, normalizes it, calculates risk, and saves it to the database.
+    Queues a scan file for ingestion and returns a job id immediately.
+    Accepts the flat Raw_* CSV, Nessus v2 XML (.nessus) and line-delimited JSON;
+    `format` overrides detection (by source name, then by file content). Native
+    formats are parsed incrementally, never converted to CSV first.
+    A background ingestion worker normalizes the rows, calculates risk and saves
+    them in bulk (one transaction per chunk); poll GET /findings/jobs/{job_id}
+    for progress, throughput and per-row/per-chunk errors.
+    Findings already stored (same asset, title and source) are updated in place
+    rather than duplicated. With `full_scan` (default), open findings of this source
+    that the file no longer contains are closed; pass full_scan=false for partial scans.
     """
-    # 1. Read the file content
-    content = await file.read()
-    
-    # 2. Use Pandas to read the CSV content
-    df = pd.read_csv(StringIO(content.decode('utf-8')))
-    
-    saved_findings: List[schemas.Finding] = []
-    final_mapped_controls_preview = [] 
+    # 1. Register the job (the INSERT and commit run off the event loop)
+    db_job = await run_in_threadpool(crud_jobs.create_job, db, source_name, file.filename)
 
-    # 3. Process, Normalize, and PERSIST each row (THE SINGLE, CORRECT LOOP)
-    for index, row in df.iterrows():
-        raw_data_dict = row.to_dict()
-        
-        # 1. Normalize
-        normalized_data = normalize_finding(raw_data_dict, source_name)
-        
-        # 2. CRUD: Create Asset (or get existing one)
-        asset = crud_findings.create_asset_if_not_exists(db, normalized_data)
-        
-        # 3. CRUD: Create Finding (linked to Asset)
-        finding = crud_findings.create_finding(db, normalized_data, asset_id=asset.id)
-        
-        # 4. RISK ENGINE CALCULATION
-        risk_data: RiskCreate = calculate_risk(normalized_data)
-        
-        # 5. CRUD: Persist Risk
-        crud_findings.create_risk(db, risk_data, finding_id=finding.id)
-        
-        # --- 6. AI SUMMARY GENERATION (NEW STEP) ---
-        summary_input = {
-            'normalized_title': normalized_data.normalized_title,
-            'normalized_severity': normalized_data.normalized_severity,
-            'ip_address': normalized_data.ip_address,
-        }
-        
-        # Call the AI model
-        ai_summary = generate_audit_summary(summary_input)
-        
-        # Update the finding object in the DB and persist the summary
-        finding.summary = ai_summary
-        db.add(finding)
-        db.commit() # Commit the summary update (this is safe after the main commits)
-        db.refresh(finding)
-        # ------------------------------------------
-        
-        # 7. COMPLIANCE MAPPING
-        mapped_controls = crud_compliance.map_finding_to_controls(
-            db, finding_id=finding.id, finding_title=finding.normalized_title
-        )
+    # 2. Spool the upload to a file the worker owns (streamed, never fully in memory;
+    #    creating, opening and writing it happen on the threadpool too)
+    path = await run_in_threadpool(jobs.spool_path, db_job.id)
+    out = await run_in_threadpool(open, path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_READ_SIZE):
+            await run_in_threadpool(out.write, chunk)
+    finally:
+        await run_in_threadpool(out.close)
+
+    # 3. Hand it to the ingestion pool
+    jobs.submit_job(db_job.id, path, source_name, full_scan, format)
 
-        # CRITICAL: Store the mapped controls for the first finding ONLY for the JSON preview
-        if index == 0: 
-            final_mapped_controls_preview = [
-                {"control_id": c.id, "control_name": c.control_name} 
-                for c in mapped_controls
-            ]
-            
-        saved_findings.append(finding) 
-        
-    # 4. FINAL RETURN (OUTSIDE the loop)
     return {
-        "status": "Success! Full GRC Pipeline Complete (Risk & Mapping).",
+        "status": "Queued",
+        "job_id": db_job.id,
         "source": source_name,
-        "count": len(saved_findings),
-        "preview_finding_id": saved_findings[0].id if saved_findings else None,
-        "mapped_controls_preview": final_mapped_controls_preview 
-    }
\ No newline at end of file
+        "status_url": f"/findings/jobs/{db_job.id}",
+    }
+
+def _finding_evidence(db: Session, finding_id: int):
+    finding = db.get(models.Finding, finding_id)
+    if finding is None:
+        return None
+    return {"finding_id": finding_id, "evidence": crud_evidence.expand_evidence(db, finding)}
+
+@router.get("/{finding_id}/evidence")
+async def get_finding_evidence(finding_id: int):
+    """Returns the finding's original scanner row (rebuilt from compact storage, decompressed on demand)."""
+    evidence = await run_read(lambda db: _finding_evidence(db, finding_id))
+    if evidence is None:
+        raise HTTPException(status_code=404, detail="Finding not found.")
+    return evidence
+
+@router.get("/jobs/{job_id}")
+def get_ingestion_job(job_id: str, db: Session = Depends(get_db)):
+    """Reports an ingestion job's stage, rows processed, throughput and errors."""
+    db_job = crud_jobs.get_job(db, job_id)
+    if not db_job:
+        raise HTTPException(status_code=404, detail="Ingestion job not found.")
+    return crud_jobs.job_to_dict(db_job)
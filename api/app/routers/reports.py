@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
-from ..core.database import get_db
-from ..report_generator import generate_executive_report
-from .dashboard import get_dashboard_summary # Reuse data endpoint
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import HTMLResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from ..core.database import run_read, SessionLocal
+from ..core.generation import current_generation
+from ..crud import crud_reports
+from ..report_generator import (
+    generate_executive_report, stream_full_report,
+    cached_report_path, iter_cached_report, save_cached_report, tee_to_cache,
+)
+from .dashboard import build_dashboard_summary # Reuse data endpoint
 
 router = APIRouter(
     prefix="/reports",
@@ -12,18 +17,23 @@ router = APIRouter(
 
 # In api/app/routers/reports.py:
 @router.get("/generate/executive", response_class=HTMLResponse)
-def generate_executive_report_endpoint(db: Session = Depends(get_db)):
+async def generate_executive_report_endpoint():
     """Triggers report generation and returns the HTML output."""
     
-    # 1. Get all required dashboard data
-    dashboard_data = get_dashboard_summary(db)
+    # 1. Serve the cached artifact if the data has not changed since it was rendered
+    path = cached_report_path("executive", await run_read(current_generation))
+    if path.exists():
+        return HTMLResponse(await run_in_threadpool(path.read_bytes))
+
+    # 2. Get all required dashboard data
+    dashboard_data = await run_read(build_dashboard_summary)
 
     if not dashboard_data['risks_by_rating']:
         raise HTTPException(status_code=404, detail="No data found to generate report.")
 
     try:
-        # 2. Generate HTML Report (THIS IS THE LINE THAT CRASHES)
-        html_content = generate_executive_report(dashboard_data)
+        # 3. Generate HTML Report
+        html_content = await run_in_threadpool(generate_executive_report, dashboard_data)
         
     except Exception as e:
         # CRASH PROTECTION: Return a detailed error page showing the exception message.
@@ -34,5 +44,36 @@ def generate_executive_report_endpoint(db: Session = Depends(get_db)):
         )
         return HTMLResponse(error_message, status_code=500)
 
-    # If successful, return the report
-    return html_content
\ No newline at end of file
+    # If successful, cache and return the report
+    await run_in_threadpool(save_cached_report, path, html_content.encode("utf-8"))
+    return html_content
+
+def _render_full_report(dashboard_data: dict):
+    # The request-scoped session is closed before a streamed body is sent,
+    # so the server-side cursor gets a session of its own.
+    db = SessionLocal()
+    try:
+        yield from stream_full_report(dashboard_data, crud_reports.iter_findings_detail(db))
+    finally:
+        db.close()
+
+@router.get("/generate/full", response_class=StreamingResponse)
+async def generate_full_report_endpoint():
+    """
+    Streams the full-detail report (every finding with its asset, risk, summary and
+    mapped controls). Rows are rendered as they come off a server-side cursor, so
+    the first bytes arrive immediately and memory stays bounded; the finished
+    report is cached until the next ingestion changes the data.
+    """
+    path = cached_report_path("full_detail", await run_read(current_generation))
+    if path.exists():
+        return StreamingResponse(iter_cached_report(path), media_type="text/html")
+
+    dashboard_data = await run_read(build_dashboard_summary)
+    if not dashboard_data['risks_by_rating']:
+        raise HTTPException(status_code=404, detail="No data found to generate report.")
+
+    return StreamingResponse(
+        tee_to_cache(_render_full_report(dashboard_data), path),
+        media_type="text/html",
+    )
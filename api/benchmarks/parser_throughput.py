@@ -0,0 +1,59 @@
+"""
+Reader throughput per upload format (CSV, Nessus XML, JSON lines).
+
+Writes the same synthetic scan in every format to a temporary directory, then
+times each reader alone (parse) and reader + normalize_dataframe (parse+normalize),
+reporting rows/s, MB/s and peak RSS growth. No database is needed:
+    cd api
+    python -m benchmarks.parser_throughput --rows 200000
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_format(fmt: str, path: str, normalize: bool, batch_size: int) -> dict:
+    from app.data_ingestion.normalization import normalize_dataframe
+    from app.data_ingestion.readers import READERS
+
+    rows = 0
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        for chunk in READERS[fmt](f, batch_size):
+            rows += len(chunk)
+            if normalize:
+                normalize_dataframe(chunk, "benchmark")
+    seconds = time.perf_counter() - start
+    return {"rows": rows, "seconds": seconds, "mb_per_s": os.path.getsize(path) / 1e6 / seconds}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.parser_throughput", description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--hosts", type=int, default=0, help="distinct hosts (default rows/20)")
+    parser.add_argument("--titles", type=int, default=200)
+    parser.add_argument("--formats", default="csv,nessus,jsonl")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per chunk (pipeline.BULK_CHUNK_SIZE)")
+    args = parser.parse_args(argv)
+    os.environ.setdefault("OPENAI_API_KEY", "SK-DUMMYKEYFORSTARTUP")
+
+    from app.data_ingestion.synthetic import SCAN_WRITERS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'format':<8} {'stage':<16} {'file MB':>8} {'seconds':>9} {'rows/s':>11} {'MB/s':>7} {'peak RSS MB':>12}")
+        for fmt in args.formats.split(","):
+            path = os.path.join(tmp, f"scan.{fmt}")
+            SCAN_WRITERS[fmt](path, args.rows, hosts=args.hosts or max(args.rows // 20, 1), titles=args.titles)
+            size_mb = os.path.getsize(path) / 1e6
+            for stage, normalize in (("parse", False), ("parse+normalize", True)):
+                r = run_format(fmt, path, normalize, args.batch_size)
+                print(f"{fmt:<8} {stage:<16} {size_mb:8.1f} {r['seconds']:9.3f} "
+                      f"{r['rows'] / r['seconds']:11,.0f} {r['mb_per_s']:7.1f} {_peak_rss_mb():12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Concurrent read throughput: sync (threadpool) vs async (asyncpg) database stack.
+
+Fires --requests GETs at each read endpoint with --concurrency requests in flight,
+in-process through the ASGI app (one event loop, like a single uvicorn worker),
+once with DB_ASYNC_READS off and once with it on, and reports requests/s and
+p50/p95 latency per endpoint and stack.
+
+The database is seeded with --rows synthetic findings when it holds fewer, so
+point it at the scratch benchmark database:
+    cd api
+    BENCHMARK_DATABASE_URL=postgresql+psycopg2://.../grc_bench \\
+        python -m benchmarks.read_concurrency --concurrency 50 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+ENDPOINTS = [
+    "/dashboard/summary",
+    "/dashboard/compliance/status",
+    "/findings?limit=50",
+    "/findings?limit=50&severity=High",
+]
+
+
+def seed(rows: int):
+    from app.core import database
+    from app.core.models import Finding
+    from app.data_ingestion.pipeline import BULK_CHUNK_SIZE, ingest_batches
+    from app.data_ingestion.synthetic import iter_scan_batches
+
+    db = database.SessionLocal()
+    try:
+        existing = db.query(Finding).count()
+        if existing < rows:
+            ingest_batches(
+                db, iter_scan_batches(rows - existing, hosts=max(rows // 20, 1), seed=existing, batch_size=BULK_CHUNK_SIZE),
+                "benchmark",
+            )
+    finally:
+        db.close()
+
+async def hammer(client, url: str, total: int, concurrency: int) -> dict:
+    """Sends `total` GETs with `concurrency` in flight; returns throughput and latency percentiles."""
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url}: HTTP {response.status_code}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+async def run_stack(async_reads: bool, args) -> dict:
+    import httpx
+    from app.core import database
+    from app.main import app
+
+    database.DB_ASYNC_READS = async_reads
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for url in ENDPOINTS:
+            await hammer(client, url, args.concurrency, args.concurrency)  # warm the pools
+            results[url] = await hammer(client, url, args.requests, args.concurrency)
+    await database.dispose_async_engine()
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.read_concurrency", description=__doc__.split("\n")[1])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per endpoint and stack")
+    parser.add_argument("--rows", type=int, default=100000, help="findings to seed if the database has fewer")
+    args = parser.parse_args(argv)
+
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not url:
+        parser.error("set BENCHMARK_DATABASE_URL to a scratch database")
+    # Must be set before the app's engine is created on import
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("OPENAI_API_KEY", "SK-DUMMYKEYFORSTARTUP")
+
+    from app.core import database, migrations, models
+    from app.crud import crud_aggregates, crud_compliance, crud_risk_models
+    models.Base.metadata.create_all(bind=database.engine)
+    migrations.run_migrations(database.engine)
+    db = database.SessionLocal()
+    crud_compliance.seed_initial_compliance_data(db)
+    crud_risk_models.seed_risk_models(db)
+    crud_aggregates.ensure_aggregates(db)
+    db.close()
+    seed(args.rows)
+
+    print(f"pool_size={database.DB_POOL_SIZE} max_overflow={database.DB_MAX_OVERFLOW} "
+          f"concurrency={args.concurrency} requests={args.requests}")
+    results = {stack: asyncio.run(run_stack(stack == "async", args)) for stack in ("sync", "async")}
+
+    print(f"\n{'endpoint':<36} {'stack':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for endpoint in ENDPOINTS:
+        for stack, by_endpoint in results.items():
+            r = by_endpoint[endpoint]
+            print(f"{endpoint:<36} {stack:<6} {r['rps']:9.0f} {r['p50_ms']:9.1f} {r['p95_ms']:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
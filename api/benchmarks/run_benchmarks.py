@@ -0,0 +1,194 @@
+"""
+Ingestion / analytics benchmark suite.
+
+Feeds synthetic scans (app/data_ingestion/synthetic.py) of each requested size
+through the real ingestion pipeline against a local PostgreSQL database, and times:
+  - normalize, evidence, risk, classify, assets, summaries, persist, mapping, commit
+                                       (per-stage totals from the pipeline)
+  - ingest                             (end-to-end, all chunks)
+  - rebuild_aggregates                 (full aggregate recompute)
+  - rescore                            (set-based re-score of every risk row into a new model version)
+  - dashboard, analytics.<query>       (median of repeated dashboard reads)
+
+Results are compared with the stored baselines (baselines.json next to this file)
+and the run fails (exit 1) when a stage is slower than baseline by more than the
+tolerance. Baselines are machine specific: refresh them with --update-baseline.
+
+The database is TRUNCATED before each size, so it must be a scratch database:
+    cd api
+    BENCHMARK_DATABASE_URL=postgresql+psycopg2://.../grc_bench \\
+        python -m benchmarks.run_benchmarks --sizes 10000,100000,1000000
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines.json"
+
+# Stage slower than baseline * (1 + tolerance) is a regression...
+DEFAULT_TOLERANCE = 0.30
+# ...unless the difference is below this noise floor (seconds)
+NOISE_FLOOR = 0.05
+
+# Repetitions for the (fast) dashboard reads; the median is reported
+QUERY_REPEAT = 7
+
+RESET_SQL = (
+    "TRUNCATE finding_control_link, risks, finding_evidence, findings, evidence_schemas, assets, ai_summaries, "
+    "agg_risk_rating_counts, agg_control_severity_counts, agg_finding_trend_counts "
+    "RESTART IDENTITY CASCADE"
+)
+
+
+def _median_seconds(fn, repeat: int = QUERY_REPEAT) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def run_size(rows: int, args) -> dict:
+    """Benchmarks one scan size on an emptied database. Returns {stage: seconds}."""
+    from sqlalchemy import text
+    from app.core import database
+    from app.compliance_engine.control_mapper import CONTROL_MAPPER
+    from app.crud import crud_aggregates, crud_analytics, crud_compliance, crud_evidence, crud_risk_models
+    from app.crud.crud_findings import ASSET_RESOLVER
+    from app.crud.crud_summaries import SUMMARY_CACHE
+    from app.data_ingestion.pipeline import BULK_CHUNK_SIZE, ingest_batches
+    from app.data_ingestion.synthetic import iter_scan_batches
+    from app.risk_engine.risk_calc import RISK_MATRIX
+    from app.routers.dashboard import build_dashboard_summary
+
+    db = database.SessionLocal()
+    try:
+        # 1. Empty database, cold in-process caches
+        db.execute(text(RESET_SQL))
+        db.commit()
+        crud_compliance.seed_initial_compliance_data(db)
+        crud_risk_models.seed_risk_models(db)
+        ASSET_RESOLVER.clear()
+        SUMMARY_CACHE.clear()
+        crud_evidence.EVIDENCE_SCHEMA_CACHE.clear()
+        CONTROL_MAPPER.match.cache_clear()
+
+        # 2. Generate every batch up front so generation is not timed
+        batches = list(iter_scan_batches(
+            rows, hosts=args.hosts or max(rows // 20, 1), titles=args.titles,
+            nan_rate=args.nan_rate, seed=args.seed, batch_size=BULK_CHUNK_SIZE,
+        ))
+
+        # 3. Ingestion, with per-stage timings from the pipeline
+        timings = {}
+        start = time.perf_counter()
+        result = ingest_batches(db, batches, "benchmark", timings=timings)
+        timings["ingest"] = time.perf_counter() - start
+        del batches
+        if result["count"] == 0:
+            raise RuntimeError(f"Nothing was ingested: {result['errors'][:3]}")
+
+        db.execute(text("ANALYZE"))
+        db.commit()
+        storage_mb = db.execute(text(
+            "SELECT (pg_total_relation_size('findings') + pg_total_relation_size('finding_evidence')) / 1e6"
+        )).scalar()
+
+        # 4. Aggregate rebuild
+        start = time.perf_counter()
+        crud_aggregates.rebuild_aggregates(db)
+        timings["rebuild_aggregates"] = time.perf_counter() - start
+
+        # 5. Re-score everything into a new model version (scores shifted so every row is rewritten)
+        definition = dict(RISK_MATRIX.definition, name="benchmark")
+        definition["likelihood"] = {severity: n + 1 for severity, n in definition["likelihood"].items()}
+        version = crud_risk_models.register_risk_model(db, definition).version
+        start = time.perf_counter()
+        crud_risk_models.rescore(db, version)
+        timings["rescore"] = time.perf_counter() - start
+
+        # 6. Dashboard reads
+        timings["dashboard"] = _median_seconds(lambda: build_dashboard_summary(db))
+        for name, build in crud_analytics.ANALYTICS_QUERIES.items():
+            timings[f"analytics.{name}"] = _median_seconds(lambda: build(db).all())
+    finally:
+        db.close()
+
+    print(f"\n{rows:,} rows ({result['count']:,} ingested, {result['failed_rows']:,} rejected)")
+    for stage, seconds in timings.items():
+        print(f"  {stage:<32} {seconds:9.3f}s")
+    print(f"  {'throughput':<32} {rows / timings['ingest']:9,.0f} rows/s")
+    print(f"  {'findings storage':<32} {storage_mb:9.1f} MB")
+    return {stage: round(seconds, 4) for stage, seconds in timings.items()}
+
+def compare(results: dict, baselines: dict, tolerance: float) -> list:
+    """Returns human-readable regression lines (empty when everything is within tolerance)."""
+    regressions = []
+    for size, stages in results.items():
+        for stage, seconds in stages.items():
+            base = baselines.get("results", {}).get(size, {}).get(stage)
+            if base is None:
+                continue
+            if seconds > base * (1 + tolerance) and seconds - base > NOISE_FLOOR:
+                regressions.append(
+                    f"{size} rows / {stage}: {seconds:.3f}s vs baseline {base:.3f}s (+{(seconds / base - 1):.0%})"
+                )
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run_benchmarks", description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated row counts")
+    parser.add_argument("--hosts", type=int, default=0, help="distinct hosts (default rows/20)")
+    parser.add_argument("--titles", type=int, default=200, help="distinct titles")
+    parser.add_argument("--nan-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args(argv)
+
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not url:
+        parser.error("set BENCHMARK_DATABASE_URL to a scratch database (it is truncated)")
+    # Must be set before the app's engine is created on import
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("OPENAI_API_KEY", "SK-DUMMYKEYFORSTARTUP")
+
+    from app.core import database, migrations, models
+    models.Base.metadata.create_all(bind=database.engine)
+    migrations.run_migrations(database.engine)
+
+    results = {}
+    for size in [int(s) for s in args.sizes.split(",")]:
+        results[str(size)] = run_size(size, args)
+
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if args.update_baseline:
+        merged = baselines.get("results", {})
+        merged.update(results)
+        args.baseline.write_text(json.dumps({
+            "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "machine": f"{platform.system()} {platform.machine()} / Python {platform.python_version()}",
+            "params": {"hosts": args.hosts, "titles": args.titles, "nan_rate": args.nan_rate, "seed": args.seed},
+            "results": merged,
+        }, indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    regressions = compare(results, baselines, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print("  " + line)
+        sys.exit(1)
+    print("\nNo regressions against baseline." if baselines else "\nNo baseline yet (run with --update-baseline).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Tests run from api/ (python -m pytest tests) and import the app package directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.core.database builds its engine at import time; these tests never connect
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://localhost/unused")
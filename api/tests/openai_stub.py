@@ -0,0 +1,125 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint.
+
+Serves POST /v1/chat/completions on 127.0.0.1 so the summary worker pool can be
+exercised without network access (point OPENAI_BASE_URL at `stub.base_url`).
+The behaviour of each call is picked from the finding title in the prompt:
+  - titles containing "timeout" answer after `slow_seconds` (longer than the pool timeout)
+  - titles containing "flaky" get HTTP 500 for their first `failures_before_success` calls
+  - anything else gets a completion after `delay_seconds`
+Calls and the peak number of concurrent requests are recorded.
+
+Standalone: python -m tests.openai_stub --port 8765
+"""
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+STUB_SUMMARY = "Stub summary."
+
+
+class OpenAIStub:
+    """Threaded HTTP server mimicking POST /v1/chat/completions."""
+
+    def __init__(
+        self,
+        port: int = 0,
+        delay_seconds: float = 0.05,
+        slow_seconds: float = 2.0,
+        failures_before_success: int = 2,
+    ):
+        self.delay_seconds = delay_seconds
+        self.slow_seconds = slow_seconds
+        self.failures_before_success = failures_before_success
+        self.calls: Counter = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> "OpenAIStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _respond(self, prompt: str) -> int:
+        """Returns the HTTP status for one call, sleeping as the scenario requires."""
+        with self._lock:
+            self.calls[prompt] += 1
+            attempt = self.calls[prompt]
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if "flaky" in prompt and attempt <= self.failures_before_success:
+                return 500
+            time.sleep(self.slow_seconds if "timeout" in prompt else self.delay_seconds)
+            return 200
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                if self.path.rstrip("/") != "/v1/chat/completions":
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = " ".join(message["content"] for message in body["messages"])
+                status = stub._respond(prompt)
+                if status != 200:
+                    self._send_json(status, {"error": {"message": "stub failure", "type": "server_error"}})
+                    return
+                self._send_json(200, {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body["model"],
+                    "choices": [{
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": f" {STUB_SUMMARY} "},
+                    }],
+                    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                })
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client timed out and hung up
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    stub = OpenAIStub(port=args.port)
+    print(f"OpenAI stub listening on {stub.base_url}")
+    stub._server.serve_forever()
@@ -0,0 +1,61 @@
+"""COPY text encoding used by the bulk ingestion writers (bulk_copy)."""
+import json
+from datetime import datetime
+
+from app.core.database import PreSerializedJSON
+from app.crud import bulk_copy
+
+
+class RecordingCursor:
+    """Captures what copy_expert would stream to the server."""
+
+    def __init__(self):
+        self.sql = None
+        self.data = None
+
+    def copy_expert(self, sql, buf):
+        self.sql, self.data = sql, buf.read()
+
+def _unescape(field: str):
+    # COPY text format, as the server reads it
+    if field == "\\N":
+        return None
+    out, chars = [], iter(field)
+    for ch in chars:
+        if ch == "\\":
+            ch = {"t": "\t", "n": "\n", "r": "\r", "\\": "\\"}[next(chars)]
+        out.append(ch)
+    return "".join(out)
+
+def _copy(rows):
+    cursor = RecordingCursor()
+    bulk_copy._copy(cursor, "findings", list(rows[0]), rows)
+    lines = cursor.data.split("\n")
+    assert lines[-1] == ""
+    return cursor.sql, [[_unescape(field) for field in line.split("\t")] for line in lines[:-1]]
+
+
+def test_copy_statement_lists_the_columns():
+    sql, _ = _copy([{"fingerprint": "abc", "status": "open"}])
+    assert sql == "COPY findings (fingerprint, status) FROM STDIN"
+
+def test_text_values_round_trip():
+    values = ["plain", "tab\there", "new\nline", "crlf\r\n", "back\\slash", "\\N", "", "ünïcødé ✓"]
+    _, rows = _copy([{"title": value} for value in values])
+    assert [row[0] for row in rows] == values
+
+def test_null_numbers_and_datetimes():
+    seen_at = datetime(2024, 3, 14, 9, 26, 53, 589793)
+    _, rows = _copy([{"id": 7, "score": 12.5, "summary_id": None, "seen": seen_at, "flag": True}])
+    assert rows == [["7", "12.5", None, "2024-03-14 09:26:53.589793", "True"]]
+
+def test_json_values():
+    evidence = {"Plugin_Output": "line 1\nline 2\t\\", "Port": 443, "CVE": None}
+    _, rows = _copy([
+        {"raw_evidence": evidence},
+        {"raw_evidence": PreSerializedJSON(json.dumps(["a\tb", None]))},
+        {"raw_evidence": None},
+    ])
+    assert json.loads(rows[0][0]) == evidence
+    assert json.loads(rows[1][0]) == ["a\tb", None]
+    assert rows[2][0] is None
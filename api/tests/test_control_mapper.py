@@ -0,0 +1,56 @@
+"""ControlMapper (one compiled regex per title) against the keyword logic it replaced."""
+import pytest
+
+from app.compliance_engine.control_mapper import CONTROL_MAPPER, ControlMapper
+from app.crud import crud_compliance
+
+PATCH = "Patch Management & Configuration Hardening"
+ACCESS = "Access Control & Principle of Least Privilege"
+
+def _keyword_match(finding_title: str) -> list:
+    """The if-chain match_control_names used before the rules became data."""
+    title = finding_title.lower()
+    control_names = []
+    if "patch" in title or "ssh" in title or "config" in title:
+        control_names.append(PATCH)
+    if "access" in title or "privilege" in title:
+        control_names.append(ACCESS)
+    return control_names
+
+TITLES = [
+    # neither keyword set
+    "", "Outdated OpenSSL", "Weak TLS ciphers", "Cross-site scripting",
+    # one keyword set
+    "Missing security patch", "SSH weak MAC algorithms", "Insecure config file", "Misconfiguration",
+    "Unrestricted access", "Privilege escalation",
+    # both keyword sets
+    "Unpatched SSH allows privileged access", "Config grants excessive privilege",
+    # mixed case
+    "PATCH Tuesday", "OpenSsh", "Remote ACCESS via SsH", "PrIvIlEgE cOnFiG",
+    # keywords inside other words and repeated
+    "sshd_config", "accessibility", "patchpatch access access",
+]
+
+
+@pytest.mark.parametrize("title", TITLES)
+def test_match_is_the_old_keyword_logic(title):
+    assert list(CONTROL_MAPPER.match(title)) == _keyword_match(title)
+
+@pytest.mark.parametrize("title", TITLES)
+def test_match_control_names_wraps_the_mapper(title):
+    assert crud_compliance.match_control_names(title) == _keyword_match(title)
+
+def test_control_context_joins_the_matches():
+    assert crud_compliance.control_context("Unpatched SSH allows privileged access") == f"{PATCH}; {ACCESS}"
+    assert crud_compliance.control_context("Outdated OpenSSL") == ""
+
+def test_overlapping_keywords_report_every_rule():
+    # "password" contains "pass" and "word"; the longest-first lookahead must not hide the shorter ones
+    rules = {"A": ["pass"], "B": ["password"], "C": ["word"], "D": ["passwd"]}
+    mapper = ControlMapper(rules)
+    for title in ["Default password", "passwd file readable", "Passphrase", "keyword", "PASSWORD reuse", "none"]:
+        expected = [name for name, keywords in rules.items() if any(k in title.lower() for k in keywords)]
+        assert list(mapper.match(title)) == expected, title
+
+def test_no_rules_matches_nothing():
+    assert ControlMapper({}).match("Missing patch") == ()
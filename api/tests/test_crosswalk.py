@@ -0,0 +1,88 @@
+"""CrosswalkIndex: framework -> controls and control -> row lookups, and the heatmaps built on them."""
+import pytest
+
+from app.compliance_engine.crosswalk import HEATMAP_SEVERITIES, CrosswalkIndex, framework_key
+
+PATCH = (1, "Patch Management & Configuration Hardening", "Integrity, Availability")
+ACCESS = (2, "Access Control & Principle of Least Privilege", "Confidentiality")
+LOGGING = (3, "Audit Logging", "Integrity")
+
+# (framework, version, reference, control id, control name, CIA domain), as get_crosswalk selects them
+ROWS = [
+    ("ISO 27001", "2022", "A.12.6.1", *PATCH),
+    ("ISO 27001", "2022", "A.9.2.3", *ACCESS),
+    ("NIST 800-53", "Rev 5", "CM-3", *PATCH),
+    ("NIST 800-53", "Rev 5", "AC-3", *ACCESS),
+    ("NIST 800-53", "Rev 5", "AU-12", *LOGGING),
+    ("NIST 800-53", "Rev 5", "AC-12", *ACCESS),
+    ("SOC 2", "2017", None, None, None, None),
+]
+
+@pytest.fixture
+def crosswalk():
+    return CrosswalkIndex(ROWS)
+
+
+@pytest.mark.parametrize("name", ["NIST 800-53", "nist 800-53", "nist-800-53", "NIST80053", " Nist_800.53 "])
+def test_framework_lookup_ignores_case_and_punctuation(crosswalk, name):
+    entry = crosswalk.framework(name)
+    assert entry["framework"] == "NIST 800-53" and entry["version"] == "Rev 5"
+    assert framework_key(name) == "nist80053"
+
+def test_unknown_framework(crosswalk):
+    assert crosswalk.framework("PCI DSS") is None
+    assert crosswalk.framework("NIST") is None  # a prefix is not a match
+
+def test_framework_to_controls_in_reference_order(crosswalk):
+    nist = crosswalk.framework("NIST 800-53")
+    assert nist["references"] == ["AC-3", "AC-12", "AU-12", "CM-3"]
+    assert [crosswalk.controls[p]["control_id"] for p in nist["positions"].tolist()] == [2, 2, 3, 1]
+    iso = crosswalk.framework("iso 27001")
+    assert iso["references"] == ["A.9.2.3", "A.12.6.1"]
+    assert [crosswalk.controls[p]["control_name"] for p in iso["positions"].tolist()] == [ACCESS[1], PATCH[1]]
+
+def test_control_to_row_and_frameworks(crosswalk):
+    # Each control has one row, shared by every framework that references it
+    assert sorted(crosswalk.position) == [1, 2, 3]
+    assert len(crosswalk.controls) == 3
+    for control_id, name, cia_domain in (PATCH, ACCESS, LOGGING):
+        position = crosswalk.position[control_id]
+        assert crosswalk.controls[position] == {"control_id": control_id, "control_name": name, "cia_domain": cia_domain}
+    frameworks_of = {
+        control_id: sorted(entry["framework"] for entry in crosswalk.frameworks.values()
+                           if crosswalk.position[control_id] in entry["positions"].tolist())
+        for control_id in crosswalk.position
+    }
+    assert frameworks_of == {1: ["ISO 27001", "NIST 800-53"], 2: ["ISO 27001", "NIST 800-53"], 3: ["NIST 800-53"]}
+
+def test_framework_without_controls(crosswalk):
+    soc2 = crosswalk.framework("SOC 2")
+    assert soc2["references"] == [] and soc2["positions"].tolist() == []
+    heatmap = crosswalk.heatmap(soc2, crosswalk.count_matrix([(1, "High", 4)]))
+    assert heatmap["controls"] == []
+    assert heatmap["total"] == 0
+    assert heatmap["totals"] == dict.fromkeys(HEATMAP_SEVERITIES, 0)
+
+def test_count_matrix(crosswalk):
+    counts = crosswalk.count_matrix([
+        (1, "Critical", 2), (1, "High", 3), (1, "High", 1),
+        (2, "Low", 5), (2, "Info", 7), (3, "Unknown", 1),
+        (99, "High", 100),  # not in the crosswalk
+    ])
+    assert counts.shape == (3, len(HEATMAP_SEVERITIES))
+    assert counts[crosswalk.position[1]].tolist() == [2, 4, 0, 0, 0]
+    # Severities outside the heatmap columns are counted as Unknown
+    assert counts[crosswalk.position[2]].tolist() == [0, 0, 0, 5, 7]
+    assert counts[crosswalk.position[3]].tolist() == [0, 0, 0, 0, 1]
+
+def test_heatmap(crosswalk):
+    counts = crosswalk.count_matrix([(1, "Critical", 2), (2, "Medium", 3), (3, "Low", 1)])
+    heatmap = crosswalk.heatmap(crosswalk.framework("NIST 800-53"), counts)
+    assert heatmap["framework"] == "NIST 800-53" and heatmap["severities"] == list(HEATMAP_SEVERITIES)
+    assert [(c["reference"], c["control_id"], c["total"]) for c in heatmap["controls"]] == [
+        ("AC-3", 2, 3), ("AC-12", 2, 3), ("AU-12", 3, 1), ("CM-3", 1, 2),
+    ]
+    assert heatmap["controls"][3]["by_severity"] == {"Critical": 2, "High": 0, "Medium": 0, "Low": 0, "Unknown": 0}
+    # Access Control is referenced twice (AC-3, AC-12) and counted under both references
+    assert heatmap["totals"] == {"Critical": 2, "High": 0, "Medium": 6, "Low": 1, "Unknown": 0}
+    assert heatmap["total"] == 9
@@ -0,0 +1,47 @@
+"""Keyset pagination cursors for GET /findings (encode_cursor / decode_cursor)."""
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app.crud.crud_findings import decode_cursor, encode_cursor
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("ingestion_date, finding_id", [
+    (datetime(2024, 1, 31, 23, 59, 59, 999999), 1),
+    (datetime(2024, 2, 29), 2 ** 40),
+    (datetime(1999, 12, 31, 12, 0, 0, 1), 0),
+    # Lengths that need every amount of base64 padding
+    (datetime(2024, 5, 1, 8, 30), 7),
+    (datetime(2024, 5, 1, 8, 30), 77),
+    (datetime(2024, 5, 1, 8, 30), 777),
+])
+def test_round_trip(ingestion_date, finding_id):
+    cursor = encode_cursor(ingestion_date, finding_id)
+    assert "=" not in cursor
+    assert cursor.isascii() and "+" not in cursor and "/" not in cursor
+    assert decode_cursor(cursor) == (ingestion_date, finding_id)
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "!!!",
+    "not a cursor",
+    _b64(b"\xff\xfe"),
+    _b64(b"[]"),
+    _b64(b"5"),
+    _b64(json.dumps({"date": "2024-01-01", "id": 1}).encode()),
+    _b64(json.dumps(["2024-01-01"]).encode()),
+    _b64(json.dumps(["2024-01-01", 1, 2]).encode()),
+    _b64(json.dumps(["yesterday", 1]).encode()),
+    _b64(json.dumps([20240101, 1]).encode()),
+    _b64(json.dumps(["2024-01-01", None]).encode()),
+    _b64(json.dumps(["2024-01-01", "one"]).encode()),
+    encode_cursor(datetime(2024, 1, 1), 1)[:-3],
+])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
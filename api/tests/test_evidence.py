@@ -0,0 +1,118 @@
+"""Compact evidence storage: compact_evidence_column followed by expand_evidence rebuilds each row."""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.crud import crud_evidence
+
+# (raw evidence row, asset ip, normalized title, normalized severity) as the pipeline passes them
+NESSUS = {
+    "Raw_IP_Address": "10.0.0.1", "Raw_Vulnerability_Title": "Outdated OpenSSL",
+    "Vendor_Severity_Code": "HIGH", "Plugin_Output": "openssl 1.0.2k", "Port": 443,
+}
+ROWS = [
+    (NESSUS, "10.0.0.1", "Outdated OpenSSL", "High"),
+    # same key set: shares the first row's schema
+    ({**NESSUS, "Raw_IP_Address": "10.0.0.2", "Plugin_Output": "openssl 1.1.0"}, "10.0.0.2", "Outdated OpenSSL", "High"),
+    # raw severity spelled differently from the normalized one: stored, not derived
+    ({**NESSUS, "Vendor_Severity_Code": "high"}, "10.0.0.1", "Outdated OpenSSL", "High"),
+    # unknown code mapped to Low: stored
+    ({**NESSUS, "Vendor_Severity_Code": "BOGUS"}, "10.0.0.1", "Outdated OpenSSL", "Low"),
+    # missing title normalized to the default: stored as null
+    ({**NESSUS, "Raw_Vulnerability_Title": None}, "10.0.0.1", "Unknown Finding", "High"),
+    # null and nested values, other key order
+    ({"Port": None, "Raw_IP_Address": "10.0.0.3", "Refs": ["CVE-2024-1", {"cvss": 7.5}], "Vendor_Severity_Code": "LOW"},
+     "10.0.0.3", "Weak ciphers", "Low"),
+    # only derived fields: nothing left to store
+    ({"Raw_IP_Address": "10.0.0.4", "Raw_Vulnerability_Title": "Open port", "Vendor_Severity_Code": "MEDIUM"},
+     "10.0.0.4", "Open port", "Medium"),
+    # large output: compressed out of line
+    ({**NESSUS, "Plugin_Output": "x" * 5000}, "10.0.0.1", "Outdated OpenSSL", "High"),
+    # no scanner columns at all
+    ({}, "10.0.0.5", "Empty row", "Low"),
+]
+
+
+class SchemaSession:
+    """Stands in for the session expand_evidence reads evidence_schemas through."""
+
+    def __init__(self, schemas):
+        self.schemas = schemas
+
+    def get(self, model, schema_id):
+        assert model is crud_evidence.models.EvidenceSchema
+        return self.schemas[schema_id]
+
+
+@pytest.fixture(autouse=True)
+def empty_schema_cache(monkeypatch):
+    monkeypatch.setattr(crud_evidence, "_schemas", {})
+
+def _store_and_expand(rows):
+    """Compacts `rows` the way the pipeline does, then expands every stored finding again."""
+    evidence, ips, titles, severities = (list(column) for column in zip(*rows))
+    hashes, values_json, blobs, schemas = crud_evidence.compact_evidence_column(evidence, ips, titles, severities)
+
+    schema_ids = {key_hash: schema_id for schema_id, key_hash in enumerate(schemas, start=1)}
+    db = SchemaSession({
+        schema_ids[key_hash]: SimpleNamespace(keys=schema["keys"], derived=schema["derived"])
+        for key_hash, schema in schemas.items()
+    })
+    expanded = []
+    for row, key_hash, values, blob in zip(rows, hashes, values_json, blobs):
+        _, ip, title, severity = row
+        finding = SimpleNamespace(
+            evidence_schema_id=schema_ids[key_hash],
+            raw_evidence=json.loads(values) if values is not None else None,
+            evidence_blob=SimpleNamespace(data=blob) if blob is not None else None,
+            asset=SimpleNamespace(ip_address=ip),
+            normalized_title=title,
+            normalized_severity=severity,
+        )
+        expanded.append(crud_evidence.expand_evidence(db, finding))
+    return expanded, hashes, values_json, blobs, schemas
+
+
+def test_round_trip_rebuilds_every_row():
+    expanded, *_ = _store_and_expand(ROWS)
+    for (original, *_), rebuilt in zip(ROWS, expanded):
+        assert rebuilt == original
+        assert list(rebuilt) == list(original)  # key order too
+
+def test_same_key_set_shares_one_schema():
+    _, hashes, values_json, _, schemas = _store_and_expand(ROWS[:2])
+    assert hashes[0] == hashes[1]
+    assert len(schemas) == 1
+    assert schemas[hashes[0]]["derived"] == crud_evidence.DERIVED_FIELDS
+    # only the non-derived values are stored
+    assert json.loads(values_json[1]) == ["openssl 1.1.0", 443]
+
+def test_values_that_differ_from_the_normalized_columns_are_stored():
+    _, hashes, values_json, _, schemas = _store_and_expand(ROWS[2:5])
+    for key_hash, values, field in zip(hashes, values_json, ["Vendor_Severity_Code"] * 2 + ["Raw_Vulnerability_Title"]):
+        assert field not in schemas[key_hash]["derived"]
+    assert json.loads(values_json[0])[0] == "high"
+    assert json.loads(values_json[2])[0] is None
+
+def test_large_values_are_compressed_out_of_line():
+    expanded, _, values_json, blobs, _ = _store_and_expand(ROWS[7:8])
+    assert values_json == [None]
+    assert blobs[0] is not None and len(blobs[0]) < 5000
+    assert expanded[0] == ROWS[7][0]
+
+def test_rows_with_nothing_left_store_no_values():
+    expanded, _, values_json, blobs, _ = _store_and_expand(ROWS[6:7])
+    assert values_json == [None] and blobs == [None]
+    assert expanded[0] == ROWS[6][0]
+
+def test_compression_disabled(monkeypatch):
+    monkeypatch.setattr(crud_evidence, "EVIDENCE_COMPRESS_MIN_BYTES", 0)
+    expanded, _, values_json, blobs, _ = _store_and_expand(ROWS)
+    assert blobs == [None] * len(ROWS)
+    assert values_json[7] is not None
+    assert expanded == [row[0] for row in ROWS]
+
+def test_rows_without_a_schema_are_returned_as_stored():
+    finding = SimpleNamespace(evidence_schema_id=None, raw_evidence=dict(NESSUS))
+    assert crud_evidence.expand_evidence(SchemaSession({}), finding) == NESSUS
@@ -0,0 +1,84 @@
+"""normalize_dataframe (batch path) against normalize_finding (the per-row reference), row by row."""
+import json
+
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+
+from app.data_ingestion.normalization import normalize_dataframe, normalize_finding
+
+SOURCE = "Nessus"
+COLUMNS = ["Raw_IP_Address", "Raw_Vulnerability_Title", "Vendor_Severity_Code", "Plugin_Output"]
+NAN = float("nan")
+
+# (case, raw row); every row is normalized alone and inside one mixed frame
+CASES = [
+    ("upper-case severity", ["10.0.0.1", "Outdated OpenSSL", "CRITICAL", "openssl 1.0.2"]),
+    ("lower-case severity", ["10.0.0.2", "Weak TLS ciphers", "high", "TLSv1.0"]),
+    ("mixed-case severity", ["10.0.0.3", "SMB signing disabled", "Medium", "smb"]),
+    ("info maps to low", ["10.0.0.4", "Open port", "info", "22/tcp"]),
+    ("warning maps to medium", ["10.0.0.5", "Banner disclosure", "WARNING", "nginx"]),
+    ("unknown severity", ["10.0.0.6", "Odd finding", "BOGUS", "x"]),
+    ("missing severity", ["10.0.0.7", "No severity", NAN, "x"]),
+    ("missing title", ["10.0.0.8", NAN, "LOW", "x"]),
+    ("numeric title", ["10.0.0.9", 12345, "LOW", "x"]),
+    ("missing evidence cell", ["10.0.0.10", "No output", "HIGH", NAN]),
+    ("missing ip", [NAN, "Orphan finding", "HIGH", "x"]),
+    ("numeric ip", [167772161, "Integer address", "HIGH", "x"]),
+]
+
+def _reference(raw: dict):
+    """normalize_finding as a row, or None where it rejects the row."""
+    try:
+        return normalize_finding(raw, SOURCE).model_dump()
+    except ValidationError:
+        return None
+
+def _assert_matches(df: pd.DataFrame):
+    batch, errors = normalize_dataframe(df, SOURCE)
+    rejected = {error["row"] for error in errors}
+    rows = iter(batch.to_dict("records"))
+    for pos in range(len(df)):
+        expected = _reference(df.iloc[pos].to_dict())
+        if expected is None:
+            assert pos in rejected, f"row {pos} should be rejected"
+            continue
+        assert pos not in rejected, f"row {pos} should be accepted"
+        got = next(rows)
+        assert got.keys() == expected.keys()
+        for key in expected:
+            assert got[key] == expected[key], (pos, key)
+    assert next(rows, None) is None
+
+
+@pytest.mark.parametrize("case, row", CASES, ids=[case for case, _ in CASES])
+def test_single_row_matches_normalize_finding(case, row):
+    _assert_matches(pd.DataFrame([row], columns=COLUMNS))
+
+def test_mixed_frame_matches_normalize_finding():
+    _assert_matches(pd.DataFrame([row for _, row in CASES], columns=COLUMNS))
+
+def test_rejected_rows_are_reported_by_position():
+    df = pd.DataFrame([row for _, row in CASES], columns=COLUMNS)
+    batch, errors = normalize_dataframe(df, SOURCE)
+    assert [error["row"] for error in errors] == [10, 11]
+    assert all(error["error"] == "Raw_IP_Address is missing or not a string" for error in errors)
+    assert len(batch) == len(CASES) - 2
+
+@pytest.mark.parametrize("missing", ["Vendor_Severity_Code", "Raw_Vulnerability_Title", "Plugin_Output"])
+def test_missing_column_matches_normalize_finding(missing):
+    columns = [column for column in COLUMNS if column != missing]
+    df = pd.DataFrame([row for _, row in CASES], columns=COLUMNS)[columns]
+    _assert_matches(df)
+
+def test_missing_ip_column_rejects_every_row():
+    df = pd.DataFrame([row for _, row in CASES], columns=COLUMNS).drop(columns="Raw_IP_Address")
+    batch, errors = normalize_dataframe(df, SOURCE)
+    assert batch.empty
+    assert [error["row"] for error in errors] == list(range(len(CASES)))
+
+def test_evidence_is_json_safe():
+    df = pd.DataFrame([row for _, row in CASES], columns=COLUMNS)
+    batch, _ = normalize_dataframe(df, SOURCE)
+    for evidence in batch["raw_evidence"]:
+        json.dumps(evidence, allow_nan=False)
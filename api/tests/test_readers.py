@@ -0,0 +1,100 @@
+"""Source readers on the small scans in tests/fixtures (the same five findings in every format)."""
+import io
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from app.data_ingestion import readers
+from app.data_ingestion.normalization import normalize_dataframe
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+FILES = {"csv": "scan.csv", "nessus": "scan.nessus", "jsonl": "scan.jsonl"}
+
+EXPECTED = [
+    ("10.0.0.1", "Outdated OpenSSL", "High"),
+    ("10.0.0.1", "SSH Weak MAC Algorithms", "Low"),
+    ("10.0.0.2", "Missing security patch", "Critical"),
+    ("10.0.0.2", "Open port", "Low"),
+    ("10.0.0.3", "SMB signing disabled", "Medium"),
+]
+
+def _read(file_format: str, batch_size: int = 2) -> list:
+    with open(FIXTURES / FILES[file_format], "rb") as f:
+        return list(readers.READERS[file_format](f, batch_size))
+
+def _normalized(chunks: list) -> list:
+    rows = []
+    for chunk in chunks:
+        batch, errors = normalize_dataframe(chunk, "test")
+        assert errors == []
+        rows.extend(batch[["ip_address", "normalized_title", "normalized_severity"]].itertuples(index=False, name=None))
+    return rows
+
+
+@pytest.mark.parametrize("file_format", list(FILES))
+def test_every_format_gives_the_same_findings(file_format):
+    assert _normalized(_read(file_format)) == EXPECTED
+
+@pytest.mark.parametrize("file_format", list(FILES))
+@pytest.mark.parametrize("batch_size", [1, 2, 5, 100])
+def test_chunks_respect_the_batch_size(file_format, batch_size):
+    chunks = _read(file_format, batch_size)
+    # Blank JSON lines count towards a chunk, so chunks may come out short but never empty
+    assert all(0 < len(chunk) <= batch_size for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == len(EXPECTED)
+    assert set(readers.INPUT_COLUMNS) <= set(chunks[0].columns)
+
+def test_nessus_evidence_columns():
+    rows = pd.concat(_read("nessus")).to_dict("records")
+    assert list(rows[0]) == readers.NESSUS_COLUMNS
+    assert rows[0]["Hostname"] == "web01.example.com"
+    assert rows[0]["Port"] == "443"
+    assert rows[0]["CVE"] == "CVE-2016-2107,CVE-2016-2105"
+    assert rows[0]["Synopsis"] == "The remote OpenSSL is out of date."
+    # No host-ip tag: the ReportHost name is the address
+    assert rows[2]["Raw_IP_Address"] == "10.0.0.2" and rows[2]["Hostname"] is None
+    assert rows[2]["CVSS3_Base_Score"] == "9.8"
+    assert rows[3]["CVE"] is None and rows[3]["Risk_Factor"] is None
+
+def test_jsonl_aliases_are_folded_into_the_input_columns():
+    chunk = pd.concat(_read("jsonl", batch_size=100))
+    assert not {alias for aliases in readers.JSONL_FIELD_ALIASES.values() for alias in aliases} & set(chunk.columns)
+    assert chunk["Vendor_Severity_Code"].tolist() == ["HIGH", "LOW", "CRITICAL", "INFO", "MEDIUM"]
+    assert chunk["port"].tolist()[:2] == [443, 22]
+
+def test_jsonl_invalid_line():
+    with pytest.raises(ValueError, match="Invalid JSON lines input"):
+        list(readers.iter_jsonl_batches(io.BytesIO(b'{"ip": "10.0.0.1"}\n{not json}\n'), 10))
+
+@pytest.mark.parametrize("file_format", list(FILES))
+def test_format_is_sniffed_from_the_content(file_format, tmp_path):
+    # The extension is not looked at: copy every fixture to a neutral name
+    path = tmp_path / "upload.bin"
+    shutil.copy(FIXTURES / FILES[file_format], path)
+    assert readers.sniff_format(str(path)) == file_format
+    assert readers.resolve_format(str(path), "Manual Upload") == file_format
+
+def test_sniffing_skips_a_bom_and_blank_lines(tmp_path):
+    path = tmp_path / "upload.bin"
+    path.write_bytes(b"\xef\xbb\xbf\n\n  " + (FIXTURES / FILES["nessus"]).read_bytes())
+    assert readers.sniff_format(str(path)) == "nessus"
+
+def test_format_by_source_name_wins_over_the_content():
+    path = str(FIXTURES / FILES["csv"])
+    assert readers.resolve_format(path, "nessus_xml") == "nessus"
+    assert readers.resolve_format(path, "jsonl") == "jsonl"
+
+def test_explicit_format_wins_and_is_validated():
+    path = str(FIXTURES / FILES["nessus"])
+    assert readers.resolve_format(path, "nessus_xml", "csv") == "csv"
+    with pytest.raises(ValueError, match="Unknown format 'xlsx'"):
+        readers.resolve_format(path, "Manual Upload", "xlsx")
+
+def test_registered_reader_is_picked_by_source(monkeypatch):
+    monkeypatch.setattr(readers, "READERS", dict(readers.READERS))
+    monkeypatch.setattr(readers, "SOURCE_FORMATS", dict(readers.SOURCE_FORMATS))
+    readers.register_reader("tsv", readers.iter_csv_batches, sources=["scanner_tsv"])
+    assert readers.resolve_format(str(FIXTURES / FILES["nessus"]), "scanner_tsv") == "tsv"
+    assert readers.resolve_format(str(FIXTURES / FILES["nessus"]), "Manual Upload", "tsv") == "tsv"
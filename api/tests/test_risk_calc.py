@@ -0,0 +1,80 @@
+"""RiskMatrix (vectorized scoring) against calculate_risk and the original per-finding if/elif rules."""
+import itertools
+
+import pytest
+
+from app.core.schemas import FindingCreate
+from app.risk_engine.risk_calc import RISK_MATRIX, RiskMatrix, calculate_risk
+
+KNOWN = ["Critical", "High", "Medium", "Low"]
+UNKNOWN = ["", "critical", "HIGH", "Info", "Unknown", "Medium "]
+
+# The scoring rules as calculate_risk implemented them before the matrix was made loadable
+LIKELIHOOD = {"Critical": 5, "High": 4, "Medium": 3, "Low": 1}
+IMPACT = {"Critical": 5, "High": 4, "Medium": 3, "Low": 2}
+
+def _rating(score: float) -> str:
+    if score >= 21:
+        return "Critical"
+    elif score >= 13:
+        return "High"
+    elif score >= 7:
+        return "Medium"
+    return "Low"
+
+def _reference(severity: str) -> dict:
+    likelihood = LIKELIHOOD.get(severity, 1)
+    impact = IMPACT.get(severity, 2)
+    return {
+        "inherent_score": float(likelihood * impact),
+        "risk_rating": _rating(float(likelihood * impact)),
+        "cia_confidentiality": impact,
+        "cia_integrity": impact,
+        "cia_availability": impact,
+    }
+
+def _finding(severity: str) -> FindingCreate:
+    return FindingCreate(
+        asset_name="10.0.0.1", ip_address="10.0.0.1", normalized_title="Finding",
+        source_type="Nessus", normalized_severity=severity, raw_evidence={},
+    )
+
+def _rows(scored: dict) -> list:
+    columns = {column: values.tolist() for column, values in scored.items()}
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+@pytest.mark.parametrize("severity", KNOWN + UNKNOWN)
+def test_calculate_risk_matches_original_rules(severity):
+    assert calculate_risk(_finding(severity)).model_dump() == _reference(severity)
+
+def test_score_severities_matches_calculate_risk_row_by_row():
+    severities = (KNOWN + UNKNOWN) * 3
+    rows = _rows(RISK_MATRIX.score_severities(severities))
+    assert rows == [calculate_risk(_finding(severity)).model_dump() for severity in severities]
+
+@pytest.mark.parametrize(
+    "likelihood, impact",
+    list(itertools.product(sorted(set(LIKELIHOOD.values())), sorted(set(IMPACT.values())))),
+)
+def test_every_likelihood_impact_pair(likelihood, impact):
+    row = _rows(RISK_MATRIX.score_matrix([likelihood], [impact]))[0]
+    assert row["inherent_score"] == float(likelihood * impact)
+    assert row["risk_rating"] == _rating(float(likelihood * impact))
+    assert row["cia_confidentiality"] == row["cia_integrity"] == row["cia_availability"] == impact
+
+def test_band_boundaries():
+    scores = [0, 6.99, 7, 12.99, 13, 20.99, 21, 25]
+    ratings = RISK_MATRIX.rate(RISK_MATRIX.score_matrix(scores, [1] * len(scores))["inherent_score"]).tolist()
+    assert ratings == [_rating(score) for score in scores]
+
+def test_unknown_severities_use_the_model_defaults():
+    matrix = RiskMatrix({
+        "likelihood": {"High": 4}, "impact": {"High": 4},
+        "default_likelihood": 2, "default_impact": 3,
+        "rating_bands": [{"min_score": 10, "rating": "High"}, {"min_score": 0, "rating": "Low"}],
+    })
+    rows = _rows(matrix.score_severities(["High", "Zzz", "", "Critical"]))
+    assert [row["inherent_score"] for row in rows] == [16.0, 6.0, 6.0, 6.0]
+    assert [row["risk_rating"] for row in rows] == ["High", "Low", "Low", "Low"]
+    assert [row["cia_integrity"] for row in rows] == [4.0, 3.0, 3.0, 3.0]
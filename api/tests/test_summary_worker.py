@@ -0,0 +1,146 @@
+"""SummaryWorkerPool against the local chat completions stub (no database, no network)."""
+import asyncio
+import time
+from typing import Any, Dict, List
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.risk_engine import ai_utils, summary_worker
+from app.risk_engine.summary_worker import SummaryWorkerPool
+from openai_stub import STUB_SUMMARY, OpenAIStub
+
+
+class InMemoryPool(SummaryWorkerPool):
+    """The real pool, with finished rows collected in memory instead of written to ai_summaries."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.written: Dict[int, Dict[str, Any]] = {}
+
+    def _flush(self):
+        batch, self._results[:] = list(self._results), []
+        self.written.update((row["id"], row) for row in batch)
+
+    def requeue_pending(self):
+        pass
+
+
+class FlakySession:
+    """Session double for _flush: the first `failures` commits raise, later ones record the rows."""
+
+    committed: List[Dict[str, Any]] = []
+    commits = 0
+    failures = 1
+
+    def __init__(self):
+        self.info: Dict[str, Any] = {}
+        self._pending: List[Dict[str, Any]] = []
+
+    def execute(self, statement, params=None):
+        if isinstance(params, list):
+            self._pending.extend(params)
+
+    def commit(self):
+        FlakySession.commits += 1
+        if FlakySession.commits <= FlakySession.failures:
+            raise OperationalError("UPDATE ai_summaries", {}, Exception("connection reset"))
+        FlakySession.committed.extend(self._pending)
+        self.info.clear()
+
+    def rollback(self):
+        self._pending = []
+        self.info.clear()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = OpenAIStub(delay_seconds=0.1, slow_seconds=2.0, failures_before_success=2).start()
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-stub")
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    yield server
+    server.stop()
+
+def _job(summary_id: int, title: str):
+    return (summary_id, {
+        "normalized_title": title,
+        "normalized_severity": "High",
+        "control_context": ai_utils.DEFAULT_CONTROL_CONTEXT,
+    })
+
+def _run(jobs: List, deadline: float = 10.0, **settings) -> Dict[int, Dict[str, Any]]:
+    """Starts a pool, submits `jobs`, waits until every one is written, stops the pool."""
+    pool = InMemoryPool(**{"concurrency": 2, "timeout": 0.5, "max_retries": 2, "backoff": 0.01, **settings})
+
+    async def main():
+        await pool.start()
+        pool.submit(jobs)
+        start = time.perf_counter()
+        expected = len({summary_id for summary_id, _ in jobs})
+        while len(pool.written) + len(pool._results) < expected:
+            assert time.perf_counter() - start < deadline, "summary pool did not finish in time"
+            await asyncio.sleep(0.05)
+        await pool.stop()
+
+    asyncio.run(main())
+    return pool.written
+
+def _calls(stub: OpenAIStub, title: str) -> int:
+    return sum(count for prompt, count in stub.calls.items() if title in prompt)
+
+
+def test_success(stub):
+    written = _run([_job(1, "Outdated OpenSSL")])
+    assert written[1]["status"] == "done"
+    assert written[1]["summary"] == STUB_SUMMARY
+    assert _calls(stub, "Outdated OpenSSL") == 1
+
+def test_timeout_gives_up_after_retries(stub):
+    written = _run([_job(1, "timeout case")], max_retries=1, timeout=0.2)
+    assert written[1]["status"] == "failed"
+    assert written[1]["summary"] == ai_utils.SUMMARY_UNAVAILABLE
+    assert _calls(stub, "timeout case") == 2
+
+def test_server_errors_then_success(stub):
+    written = _run([_job(1, "flaky case")])
+    assert written[1]["status"] == "done"
+    assert written[1]["summary"] == STUB_SUMMARY
+    assert _calls(stub, "flaky case") == 3
+
+def test_concurrency_limit(stub):
+    jobs = [_job(i, f"Finding {i}") for i in range(1, 9)]
+    written = _run(jobs, concurrency=3)
+    assert sorted(written) == list(range(1, 9))
+    assert all(row["status"] == "done" for row in written.values())
+    assert stub.peak_in_flight == 3
+
+def test_resubmitting_a_queued_row_is_a_noop(stub):
+    written = _run([_job(1, "Duplicate finding"), _job(1, "Duplicate finding")])
+    assert list(written) == [1]
+    assert _calls(stub, "Duplicate finding") == 1
+
+def test_flush_error_keeps_rows_for_the_next_tick(stub, monkeypatch):
+    FlakySession.committed, FlakySession.commits = [], 0
+    monkeypatch.setattr(summary_worker, "SessionLocal", FlakySession)
+    monkeypatch.setattr(summary_worker, "FLUSH_INTERVAL", 0.05)
+    pool = SummaryWorkerPool(concurrency=2, timeout=0.5, max_retries=0, backoff=0.01)
+    monkeypatch.setattr(pool, "requeue_pending", lambda: None)
+    jobs = [_job(i, f"Flush case {i}") for i in range(1, 4)]
+
+    async def main():
+        await pool.start()
+        pool.submit(jobs)
+        start = time.perf_counter()
+        while len(FlakySession.committed) < len(jobs):
+            assert time.perf_counter() - start < 10, "summaries were never persisted"
+            await asyncio.sleep(0.05)
+        await pool.stop()
+
+    asyncio.run(main())
+    assert FlakySession.commits >= 2
+    assert sorted(row["id"] for row in FlakySession.committed) == [1, 2, 3]
+    assert all(row["status"] == "done" for row in FlakySession.committed)
+    assert pool._results == []
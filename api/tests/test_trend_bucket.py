@@ -0,0 +1,58 @@
+"""trend_bucket: the rollup bucket a day (or datetime) falls into."""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.crud.crud_aggregates import TREND_GRANULARITIES, trend_bucket
+
+@pytest.mark.parametrize("granularity, day, bucket", [
+    ("day", date(2024, 3, 14), date(2024, 3, 14)),
+    ("week", date(2024, 3, 14), date(2024, 3, 11)),   # Thursday -> Monday
+    ("week", date(2024, 3, 11), date(2024, 3, 11)),   # Monday is its own bucket
+    ("week", date(2024, 3, 17), date(2024, 3, 11)),   # Sunday ends the ISO week
+    ("week", date(2024, 1, 3), date(2024, 1, 1)),
+    ("week", date(2021, 1, 2), date(2020, 12, 28)),   # ISO week crossing the year
+    ("month", date(2024, 3, 14), date(2024, 3, 1)),
+    ("month", date(2024, 2, 29), date(2024, 2, 1)),   # leap day
+    ("month", date(2024, 12, 31), date(2024, 12, 1)),
+])
+def test_bucket_start(granularity, day, bucket):
+    assert trend_bucket(granularity, day) == bucket
+
+@pytest.mark.parametrize("granularity", TREND_GRANULARITIES)
+def test_none_stays_none(granularity):
+    assert trend_bucket(granularity, None) is None
+
+@pytest.mark.parametrize("granularity", TREND_GRANULARITIES)
+def test_every_day_of_a_year_lands_in_its_bucket(granularity):
+    day = date(2023, 12, 1)
+    while day < date(2025, 2, 1):
+        bucket = trend_bucket(granularity, day)
+        assert bucket <= day
+        assert trend_bucket(granularity, bucket) == bucket
+        if granularity == "week":
+            assert bucket.weekday() == 0 and (day - bucket).days < 7
+        elif granularity == "month":
+            assert (bucket.year, bucket.month, bucket.day) == (day.year, day.month, 1)
+        else:
+            assert bucket == day
+        day += timedelta(days=1)
+
+@pytest.mark.parametrize("granularity", TREND_GRANULARITIES)
+def test_naive_datetime_is_bucketed_by_its_day(granularity):
+    result = trend_bucket(granularity, datetime(2024, 3, 14, 23, 59, 59))
+    assert type(result) is date
+    assert result == trend_bucket(granularity, date(2024, 3, 14))
+
+@pytest.mark.parametrize("granularity, moment, bucket", [
+    # 01:30 on March 1st in UTC+02:00 is still February 29th in UTC
+    ("day", datetime(2024, 3, 1, 1, 30, tzinfo=timezone(timedelta(hours=2))), date(2024, 2, 29)),
+    ("month", datetime(2024, 3, 1, 1, 30, tzinfo=timezone(timedelta(hours=2))), date(2024, 2, 1)),
+    # 20:00 on Sunday in UTC-05:00 is Monday in UTC: a new week
+    ("week", datetime(2024, 3, 17, 20, 0, tzinfo=timezone(timedelta(hours=-5))), date(2024, 3, 18)),
+    ("day", datetime(2024, 3, 14, 12, 0, tzinfo=timezone.utc), date(2024, 3, 14)),
+])
+def test_aware_datetime_is_bucketed_by_its_utc_day(granularity, moment, bucket):
+    result = trend_bucket(granularity, moment)
+    assert type(result) is date
+    assert result == bucket